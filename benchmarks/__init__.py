@@ -0,0 +1 @@
+"""Benchmarks for the Localvolts integration; see run.py."""
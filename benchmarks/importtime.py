@@ -0,0 +1,136 @@
+"""Import-time benchmark for the Localvolts integration.
+
+Home Assistant imports an integration's package at boot, and the config
+flow module whenever the flow is opened, so whatever those pull in is
+paid for before anything else happens. This runs `python -X importtime`
+in a fresh interpreter per sample, with the parts of Home Assistant that
+are always loaded by then imported first, and reports per target:
+
+- cumulative_ms: importing the module itself, including everything it
+  newly pulled in (median over --rounds interpreters)
+- modules: how many modules that was, and which of the integration's own
+  and the notable third-party ones (aiohttp, dateutil, requests, ...)
+
+Usage, from the repository root (needs homeassistant installed):
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --save      # ...and update importtime.json
+    python -m benchmarks.importtime --compare   # fail on regressions vs importtime.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+from .run import compare
+
+RESULTS = pathlib.Path(__file__).with_name("importtime.json")
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.localvolts"
+# Already imported by the time Home Assistant loads an integration
+BASELINE = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_registry",
+)
+TARGETS = (
+    f"{PACKAGE}.config_flow",
+    PACKAGE,
+    f"{PACKAGE}.sensor",
+)
+# Third-party and Home Assistant modules worth naming when a target pulls them in
+NOTABLE = ("aiohttp", "dateutil", "requests", "homeassistant.components.sensor")
+
+
+def _sample(target: str) -> Tuple[float, List[str]]:
+    """Import target in a fresh interpreter; return its cumulative ms and new modules."""
+    code = f"import {', '.join(BASELINE)}; import {target}"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    # Lines are "import time: self | cumulative | name", children before
+    # their parent; everything after the baseline's last line is new.
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    last_baseline = max(
+        index for index, (_us, name) in enumerate(rows) if name in BASELINE
+    )
+    new = rows[last_baseline + 1:]
+    return new[-1][0] / 1000, [name for _us, name in new]
+
+
+def bench_target(target: str, rounds: int) -> Dict[str, Any]:
+    samples = [_sample(target) for _ in range(rounds)]
+    modules = samples[-1][1]
+    own = sorted(name for name in modules if name.startswith(PACKAGE + "."))
+    notable = sorted(
+        {prefix for prefix in NOTABLE for name in modules
+         if name == prefix or name.startswith(prefix + ".")}
+    )
+    return {
+        "cumulative_ms": statistics.median(ms for ms, _modules in samples),
+        "modules": len(modules),
+        "integration_modules": [name[len(PACKAGE) + 1:] for name in own],
+        "notable_imports": notable,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--save", action="store_true", help=f"write results to {RESULTS.name}")
+    parser.add_argument("--compare", action="store_true", help=f"fail on regressions vs {RESULTS.name}")
+    args = parser.parse_args(argv)
+
+    results = {target: bench_target(target, args.rounds) for target in TARGETS}
+    for target, result in results.items():
+        print(f"{target}: {result['cumulative_ms']:.1f} ms, {result['modules']} modules")
+        print(f"  integration: {', '.join(result['integration_modules']) or '-'}")
+        print(f"  notable: {', '.join(result['notable_imports']) or '-'}")
+
+    status = 0
+    if args.compare and RESULTS.exists():
+        regressions = compare(json.loads(RESULTS.read_text())["results"], results)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        status = 1 if regressions else 0
+    if args.save:
+        from homeassistant.const import __version__ as ha_version
+
+        RESULTS.write_text(json.dumps(
+            {
+                "environment": {
+                    "python": platform.python_version(),
+                    "homeassistant": ha_version,
+                    "machine": platform.machine(),
+                    "date": datetime.date.today().isoformat(),
+                },
+                "results": {
+                    target: {
+                        name: round(value, 1) if isinstance(value, float) else value
+                        for name, value in metrics.items()
+                    }
+                    for target, metrics in results.items()
+                },
+            },
+            indent=2,
+        ) + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Replay API responses through the coordinator under a simulated clock.
+
+Drives the real hub, coordinator and sensors from either a directory of
+recorded responses (written with the "Record API responses" option, one
+NMI's directory under <config>/localvolts_recordings) or generated ones,
+with HA's clock replaced by a simulated one that jumps straight to each
+poll. A day of polling takes seconds, so this is for:
+
+- reproducing a production issue offline, from the recording of the day
+  it happened: late 'exp' data, malformed records, outages, auth errors
+- soak tests: memory growth and state-write volume over simulated weeks
+
+and reports polls, requests, failures and entity state writes (count and
+JSON bytes) per simulated day, plus traced memory with --trace-memory
+(which makes the run several times slower).
+
+Usage, from the repository root (needs homeassistant installed):
+
+    python -m benchmarks.replay RECORDING_DIR
+    python -m benchmarks.replay --synthetic --days 14 --trace-memory
+    python -m benchmarks.replay --synthetic --record /tmp/recordings
+    python -m benchmarks.replay --synthetic --days 1 --error-rate 0.05 \\
+        --outage-at 6 --outage-hours 2 --auth-error-at 20
+
+Polls follow the hub's own adaptive schedule; --poll-seconds N instead
+refreshes every N seconds, like the old fixed timer did.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import logging
+import pathlib
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from tests.common import FakeLocalvoltsApi
+from .run import _entities, _make_hass
+
+NMI = "4103326458"
+# How long after an interval starts the generated API publishes it
+PUBLISH_LAG = (10.0, 40.0)
+
+
+class SimulatedClock:
+    """Stands in for homeassistant.util.dt.utcnow; moved on by the replay."""
+
+    def __init__(self, start: datetime.datetime) -> None:
+        self.now = start
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+
+class SyntheticTransport:
+    """Generates responses like the live API's, as of the simulated time.
+
+    The current interval is only published PUBLISH_LAG seconds after it
+    starts, and the forecast is revised every half hour. error_rate fails
+    that fraction of requests with HTTP 503; between outage_start and
+    outage_end every request times out; from auth_error_at on, every
+    request gets the HTTP 500 the API sends for a bad API key.
+    """
+
+    def __init__(
+        self,
+        clock: SimulatedClock,
+        error_rate: float = 0.0,
+        outage: Optional[Tuple[datetime.datetime, datetime.datetime]] = None,
+        auth_error_at: Optional[datetime.datetime] = None,
+        seed: int = 0,
+    ) -> None:
+        self.clock = clock
+        self.api = FakeLocalvoltsApi()
+        self.error_rate = error_rate
+        self.outage = outage
+        self.auth_error_at = auth_error_at
+        self.requests = 0
+        self._rng = random.Random(seed)
+
+    async def request(
+        self, params: Dict[str, str], headers: Dict[str, str], timeout: float
+    ) -> Tuple[int, bytes]:
+        self.requests += 1
+        now = self.clock()
+        if self.auth_error_at is not None and now >= self.auth_error_at:
+            return 500, b"Invalid API Key (partner: 1)"
+        if self.outage is not None and self.outage[0] <= now < self.outage[1]:
+            raise asyncio.TimeoutError
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return 503, b"Service Unavailable"
+        from_time = datetime.datetime.fromisoformat(params["from"].replace("Z", "+00:00"))
+        to_time = datetime.datetime.fromisoformat(params["to"].replace("Z", "+00:00"))
+        self.api.revision = int(now.timestamp() // 1800)
+        as_of = now - datetime.timedelta(seconds=self._rng.uniform(*PUBLISH_LAG))
+        return 200, json.dumps(self.api.payload(from_time, to_time, as_of)).encode()
+
+
+def _state_writer(entity, totals: Dict[str, int]):
+    from homeassistant.helpers.json import json_bytes
+
+    def write() -> None:
+        # What async_write_ha_state would serialise
+        state = {"state": str(entity.native_value), "attributes": entity.extra_state_attributes}
+        totals["writes"] += 1
+        totals["bytes"] += len(json_bytes(state))
+
+    return write
+
+
+async def replay(
+    transport: Any,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    clock: SimulatedClock,
+    poll_seconds: Optional[float] = None,
+    trace_memory: bool = False,
+    record: Optional[pathlib.Path] = None,
+) -> Dict[str, Any]:
+    from homeassistant.util import dt as dt_util
+
+    from custom_components.localvolts import coordinator as coordinator_module
+    from custom_components.localvolts import hub as hub_module
+    from custom_components.localvolts.transport import ResponseRecorder
+
+    clock.now = start
+    days: List[Dict[str, Any]] = []
+    with patch.object(dt_util, "utcnow", clock):
+        hass = await _make_hass()
+        try:
+            hub = hub_module.LocalvoltsPartnerHub(hass, "0" * 32, "1")
+            hub.transport = transport
+            coordinator = coordinator_module.LocalvoltsDataUpdateCoordinator(hass, hub, NMI)
+            if record is not None:
+                coordinator.recorder = ResponseRecorder(hass, record)
+            # Not hub.async_add_coordinator: that arms a real-time timer
+            hub._coordinators.add(coordinator)
+            totals = {"writes": 0, "bytes": 0}
+            for entity in await _entities(hass, coordinator):
+                coordinator.async_add_listener(
+                    _state_writer(entity, totals), entity.coordinator_context
+                )
+
+            gc.collect()
+            if trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            polls = failures = 0
+            day_end = start + datetime.timedelta(days=1)
+            stopped = None
+
+            previous = {"polls": 0, "failures": 0, "writes": 0, "bytes": 0}
+
+            def end_day() -> None:
+                nonlocal day_end
+                day: Dict[str, Any] = {
+                    "day": len(days) + 1,
+                    "polls": polls - previous["polls"],
+                    "failed_polls": failures - previous["failures"],
+                    "state_writes": totals["writes"] - previous["writes"],
+                    "state_write_kb": round((totals["bytes"] - previous["bytes"]) / 1024, 1),
+                }
+                previous.update(polls=polls, failures=failures, **totals)
+                if trace_memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    day["memory_kb"] = round(current / 1024, 1)
+                    day["peak_memory_kb"] = round(peak / 1024, 1)
+                days.append(day)
+                day_end += datetime.timedelta(days=1)
+
+            while clock.now < end:
+                if poll_seconds:
+                    clock.now += datetime.timedelta(seconds=poll_seconds)
+                    await coordinator.async_refresh()
+                else:
+                    wake = hub.next_wakeup(clock.now)
+                    if wake is None:
+                        stopped = clock.now
+                        break
+                    clock.now = wake
+                    await hub.async_poll_due()
+                if coordinator._forecast_task is not None:
+                    await coordinator._forecast_task
+                await hass.async_block_till_done()
+                polls += 1
+                failures += not coordinator.last_update_success
+                if clock.now >= day_end:
+                    end_day()
+            if polls > previous["polls"]:
+                end_day()
+            wall = time.perf_counter() - started
+            if trace_memory:
+                tracemalloc.stop()
+            if coordinator.recorder is not None:
+                await coordinator.recorder.async_flush()
+            counters = coordinator.metrics.counters
+            return {
+                "simulated_hours": round((clock.now - start).total_seconds() / 3600, 1),
+                "wall_seconds": round(wall, 1),
+                "polls": polls,
+                "failed_polls": failures,
+                "api_calls": counters["api_calls"],
+                "failed_requests": counters["failed_requests"],
+                "short_circuited_requests": counters["short_circuited_requests"],
+                "malformed_records": counters["malformed_records"],
+                "state_writes": totals["writes"],
+                "state_write_kb": round(totals["bytes"] / 1024, 1),
+                "polling_stopped_at": stopped.isoformat() if stopped else None,
+                "circuit_breaker": hub.breaker.as_dict(),
+                "days": days,
+            }
+        finally:
+            await hass.async_stop(force=True)
+
+
+def _hours(start: datetime.datetime, hours: Optional[float]) -> Optional[datetime.datetime]:
+    return None if hours is None else start + datetime.timedelta(hours=hours)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recordings", nargs="?", type=pathlib.Path, help="one NMI's recording directory")
+    parser.add_argument("--synthetic", action="store_true", help="generate responses instead")
+    parser.add_argument("--days", type=float, default=1.0, help="simulated days (synthetic)")
+    parser.add_argument("--poll-seconds", type=float, help="poll every N seconds, ignoring the schedule")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failed with 503")
+    parser.add_argument("--outage-at", type=float, help="hours in when every request starts timing out")
+    parser.add_argument("--outage-hours", type=float, default=1.0)
+    parser.add_argument("--auth-error-at", type=float, help="hours in when the API key stops working")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="report traced memory per day")
+    parser.add_argument("--record", type=pathlib.Path, help="record the responses to this directory")
+    args = parser.parse_args(argv)
+
+    from custom_components.localvolts.transport import ReplayTransport, read_recordings
+
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    clock = SimulatedClock(start)
+    if args.synthetic:
+        outage_start = _hours(start, args.outage_at)
+        transport: Any = SyntheticTransport(
+            clock,
+            args.error_rate,
+            (outage_start, outage_start + datetime.timedelta(hours=args.outage_hours))
+            if outage_start else None,
+            _hours(start, args.auth_error_at),
+            args.seed,
+        )
+        end = start + datetime.timedelta(days=args.days)
+    elif args.recordings is not None:
+        transport = ReplayTransport(read_recordings(args.recordings))
+        if transport.start is None:
+            parser.error(f"no recordings in {args.recordings}")
+        start, end = transport.start, transport.end
+    else:
+        parser.error("give a recording directory or --synthetic")
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(
+        replay(transport, start, end, clock, args.poll_seconds, args.trace_memory, args.record)
+    )
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""Benchmarks for the Localvolts integration's hot paths.
+
+Runs the real coordinator and sensors against a local stand-in for the
+API (FakeLocalvoltsApi, in tests/common.py) and reports, per forecast horizon (24h, 48h and
+7 days by default; the longer ones are fetched in concurrent shards):
+
+- poll_cycle_ms: a first refresh, current interval plus forecast
+- noop_poll_us: a refresh within an interval that's already been fetched
+- forecast_unchanged_ms / forecast_revised_ms: a forecast refresh that
+  finds nothing new / every interval re-published
+- loop_block_max_ms: the longest the event loop went unresponsive during
+  the revised forecast refreshes, seen by a task ticking every millisecond
+- ws_snapshot_bytes / ws_expire_delta_bytes: what a forecast websocket
+  subscriber is sent up front, and then when an interval ends
+- <sensor>.attributes_us: building extra_state_attributes from scratch
+- <sensor>.state_bytes: JSON size of the state + attributes HA writes
+- peak_memory_kb: tracemalloc peak over a poll cycle and attribute build
+- retained_memory_kb: what the coordinator still holds after that, i.e.
+  the forecast store, its history and the caches built from it
+- entry_memory_kb: one config entry's whole footprint - coordinator and
+  sensors, with the full attribute profile and a single forecast vintage
+- added_entry_memory_kb: what a second such entry (another NMI) holds on
+  top of that, which should grow with the values it doesn't share with
+  the first rather than with another copy of every record (the tests
+  assert a bound on it)
+
+Usage, from the repository root (needs homeassistant installed):
+
+    python -m benchmarks.run                   # print results
+    python -m benchmarks.run --save            # ...and update results.json
+    python -m benchmarks.run --compare         # fail on regressions vs results.json
+
+results.json is committed, so a change that slows a hot path down shows
+up as a diff in review. Timings are medians over --rounds runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import logging
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from tests.common import FakeLocalvoltsApi
+
+RESULTS = pathlib.Path(__file__).with_name("results.json")
+NMI_ID = "4103326458"
+SECOND_NMI_ID = "4103326459"
+DEFAULT_HOURS = (24, 48, 168)
+NOOP_POLLS = 200
+# --compare flags a metric as regressed past this ratio, ignoring changes
+# too small to be more than timer noise.
+REGRESSION_RATIO = 1.5
+NOISE_FLOOR = {"_ms": 0.5, "_us": 20.0, "_kb": 64.0, "_bytes": 256.0}
+PROBE_TICK = 0.001
+
+
+async def _timed(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    await func()
+    return time.perf_counter() - start
+
+
+class LoopProbe:
+    """Measures how late a 1ms timer fires, i.e. how long the loop blocks."""
+
+    def __init__(self) -> None:
+        self.max_late = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + PROBE_TICK
+            await asyncio.sleep(PROBE_TICK)
+            self.max_late = max(self.max_late, loop.time() - expected)
+
+    def __enter__(self) -> "LoopProbe":
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        assert self._task is not None
+        self._task.cancel()
+
+
+async def _make_hass():
+    from homeassistant.core import HomeAssistant
+
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="localvolts-bench-"))
+    hass.config.components.add("localvolts")
+    return hass
+
+
+async def _make_coordinator(
+    hass, hub_module, coordinator_module, forecast_hours: int = 24, nmi_id: str = NMI_ID,
+    **options: Any,
+):
+    hub = hub_module.LocalvoltsPartnerHub(hass, "0" * 32, "1")
+    return coordinator_module.LocalvoltsDataUpdateCoordinator(
+        hass, hub, nmi_id, forecast_hours=forecast_hours, **options
+    )
+
+
+async def _entities(hass, coordinator, options: Dict[str, Any] | None = None) -> List[Any]:
+    from custom_components.localvolts import sensor
+    from custom_components.localvolts.const import DOMAIN
+
+    entry = SimpleNamespace(
+        entry_id=coordinator.nmi_id, options=options or {}, data={},
+        async_on_unload=lambda func: None,
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    entities: List[Any] = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    return entities
+
+
+def _attributes_from_scratch(entity) -> Any:
+    # Drop any per-generation cache so this measures the actual build
+    if hasattr(entity, "_attributes"):
+        entity._attributes = None
+    return entity.extra_state_attributes
+
+
+async def bench_horizon(hours: int, rounds: int, latency: float, error_rate: float) -> Dict[str, Any]:
+    from homeassistant.helpers.json import json_bytes
+
+    from custom_components.localvolts import coordinator as coordinator_module
+    from custom_components.localvolts import forecast as forecast_module
+    from custom_components.localvolts import hub as hub_module
+    from custom_components.localvolts import records as records_module
+    from custom_components.localvolts.const import (
+        ATTRIBUTE_PROFILE_FULL,
+        CONF_ATTRIBUTE_PROFILE,
+        DOMAIN,
+    )
+    from custom_components.localvolts.websocket_api import DEFAULT_FIELDS, forecast_message
+
+    # Every interval in each requested window, as the live API publishes
+    api = FakeLocalvoltsApi(None, latency=latency, error_rate=error_rate)
+    hub_module.API_URL = await api.start()
+    hass = await _make_hass()
+    results: Dict[str, Any] = {}
+    failures = 0
+    try:
+        cycles = []
+        coordinator = None
+        for _ in range(rounds):
+            coordinator = await _make_coordinator(hass, hub_module, coordinator_module, hours)
+            cycles.append(await _timed(coordinator.async_refresh))
+            failures += not coordinator.last_update_success
+        results["poll_cycle_ms"] = statistics.median(cycles) * 1e3
+        results["poll_cycle_max_ms"] = max(cycles) * 1e3
+
+        noop = await _timed(lambda: _repeat(coordinator.async_refresh, NOOP_POLLS))
+        results["noop_poll_us"] = noop / NOOP_POLLS * 1e6
+
+        # notify=True: the path a background refresh takes, which logs
+        # rather than raises when error injection fails the request.
+        refresh_forecast = lambda: coordinator._async_refresh_forecast(notify=True)  # noqa: E731
+        unchanged = [await _timed(refresh_forecast) for _ in range(rounds)]
+        results["forecast_unchanged_ms"] = statistics.median(unchanged) * 1e3
+        revised = []
+        with LoopProbe() as probe:
+            for _ in range(rounds):
+                api.revision += 1
+                revised.append(await _timed(refresh_forecast))
+        results["forecast_revised_ms"] = statistics.median(revised) * 1e3
+        results["loop_block_max_ms"] = probe.max_late * 1e3
+
+        # What a localvolts/forecast/subscribe client is sent: the snapshot,
+        # then the delta for an interval ending
+        fields = list(DEFAULT_FIELDS)
+        forecast = coordinator.forecast
+        results["ws_snapshot_bytes"] = len(json_bytes(forecast_message(forecast, fields)))
+        results["ws_expire_delta_bytes"] = len(json_bytes(
+            forecast_message(forecast.merge(now=forecast.end[0]), fields, forecast)
+        ))
+
+        entities = await _entities(hass, coordinator)
+        for entity in entities:
+            name = entity.unique_id.split("_", 1)[1]
+            samples = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                attributes = _attributes_from_scratch(entity)
+                samples.append(time.perf_counter() - start)
+            results[f"{name}.attributes_us"] = statistics.median(samples) * 1e6
+            state = {"state": str(entity.native_value), "attributes": dict(attributes or {})}
+            results[f"{name}.state_bytes"] = len(json_bytes(state))
+
+        # Memory last, on a fresh coordinator, so earlier rounds' garbage
+        # doesn't count against it.
+        gc.collect()
+        tracemalloc.start()
+        coordinator = await _make_coordinator(hass, hub_module, coordinator_module, hours)
+        await coordinator.async_refresh()
+        for entity in await _entities(hass, coordinator):
+            _attributes_from_scratch(entity)
+        results["peak_memory_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        gc.collect()
+        results["retained_memory_kb"] = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        results["forecast_intervals"] = len(coordinator.forecast)
+
+        # Then two entries side by side, starting from nothing they could
+        # share with - not even the values pooled above, which would hide
+        # what the first costs. With the full attribute profile, and one
+        # forecast vintage: history is per-NMI numbers by design, and at
+        # the default depth would drown out what sharing saves.
+        hass.data.pop(DOMAIN, None)
+        coordinator = forecast = entities = None
+        records_module._FLOATS = {}
+        forecast_module.parse_utc.cache_clear()
+        gc.collect()
+        tracemalloc.start()
+        full_profile = {CONF_ATTRIBUTE_PROFILE: ATTRIBUTE_PROFILE_FULL}
+        entries = []
+        footprints = []
+        for nmi_id in (NMI_ID, SECOND_NMI_ID):
+            entry = await _make_coordinator(
+                hass, hub_module, coordinator_module, hours, nmi_id, forecast_history_depth=1
+            )
+            await entry.async_refresh()
+            entries.append(await _entities(hass, entry, full_profile))
+            for entity in entries[-1]:
+                _attributes_from_scratch(entity)
+            gc.collect()
+            footprints.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        results["entry_memory_kb"] = footprints[0] / 1024
+        results["added_entry_memory_kb"] = (footprints[1] - footprints[0]) / 1024
+
+        results["api_requests"] = api.requests
+        results["api_bytes"] = api.bytes_sent
+        results["failed_polls"] = failures
+    finally:
+        await hass.async_stop(force=True)
+        await api.stop()
+    return results
+
+
+async def _repeat(func: Callable[[], Any], count: int) -> None:
+    for _ in range(count):
+        await func()
+
+
+def _is_metric(name: str) -> bool:
+    return any(name.endswith(suffix) for suffix in NOISE_FLOOR)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Return a line for every metric that regressed past REGRESSION_RATIO."""
+    regressions = []
+    for size, metrics in current.items():
+        for name, value in metrics.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None or not _is_metric(name):
+                continue
+            floor = next(f for suffix, f in NOISE_FLOOR.items() if name.endswith(suffix))
+            if value > old * REGRESSION_RATIO and value - old > floor:
+                regressions.append(f"{size} {name}: {old:.1f} -> {value:.1f}")
+    return regressions
+
+
+def _print(results: Dict[str, Dict[str, Any]]) -> None:
+    sizes = list(results)
+    names = list(dict.fromkeys(name for metrics in results.values() for name in metrics))
+    width = max(len(name) for name in names)
+    print(f"{'':<{width}}  " + "  ".join(f"{size:>12}" for size in sizes))
+    for name in names:
+        row = []
+        for size in sizes:
+            value = results[size].get(name)
+            row.append(f"{value:>12.1f}" if isinstance(value, float) else f"{value!s:>12}")
+        print(f"{name:<{width}}  " + "  ".join(row))
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=int, nargs="+", default=list(DEFAULT_HOURS), help="forecast horizons")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay per API request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failed with 503")
+    parser.add_argument("--save", action="store_true", help=f"write results to {RESULTS.name}")
+    parser.add_argument("--compare", action="store_true", help=f"fail on regressions vs {RESULTS.name}")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results: Dict[str, Dict[str, Any]] = {}
+    for hours in args.hours:
+        results[f"{hours}h"] = asyncio.run(
+            bench_horizon(hours, args.rounds, args.latency_ms / 1000, args.error_rate)
+        )
+    _print(results)
+
+    status = 0
+    if args.compare and RESULTS.exists():
+        baseline = json.loads(RESULTS.read_text())["results"]
+        regressions = compare(baseline, results)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        status = 1 if regressions else status
+    if args.save:
+        from homeassistant.const import __version__ as ha_version
+
+        RESULTS.write_text(json.dumps(
+            {
+                "environment": {
+                    "python": platform.python_version(),
+                    "homeassistant": ha_version,
+                    "machine": platform.machine(),
+                    "date": datetime.date.today().isoformat(),
+                },
+                "results": {
+                    size: {
+                        name: round(value, 1) if isinstance(value, float) else value
+                        for name, value in metrics.items()
+                    }
+                    for size, metrics in results.items()
+                },
+            },
+            indent=2,
+        ) + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
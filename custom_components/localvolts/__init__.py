@@ -1,20 +1,37 @@
 """The localvolts integration."""
 
+import datetime
+
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_registry as er
 import logging
 import voluptuous as vol
 
-from .coordinator import LocalvoltsDataUpdateCoordinator
+# Re-exported for anything that still imports them from the package
+from .validators import validate_api_key, validate_nmi_id, validate_partner_id  # noqa: F401
 
 from .const import (
     DOMAIN,
     CONF_API_KEY,
     CONF_PARTNER_ID,
-    CONF_NMI_ID
+    CONF_NMI_ID,
+    CONF_FORECAST_REFRESH_MINUTES,
+    CONF_BACKFILL_DAYS,
+    CONF_BACKFILL_REQUEST_BUDGET,
+    CONF_FORECAST_HISTORY_DEPTH,
+    CONF_FORECAST_HOURS,
+    CONF_RECORD_RESPONSES,
+    DEFAULT_FORECAST_REFRESH_MINUTES,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BACKFILL_REQUEST_BUDGET,
+    DEFAULT_FORECAST_HISTORY_DEPTH,
+    DEFAULT_FORECAST_HOURS,
+    DEFAULT_RECORD_RESPONSES,
 )
 
+PLATFORMS = ["binary_sensor", "sensor"]
+
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
@@ -63,6 +80,11 @@ async def _async_migrate_unique_ids(hass: HomeAssistant, config_entry, nmi_id: s
 
 async def async_setup_entry(hass, config_entry):
     """Set up the Localvolts integration from a config entry."""
+    # Imported here rather than at the top: the config flow imports this
+    # package too, and shouldn't have to load the whole fetch stack.
+    from .coordinator import LocalvoltsDataUpdateCoordinator
+    from .hub import async_get_hub
+
     _LOGGER.debug("Setting up the Localvolts component from config entry.")
     
     api_key = config_entry.data[CONF_API_KEY]
@@ -71,17 +93,41 @@ async def async_setup_entry(hass, config_entry):
 
     await _async_migrate_unique_ids(hass, config_entry, nmi_id)
 
-    # Initialize coordinator
-    coordinator = LocalvoltsDataUpdateCoordinator(hass, api_key, partner_id, nmi_id)
-
-    try:
-        await coordinator.async_refresh()
-        if not coordinator.last_update_success:
-            _LOGGER.error("Initial data fetch failed")
-            return False
-    except Exception as err:
-        _LOGGER.error("Error initializing coordinator: %s", err)
-        return False
+    # Initialize coordinator. NMIs sharing an API key and partner ID share
+    # one hub, which owns the polling timer and the HTTP request budget.
+    hub = async_get_hub(hass, api_key, partner_id)
+    forecast_refresh = datetime.timedelta(
+        minutes=config_entry.options.get(
+            CONF_FORECAST_REFRESH_MINUTES, DEFAULT_FORECAST_REFRESH_MINUTES
+        )
+    )
+    coordinator = LocalvoltsDataUpdateCoordinator(
+        hass,
+        hub,
+        nmi_id,
+        forecast_refresh,
+        backfill_days=config_entry.options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS),
+        backfill_request_budget=config_entry.options.get(
+            CONF_BACKFILL_REQUEST_BUDGET, DEFAULT_BACKFILL_REQUEST_BUDGET
+        ),
+        forecast_history_depth=config_entry.options.get(
+            CONF_FORECAST_HISTORY_DEPTH, DEFAULT_FORECAST_HISTORY_DEPTH
+        ),
+        record_responses=config_entry.options.get(
+            CONF_RECORD_RESPONSES, DEFAULT_RECORD_RESPONSES
+        ),
+        forecast_hours=config_entry.options.get(CONF_FORECAST_HOURS, DEFAULT_FORECAST_HOURS),
+    )
+
+    # Don't make HA startup wait on the Localvolts API: show the last saved
+    # data (marked stale) straight away and let the hub's first poll, which
+    # it runs immediately, bring it up to date in the background.
+    if not await coordinator.async_restore():
+        _LOGGER.debug("No cached data for NMI %s, waiting on the first poll", nmi_id)
+    hub.async_add_coordinator(coordinator)
+    # Catch the long-term statistics up on anything missed while we weren't
+    # running (or everything, for a new NMI) - paced, in the background.
+    coordinator.async_start_backfill()
 
     # Store data, keyed by entry_id - a single "coordinator" key here would
     # collide between multiple config entries (e.g. two NMIs), with the
@@ -90,56 +136,48 @@ async def async_setup_entry(hass, config_entry):
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][config_entry.entry_id] = coordinator
 
-    # Load the sensor platform
-    await hass.config_entries.async_forward_entry_setups(config_entry, ["sensor"])
+    # Load the sensor platforms
+    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
     return True
 
 async def async_unload_entry(hass: HomeAssistant, config_entry):
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(config_entry, ["sensor"])
+    from .hub import async_release_hub
+
+    unload_ok = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
     if unload_ok and DOMAIN in hass.data:
-        hass.data[DOMAIN].pop(config_entry.entry_id, None)
+        coordinator = hass.data[DOMAIN].pop(config_entry.entry_id, None)
+        if coordinator is not None:
+            # Off the hub's schedule first, so no poll starts anything new
+            coordinator.hub.async_remove_coordinator(coordinator)
+            await coordinator.async_shutdown()
+            async_release_hub(hass, coordinator.hub)
         if not hass.data[DOMAIN]:
             hass.data.pop(DOMAIN)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, config_entry) -> None:
+    """Delete the entry's warm-start cache, backfill checkpoint and cost totals when it's removed."""
+    from .accumulator import async_remove_accumulator_store
+    from .backfill import async_remove_backfill_store
+    from .coordinator import async_remove_store
+
+    await async_remove_store(hass, config_entry.data[CONF_NMI_ID])
+    await async_remove_backfill_store(hass, config_entry.data[CONF_NMI_ID])
+    await async_remove_accumulator_store(hass, config_entry.data[CONF_NMI_ID])
+
+
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the localvolts component."""
+    from .services import async_setup_services
+    from .websocket_api import async_setup_websocket_api
+
     _LOGGER.debug("Setting up the localvolts component.")
-    # No action needed for YAML configuration, as we are using config entries now
+    # No action needed for YAML configuration, as we are using config entries now.
+    # Services are registered once here rather than per entry, and look the
+    # target coordinator up by config_entry_id when called.
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
     return True
-
-def validate_api_key(api_key):
-    """Validate the API key."""
-    expected_length = 32  # Length of a valid API key
-
-    # Check if the API key is of the expected length and a valid hexadecimal
-    if len(api_key) == expected_length and all(c in '0123456789abcdef' for c in api_key.lower()):
-        return True
-    else:
-        _LOGGER.error("Invalid API key format or length.")
-        return False
-
-def validate_partner_id(partner_id):
-    """Validate the Partner ID."""
-    # Check if the partner_id is a digit string
-    if partner_id.isdigit():
-        return True
-    else:
-        _LOGGER.error("Invalid Partner ID. It should be numeric.")
-        return False
-
-def validate_nmi_id(nmi_id):
-    """Validate the NMI."""
-    expected_length = 11  # Length of a valid NMI is 10 or 11 alphanumeric characters
-
-    # Check if the NMI id is of the expected length and contains only alphanumeric characters
-    if 10 <= len(nmi_id) <= expected_length and nmi_id.isalnum():
-        return True
-    else:
-        _LOGGER.error("Invalid NMI id format or length. NMI must be 10-11 alphanumeric characters.")
-        return False
-
-
@@ -0,0 +1,292 @@
+"""Cost and earnings accumulated from a power sensor, for the Localvolts integration."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import math
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfPower
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import (
+    async_track_point_in_utc_time,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import PowerConverter
+
+from .const import COSTS_FLEX_UP, DOMAIN, EARNINGS_FLEX_UP, SECTION_EXP
+from .forecast import DEFAULT_INTERVAL_MINUTES
+
+if TYPE_CHECKING:
+    from .coordinator import LocalvoltsDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+KIND_COSTS = "costs"
+KIND_EARNINGS = "earnings"
+KINDS = (KIND_COSTS, KIND_EARNINGS)
+# Index into each kind's totals
+PERIOD_INTERVAL = 0
+PERIOD_TODAY = 1
+PERIOD_TOTAL = 2
+
+# The current interval's price arrives with its 'exp' data
+EXP_SECTIONS = frozenset({SECTION_EXP})
+INTERVAL_SECONDS = DEFAULT_INTERVAL_MINUTES * 60
+
+
+def _accumulator_store(hass: HomeAssistant, nmi_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{nmi_id}.accumulator")
+
+
+async def async_remove_accumulator_store(hass: HomeAssistant, nmi_id: str) -> None:
+    """Delete an NMI's saved cost and earnings totals."""
+    await _accumulator_store(hass, nmi_id).async_remove()
+
+
+def _price(entry: Dict[str, Any], field: str) -> float:
+    value = entry.get(field)
+    return math.nan if value is None else value
+
+
+def _local_date(timestamp: float) -> datetime.date:
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date()
+
+
+class CostAccumulator:
+    """Integrates a power sensor against the flex price of each interval.
+
+    Each power state change adds the energy since the one before, at the
+    power that was in effect until then (a state holds until it changes),
+    priced at the current interval's costsFlexUp while importing (positive
+    power) or earningsFlexUp while exporting (negative). The prices are
+    looked up once per interval and again when the coordinator's 'exp'
+    data changes - until that's published, the forecast price stands in -
+    so an update is a few arithmetic operations, however long the
+    forecast. A timer at intervalEnd closes each interval exactly there,
+    so no span is ever priced across two intervals.
+
+    Totals are kept in cents per interval, per local day and in all, and
+    saved so they survive a restart; time Home Assistant wasn't running
+    isn't counted. A change is saved SAVE_DELAY after the last one, but a
+    sensor updating more often than that would put the save off for good,
+    so each interval's rollover also saves outright, and so does stopping.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: "LocalvoltsDataUpdateCoordinator",
+        power_entity_id: str,
+    ) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.power_entity_id = power_entity_id
+        self._store = _accumulator_store(hass, coordinator.nmi_id)
+        # Cents, per kind: this interval, today, in all
+        self.totals: Dict[str, List[float]] = {kind: [0.0, 0.0, 0.0] for kind in KINDS}
+        self.interval_start = 0.0
+        self.interval_end = 0.0
+        self.day: Optional[datetime.date] = None
+        # c/kWh for the current interval; NaN while there's no price
+        self._prices: Tuple[float, float] = (math.nan, math.nan)
+        # kW (negative for export); None while the sensor has no usable state
+        self._power: Optional[float] = None
+        # Epoch up to which energy has been accounted for
+        self._accounted: Optional[float] = None
+        self._listeners: Dict[str, List[CALLBACK_TYPE]] = {kind: [] for kind in KINDS}
+        self._unsub_rollover: Optional[CALLBACK_TYPE] = None
+        self._bad_unit: Optional[str] = None
+
+    @callback
+    def async_add_listener(self, kind: str, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Call update_callback whenever kind's totals change."""
+        self._listeners[kind].append(update_callback)
+        return lambda: self._listeners[kind].remove(update_callback)
+
+    async def async_restore(self) -> None:
+        """Load the saved totals, keeping only the periods still in progress."""
+        now = dt_util.utcnow().timestamp()
+        self._start_interval(now)
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        same_day = stored.get("day") == self.day.isoformat()
+        same_interval = stored.get("interval_end") == self.interval_end
+        for kind in KINDS:
+            saved = stored.get(kind) or ()
+            if len(saved) != 3:
+                continue
+            totals = self.totals[kind]
+            totals[PERIOD_TOTAL] = float(saved[PERIOD_TOTAL])
+            if same_day:
+                totals[PERIOD_TODAY] = float(saved[PERIOD_TODAY])
+            if same_interval:
+                totals[PERIOD_INTERVAL] = float(saved[PERIOD_INTERVAL])
+
+    @callback
+    def async_start(self) -> Callable[[], Coroutine[Any, Any, None]]:
+        """Start following the power sensor and prices; returns an async stop."""
+        now = dt_util.utcnow().timestamp()
+        if not self.interval_end:
+            self._start_interval(now)
+        self._accounted = now
+        self._power = self._power_from_state(self.hass.states.get(self.power_entity_id))
+        unsubs = [
+            async_track_state_change_event(
+                self.hass, [self.power_entity_id], self._async_power_changed
+            ),
+            self.coordinator.async_add_listener(self._async_prices_changed, EXP_SECTIONS),
+        ]
+        self._async_arm_rollover()
+
+        async def stop() -> None:
+            for unsub in unsubs:
+                unsub()
+            if self._unsub_rollover is not None:
+                self._unsub_rollover()
+                self._unsub_rollover = None
+            self._advance(dt_util.utcnow().timestamp())
+            # Now, not on SAVE_DELAY: a reload restores straight after this
+            await self._store.async_save(self._data_to_store())
+
+        return stop
+
+    def _start_interval(self, timestamp: float) -> None:
+        """Look up the interval covering timestamp and its prices."""
+        entry = self.coordinator.price_at(dt_util.utc_from_timestamp(timestamp))
+        if entry is not None:
+            start = dt_util.parse_datetime(entry["start_time"]).timestamp()
+            end = dt_util.parse_datetime(entry["end_time"]).timestamp()
+            self._prices = (_price(entry, COSTS_FLEX_UP), _price(entry, EARNINGS_FLEX_UP))
+        else:
+            start = timestamp - timestamp % INTERVAL_SECONDS
+            end = start + INTERVAL_SECONDS
+            self._prices = (math.nan, math.nan)
+        self.interval_start, self.interval_end = start, end
+        day = _local_date(start)
+        if day != self.day:
+            if self.day is not None:
+                for totals in self.totals.values():
+                    totals[PERIOD_TODAY] = 0.0
+            self.day = day
+
+    def _add(self, until: float) -> Optional[str]:
+        """Account for energy up to until. Returns the kind that changed, if any."""
+        since = self._accounted
+        if since is not None and until <= since:
+            return None
+        self._accounted = until
+        if since is None or self._power is None:
+            return None
+        energy = self._power * (until - since) / 3600
+        if energy > 0:
+            kind, price = KIND_COSTS, self._prices[0]
+        elif energy < 0:
+            kind, price = KIND_EARNINGS, self._prices[1]
+        else:
+            return None
+        if math.isnan(price):
+            return None
+        amount = abs(energy) * price
+        totals = self.totals[kind]
+        totals[PERIOD_INTERVAL] += amount
+        totals[PERIOD_TODAY] += amount
+        totals[PERIOD_TOTAL] += amount
+        return kind
+
+    def _advance(self, now: float) -> set:
+        """Account for energy up to now, closing any interval that's ended.
+
+        Returns the kinds whose totals changed.
+        """
+        changed = set()
+        while now >= self.interval_end:
+            changed.add(self._add(self.interval_end))
+            for totals in self.totals.values():
+                totals[PERIOD_INTERVAL] = 0.0
+            changed.update(KINDS)
+            self._start_interval(self.interval_end)
+        changed.add(self._add(now))
+        changed.discard(None)
+        return changed
+
+    def _power_from_state(self, state: Optional[State]) -> Optional[float]:
+        """Return a power sensor state in kW, None if it isn't a usable number."""
+        if state is None:
+            return None
+        try:
+            value = float(state.state)
+        except ValueError:
+            return None
+        if not math.isfinite(value):
+            return None
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT, UnitOfPower.WATT)
+        if unit not in PowerConverter.VALID_UNITS:
+            if unit != self._bad_unit:
+                self._bad_unit = unit
+                _LOGGER.warning(
+                    "Ignoring %s for Localvolts costs: unit %s isn't a power unit",
+                    self.power_entity_id, unit,
+                )
+            return None
+        return PowerConverter.convert(value, unit, UnitOfPower.KILO_WATT)
+
+    @callback
+    def _async_changed(self, kinds: set) -> None:
+        if not kinds:
+            return
+        self._store.async_delay_save(self._data_to_store, SAVE_DELAY)
+        for kind in kinds:
+            for update_callback in self._listeners[kind]:
+                update_callback()
+
+    @callback
+    def _async_power_changed(self, event: Event) -> None:
+        changed = self._advance(dt_util.utcnow().timestamp())
+        self._power = self._power_from_state(event.data.get("new_state"))
+        self._async_changed(changed)
+
+    @callback
+    def _async_prices_changed(self) -> None:
+        """Take up the current interval's 'exp' prices once they're in."""
+        now = dt_util.utcnow().timestamp()
+        changed = self._advance(now)
+        start, end = self.interval_start, self.interval_end
+        self._start_interval(now)
+        if (self.interval_start, self.interval_end) != (start, end):
+            # The API's interval boundaries moved; take them from here on
+            self._async_arm_rollover()
+        self._async_changed(changed)
+
+    @callback
+    def _async_arm_rollover(self) -> None:
+        if self._unsub_rollover is not None:
+            self._unsub_rollover()
+        self._unsub_rollover = async_track_point_in_utc_time(
+            self.hass, self._async_rollover, dt_util.utc_from_timestamp(self.interval_end)
+        )
+
+    @callback
+    def _async_rollover(self, now: datetime.datetime) -> None:
+        self._unsub_rollover = None
+        # The timer can fire a little early; the interval still ends on time
+        changed = self._advance(max(now.timestamp(), self.interval_end))
+        self._async_arm_rollover()
+        self._async_changed(changed)
+        # However often the sensor updates, lose at most an interval
+        self.hass.async_create_task(self._store.async_save(self._data_to_store()))
+
+    @callback
+    def _data_to_store(self) -> Dict[str, Any]:
+        return {
+            "interval_end": self.interval_end,
+            "day": self.day.isoformat() if self.day else None,
+            **{kind: list(self.totals[kind]) for kind in KINDS},
+        }
@@ -0,0 +1,143 @@
+"""Cheapest/best price windows over the Localvolts forecast."""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from .forecast import DEFAULT_INTERVAL_MINUTES, ForecastStore
+
+
+class ForecastAnalytics:
+    """Sliding-window and ranking queries over one ForecastStore.
+
+    A store is never modified once built (a merge that changes anything
+    returns a new one), so everything here is computed lazily and cached
+    for the store's lifetime: one pass per (field, window length) over the
+    prefix sums, however many sensors, service calls or template renders
+    ask for it afterwards.
+    """
+
+    __slots__ = ("store", "_prefix", "_means", "_ranked", "_best")
+
+    def __init__(self, store: ForecastStore) -> None:
+        self.store = store
+        self._prefix: Dict[str, Tuple[List[float], List[int], List[int]]] = {}
+        self._means: Dict[Tuple[str, int], List[float]] = {}
+        self._ranked: Dict[str, List[int]] = {}
+        self._best: Dict[Tuple[str, int, bool], Optional[int]] = {}
+
+    def intervals_for(self, minutes: float) -> int:
+        """Return how many forecast intervals it takes to cover `minutes`."""
+        interval = self.store.duration[0] if self.store else DEFAULT_INTERVAL_MINUTES
+        return max(1, math.ceil(minutes / interval))
+
+    def _prefix_sums(self, field: str) -> Tuple[List[float], List[int], List[int]]:
+        """Return prefix sums of field and prefix counts of missing values/gaps.
+
+        A gap is a row that doesn't start where the previous one ended, so
+        no window is ever stitched together across missing intervals.
+        """
+        prefix = self._prefix.get(field)
+        if prefix is None:
+            store = self.store
+            column = store.columns.get(field, ())
+            prefix = self._prefix[field] = (
+                list(accumulate((0.0 if math.isnan(value) else value for value in column), initial=0.0)),
+                list(accumulate((math.isnan(value) for value in column), initial=0)),
+                list(accumulate(
+                    (index > 0 and store.start[index] != store.end[index - 1] for index in range(len(column))),
+                    initial=0,
+                )),
+            )
+        return prefix
+
+    def window_means(self, field: str, intervals: int) -> List[float]:
+        """Return the mean of field over each run of `intervals` rows.
+
+        Entry i covers rows i to i + intervals - 1; it's NaN where that run
+        has a missing value or a gap.
+        """
+        key = (field, intervals)
+        means = self._means.get(key)
+        if means is None:
+            sums, missing, gaps = self._prefix_sums(field)
+            means = self._means[key] = [
+                (sums[i + intervals] - sums[i]) / intervals
+                # gaps[i + 1]: a gap just before the run's first row is fine
+                if missing[i + intervals] == missing[i] and gaps[i + intervals] == gaps[i + 1]
+                else math.nan
+                for i in range(max(0, len(sums) - intervals))
+            ]
+        return means
+
+    def best_window(
+        self,
+        field: str,
+        intervals: int,
+        lowest: bool = True,
+        start: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Optional[int]:
+        """Return the first row of the best run of `intervals` rows.
+
+        lowest picks the cheapest run (importing), otherwise the highest
+        (exporting). start/deadline (epochs) limit the search to runs of
+        rows that end after start and no later than deadline. Ties go to
+        the earliest run.
+        """
+        if intervals < 1 or field not in self.store.columns:
+            return None
+        if start is None and deadline is None:
+            key = (field, intervals, lowest)
+            if key not in self._best:
+                self._best[key] = self._search(field, intervals, lowest, 0, None)
+            return self._best[key]
+        first = 0 if start is None else bisect_right(self.store.end, start)
+        return self._search(field, intervals, lowest, first, deadline)
+
+    def _search(
+        self, field: str, intervals: int, lowest: bool, first: int, deadline: Optional[float]
+    ) -> Optional[int]:
+        means = self.window_means(field, intervals)
+        last = len(means)
+        if deadline is not None:
+            last = min(last, bisect_right(self.store.end, deadline) - intervals + 1)
+        best: Optional[int] = None
+        best_mean = math.inf
+        sign = 1.0 if lowest else -1.0
+        for index in range(first, last):
+            mean = means[index]
+            if not math.isnan(mean) and sign * mean < best_mean:
+                best, best_mean = index, sign * mean
+        return best
+
+    def ranked(self, field: str, lowest: bool = True) -> List[int]:
+        """Return the indices of rows with a value for field, best first."""
+        key = field if lowest else f"-{field}"
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            column = self.store.columns.get(field, ())
+            ranked = self._ranked[key] = sorted(
+                (index for index, value in enumerate(column) if not math.isnan(value)),
+                key=column.__getitem__,
+                reverse=not lowest,
+            )
+        return ranked
+
+    def top(self, field: str, count: int, lowest: bool = True) -> List[int]:
+        """Return the `count` best rows for field, in time order."""
+        return sorted(self.ranked(field, lowest)[:count])
+
+    def window_entry(self, field: str, index: int, intervals: int) -> Dict[str, Any]:
+        """Return start/end times and the mean of field for one run of rows."""
+        store = self.store
+        last = index + intervals - 1
+        return {
+            "start_time": store.start_iso[index],
+            "end_time": store.end_iso[last],
+            "duration": int((store.end[last] - store.start[index]) // 60),
+            field: self.window_means(field, intervals)[index],
+        }
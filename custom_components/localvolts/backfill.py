@@ -0,0 +1,194 @@
+"""Historical backfill for the Localvolts integration."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN
+from .forecast import parse_utc
+from .statistics import HOUR, IntervalStatistics
+
+if TYPE_CHECKING:
+    from .hub import LocalvoltsPartnerHub
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Each request covers this much history (144 intervals), aligned to whole
+# hours so every chunk but the last completes the hours it covers.
+CHUNK = datetime.timedelta(hours=12)
+# Chunks in flight at once. Results are applied strictly in order, so this
+# is also how many chunks' records are held in memory at most.
+MAX_CONCURRENT_CHUNKS = 2
+# Don't backfill the last few minutes; the live poll covers those.
+LIVE_MARGIN = datetime.timedelta(minutes=10)
+
+
+def _backfill_store(hass: HomeAssistant, nmi_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{nmi_id}.backfill")
+
+
+async def async_remove_backfill_store(hass: HomeAssistant, nmi_id: str) -> None:
+    """Delete an NMI's backfill checkpoint."""
+    await _backfill_store(hass, nmi_id).async_remove()
+
+
+def _floor_hour(value: datetime.datetime) -> datetime.datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+class HistoryBackfill:
+    """Fetches interval history the live poll missed into statistics.
+
+    The live poll only ever asks for the current interval, so anything from
+    before an NMI was added, or from while Home Assistant or the API was
+    down, would otherwise never be recorded. A run covers from where the
+    statistics (or the saved checkpoint) left off up to now, in CHUNK-sized
+    requests fetched a few at a time. Each chunk goes into the statistics
+    and the checkpoint as soon as it and every chunk before it are in, so a
+    restart resumes where it stopped rather than starting over.
+
+    Requests go through the partner hub like the live poll does, but wait
+    for it to be idle first and are spaced out to stay within
+    request_budget per hour, so catching up never delays a live price.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: "LocalvoltsPartnerHub",
+        nmi_id: str,
+        statistics: IntervalStatistics,
+        days: int,
+        request_budget: int,
+    ) -> None:
+        self.hass = hass
+        self.hub = hub
+        self.nmi_id = nmi_id
+        self.statistics = statistics
+        self.days = days
+        self.request_budget = request_budget
+        self._store = _backfill_store(hass, nmi_id)
+        self._next_request = 0.0
+        self._pacing = asyncio.Lock()
+        self.requests = 0
+        self.intervals = 0
+
+    async def _async_start_time(self, now: datetime.datetime) -> Optional[datetime.datetime]:
+        """Return where to resume from, or None if there's nothing to do."""
+        earliest = _floor_hour(now - datetime.timedelta(days=self.days))
+        start = earliest
+        try:
+            stored = await self._store.async_load()
+        except HomeAssistantError as err:
+            _LOGGER.warning("Ignoring unreadable Localvolts backfill checkpoint: %s", err)
+            stored = None
+        if stored and stored.get("until"):
+            start = max(start, parse_utc(stored["until"]))
+        written_until = self.statistics.written_until
+        if written_until is not None:
+            start = max(
+                start, datetime.datetime.fromtimestamp(written_until, datetime.timezone.utc)
+            )
+        if start >= now - LIVE_MARGIN:
+            return None
+        return start
+
+    def _chunks(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        chunks = []
+        while start < end:
+            chunk_end = min(_floor_hour(start + CHUNK), end)
+            if chunk_end <= start:
+                chunk_end = end
+            chunks.append((start, chunk_end))
+            start = chunk_end
+        return chunks
+
+    async def _async_paced(self) -> None:
+        """Wait for this job's next request slot under the hourly budget."""
+        async with self._pacing:
+            loop = asyncio.get_running_loop()
+            delay = self._next_request - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request = loop.time() + HOUR / self.request_budget
+
+    async def _async_fetch(self, start: datetime.datetime, end: datetime.datetime) -> Any:
+        await self._async_paced()
+        self.requests += 1
+        body = await self.hub.async_fetch_intervals(
+            self.nmi_id, start, end, background=True, raw=True
+        )
+        # Half a day of history is a couple of hundred KB of JSON; decode
+        # it in the executor rather than on the event loop.
+        try:
+            return await self.hass.async_add_executor_job(json_loads, body)
+        except ValueError as err:
+            raise UpdateFailed(f"Malformed response from API: {err}") from err
+
+    async def async_run(self) -> int:
+        """Backfill up to now. Returns the number of intervals recorded."""
+        if self.days <= 0 or "recorder" not in self.hass.config.components:
+            return 0
+        # Hold the live poll's writes back from the start: a flush now
+        # could write out a restored hour that's only partly in (once it's
+        # INCOMPLETE_HOUR_GRACE old), moving written_until past the very
+        # gap this run would fill.
+        self.statistics.backfilling = True
+        recorded = 0
+        try:
+            # So written_until is known below - without writing anything
+            await self.statistics.async_load_sums()
+            now = dt_util.utcnow()
+            start = await self._async_start_time(now)
+            if start is None:
+                return 0
+            chunks = self._chunks(start, now - LIVE_MARGIN)
+            _LOGGER.debug(
+                "Backfilling NMI %s from %s in %d request(s)", self.nmi_id, start, len(chunks)
+            )
+
+            for first in range(0, len(chunks), MAX_CONCURRENT_CHUNKS):
+                batch = chunks[first:first + MAX_CONCURRENT_CHUNKS]
+                results = await asyncio.gather(
+                    *(self._async_fetch(chunk_start, chunk_end) for chunk_start, chunk_end in batch),
+                    return_exceptions=True,
+                )
+                for (_chunk_start, chunk_end), result in zip(batch, results):
+                    if isinstance(result, asyncio.CancelledError):
+                        raise result
+                    if isinstance(result, UpdateFailed):
+                        # Stop at the first failure; the next run resumes
+                        # from the last chunk that made it in.
+                        _LOGGER.warning("Localvolts backfill stopped at %s: %s", chunk_end, result)
+                        return recorded
+                    if isinstance(result, BaseException):
+                        raise result
+                    for item in result if isinstance(result, list) else ():
+                        if (
+                            isinstance(item, dict)
+                            and str(item.get("quality", "")).lower() != "fcst"
+                            and self.statistics.add(item)
+                        ):
+                            recorded += 1
+                    await self.statistics.async_flush(backfill=True)
+                    await self._store.async_save({"until": chunk_end.isoformat()})
+        finally:
+            self.statistics.backfilling = False
+            self.intervals += recorded
+
+        _LOGGER.debug("Backfilled %d interval(s) for NMI %s", recorded, self.nmi_id)
+        return recorded
@@ -0,0 +1,226 @@
+"""Price threshold binary sensors for the Localvolts integration."""
+
+from __future__ import annotations
+
+import datetime
+import math
+from abc import abstractmethod
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_EXPORT_THRESHOLD,
+    CONF_IMPORT_THRESHOLD,
+    COSTS_FLEX_UP,
+    DEFAULT_EXPORT_THRESHOLD,
+    DEFAULT_IMPORT_THRESHOLD,
+    DOMAIN,
+    EARNINGS_FLEX_UP,
+    SECTION_EXP,
+    SECTION_FORECAST_PRICES,
+)
+from .coordinator import LocalvoltsDataUpdateCoordinator
+from .forecast import to_float
+
+PRICE_TIMELINE_SECTIONS = frozenset({SECTION_EXP, SECTION_FORECAST_PRICES})
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Localvolts binary sensors from a config entry."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        [
+            LocalvoltsCheapImportSensor(
+                coordinator,
+                config_entry.options.get(CONF_IMPORT_THRESHOLD, DEFAULT_IMPORT_THRESHOLD),
+            ),
+            LocalvoltsHighExportSensor(
+                coordinator,
+                config_entry.options.get(CONF_EXPORT_THRESHOLD, DEFAULT_EXPORT_THRESHOLD),
+            ),
+        ]
+    )
+
+
+def _price_segments(
+    coordinator: LocalvoltsDataUpdateCoordinator, field: str
+) -> Iterator[Tuple[float, float, float]]:
+    """Yield (start, end, price) for the current interval, then the forecast."""
+    covered = -math.inf
+    if coordinator.intervalEnd is not None and coordinator.interval_data:
+        covered = coordinator.intervalEnd.timestamp()
+        try:
+            duration = int(coordinator.interval_data.get("intervalDuration", 5))
+        except (TypeError, ValueError):
+            duration = 5
+        yield covered - duration * 60, covered, to_float(coordinator.interval_data.get(field))
+
+    forecast = coordinator.forecast
+    column = forecast.columns.get(field)
+    # Skip the current interval if it's still in the forecast
+    for index in range(bisect_right(forecast.end, covered), len(forecast)):
+        yield (
+            forecast.start[index],
+            forecast.end[index],
+            column[index] if column is not None else math.nan,
+        )
+
+
+def price_schedule(
+    coordinator: LocalvoltsDataUpdateCoordinator,
+    field: str,
+    predicate: Callable[[float], bool],
+) -> Tuple[array, List[Optional[bool]]]:
+    """Return when predicate(price) changes over the current interval and forecast.
+
+    The result is parallel lists of epoch times and the state from each
+    time on: True/False, or None where there's no price (a gap, a missing
+    value, or past the end of the forecast). Only the times where the
+    state changes are included.
+    """
+    times = array("d")
+    states: List[Optional[bool]] = []
+
+    def change(when: float, state: Optional[bool]) -> None:
+        if not states or states[-1] != state:
+            times.append(when)
+            states.append(state)
+
+    last_end: Optional[float] = None
+    for start, end, price in _price_segments(coordinator, field):
+        if last_end is not None and start > last_end:
+            change(last_end, None)
+        change(start, None if math.isnan(price) else predicate(price))
+        last_end = end
+    if last_end is not None:
+        change(last_end, None)
+    return times, states
+
+
+class LocalvoltsPriceThresholdSensor(CoordinatorEntity, BinarySensorEntity):
+    """Base for sensors that are on while a flex price is past a threshold.
+
+    Rather than re-checking the price on every poll or state change, the
+    sensor works out every upcoming transition once per price change (see
+    price_schedule) and arms a single timer for the next one, so it flips
+    exactly at the interval boundary. next_on/next_off come from the same
+    schedule.
+    """
+
+    def __init__(
+        self,
+        coordinator: LocalvoltsDataUpdateCoordinator,
+        field: str,
+        threshold: float,
+    ) -> None:
+        super().__init__(coordinator, PRICE_TIMELINE_SECTIONS)
+        self._field = field
+        self._threshold = threshold
+        self._attr_should_poll = False
+        self._times = array("d")
+        self._states: List[Optional[bool]] = []
+        self._unsub_transition: Optional[CALLBACK_TYPE] = None
+
+    @abstractmethod
+    def _predicate(self, price: float) -> bool:
+        """Return whether price is past the threshold."""
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_transition)
+        self._async_reschedule()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._async_reschedule()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_cancel_transition(self) -> None:
+        if self._unsub_transition is not None:
+            self._unsub_transition()
+            self._unsub_transition = None
+
+    @callback
+    def _async_reschedule(self) -> None:
+        """Recompute the schedule from the latest prices and re-arm the timer."""
+        self._times, self._states = price_schedule(
+            self.coordinator, self._field, self._predicate
+        )
+        self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        self._async_cancel_transition()
+        index = bisect_right(self._times, dt_util.utcnow().timestamp())
+        if index < len(self._times):
+            self._unsub_transition = async_track_point_in_utc_time(
+                self.hass,
+                self._async_transition,
+                dt_util.utc_from_timestamp(self._times[index]),
+            )
+
+    @callback
+    def _async_transition(self, _now: datetime.datetime) -> None:
+        self._unsub_transition = None
+        self._async_arm()
+        self.async_write_ha_state()
+
+    def _next(self, state: bool) -> Optional[str]:
+        now = dt_util.utcnow().timestamp()
+        for index in range(bisect_right(self._times, now), len(self._times)):
+            if self._states[index] is state:
+                return dt_util.utc_from_timestamp(self._times[index]).isoformat()
+        return None
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Return whether the price in effect now is past the threshold."""
+        index = bisect_right(self._times, dt_util.utcnow().timestamp()) - 1
+        return self._states[index] if index >= 0 else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the threshold and when the sensor next turns on and off."""
+        return {
+            "threshold": self._threshold,
+            "next_on": self._next(True),
+            "next_off": self._next(False),
+        }
+
+
+class LocalvoltsCheapImportSensor(LocalvoltsPriceThresholdSensor):
+    """On while costsFlexUp is at or below the import threshold (c/kWh)."""
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, threshold: float) -> None:
+        super().__init__(coordinator, COSTS_FLEX_UP, threshold)
+        self._attr_name = "Cheap Import"
+        self._attr_unique_id = f"{coordinator.nmi_id}_cheap_import"
+
+    def _predicate(self, price: float) -> bool:
+        return price <= self._threshold
+
+
+class LocalvoltsHighExportSensor(LocalvoltsPriceThresholdSensor):
+    """On while earningsFlexUp is at or above the export threshold (c/kWh)."""
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, threshold: float) -> None:
+        super().__init__(coordinator, EARNINGS_FLEX_UP, threshold)
+        self._attr_name = "High Export"
+        self._attr_unique_id = f"{coordinator.nmi_id}_high_export"
+
+    def _predicate(self, price: float) -> bool:
+        return price >= self._threshold
@@ -3,9 +3,35 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
+from homeassistant.helpers import selector
 
-from .const import DOMAIN
-from . import validate_api_key, validate_partner_id, validate_nmi_id
+from .const import (
+    ATTRIBUTE_PROFILES,
+    CONF_ATTRIBUTE_PROFILE,
+    CONF_BACKFILL_DAYS,
+    CONF_BACKFILL_REQUEST_BUDGET,
+    CONF_EXPORT_THRESHOLD,
+    CONF_FORECAST_HISTORY_DEPTH,
+    CONF_FORECAST_HOURS,
+    CONF_FORECAST_REFRESH_MINUTES,
+    CONF_IMPORT_THRESHOLD,
+    CONF_POWER_ENTITY,
+    CONF_RECORD_RESPONSES,
+    CONF_WINDOW_MINUTES,
+    DEFAULT_ATTRIBUTE_PROFILE,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BACKFILL_REQUEST_BUDGET,
+    DEFAULT_EXPORT_THRESHOLD,
+    DEFAULT_FORECAST_HISTORY_DEPTH,
+    DEFAULT_FORECAST_HOURS,
+    DEFAULT_FORECAST_REFRESH_MINUTES,
+    DEFAULT_IMPORT_THRESHOLD,
+    DEFAULT_RECORD_RESPONSES,
+    DEFAULT_WINDOW_MINUTES,
+    DOMAIN,
+    MAX_FORECAST_HOURS,
+)
+from .validators import validate_api_key, validate_partner_id, validate_nmi_id
 
 _LOGGER = logging.getLogger(__name__)
     
@@ -45,7 +71,54 @@ class LocalvoltsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }),
             errors=errors,
         )
-        
+
+    async def async_step_reauth(self, entry_data):
+        """Ask for new credentials after the API rejected the current ones."""
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input=None):
+        errors = {}
+        entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        if user_input is not None:
+            api_key = user_input.get("api_key")
+            partner_id = user_input.get("partner_id")
+
+            if not api_key:
+                errors["api_key"] = "required"
+            elif not validate_api_key(api_key):
+                errors["api_key"] = "invalid_api_key"
+            if not partner_id:
+                errors["partner_id"] = "required"
+            elif not validate_partner_id(partner_id):
+                errors["partner_id"] = "invalid_partner_id"
+
+            if not errors:
+                # Every NMI under the old credentials shared the hub that
+                # was rejected, and stopped polling with it; move them all
+                # over, not just the entry this flow was started for.
+                old_credentials = (entry.data.get("api_key"), entry.data.get("partner_id"))
+                for other in self._async_current_entries(include_ignore=False):
+                    if other.entry_id == entry.entry_id:
+                        continue
+                    if (other.data.get("api_key"), other.data.get("partner_id")) != old_credentials:
+                        continue
+                    self.hass.config_entries.async_update_entry(
+                        other, data={**other.data, **user_input}
+                    )
+                    self.hass.config_entries.async_schedule_reload(other.entry_id)
+                return self.async_update_reload_and_abort(
+                    entry, data={**entry.data, **user_input}
+                )
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({
+                vol.Required("api_key", default=(user_input or {}).get("api_key", "")): str,
+                vol.Required("partner_id", default=(user_input or {}).get("partner_id", entry.data.get("partner_id", ""))): str,
+            }),
+            errors=errors,
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -78,18 +151,26 @@ class LocalvoltsOptionsFlowHandler(config_entries.OptionsFlow):
 
             if not errors:
                 # Credentials live in config_entry.data (that's what
-                # async_setup_entry reads) - OptionsFlow.async_create_entry
-                # only writes config_entry.options, which is never read, so
-                # update .data directly and reload for the change to
-                # actually take effect.
+                # async_setup_entry reads), tuning settings in .options.
+                # Both are written here, before the reload, so the reloaded
+                # entry actually picks the change up.
+                data = {key: user_input[key] for key in ("api_key", "partner_id", "nmi_id")}
+                options = {
+                    key: value for key, value in user_input.items() if key not in data
+                }
                 self.hass.config_entries.async_update_entry(
-                    self.config_entry, data=user_input
+                    self.config_entry, data=data, options=options
                 )
                 await self.hass.config_entries.async_reload(self.config_entry.entry_id)
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=options)
+
+        # Only the options form needs this; imported at the top, it would
+        # load the whole sensor component along with the config flow
+        from homeassistant.components.sensor import SensorDeviceClass
 
-        # Defaults reflect what's actually in use (config_entry.data)
+        # Defaults reflect what's actually in use (config_entry.data/options)
         cur = self.config_entry.data
+        opts = self.config_entry.options
 
         return self.async_show_form(
             step_id="init",
@@ -97,6 +178,88 @@ class LocalvoltsOptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required("api_key", default=(user_input or {}).get("api_key", cur.get("api_key", ""))): str,
                 vol.Required("partner_id", default=(user_input or {}).get("partner_id", cur.get("partner_id", ""))): str,
                 vol.Required("nmi_id", default=(user_input or {}).get("nmi_id", cur.get("nmi_id", ""))): str,
+                vol.Required(
+                    CONF_FORECAST_REFRESH_MINUTES,
+                    default=(user_input or {}).get(
+                        CONF_FORECAST_REFRESH_MINUTES,
+                        opts.get(CONF_FORECAST_REFRESH_MINUTES, DEFAULT_FORECAST_REFRESH_MINUTES),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=180)),
+                vol.Required(
+                    CONF_FORECAST_HOURS,
+                    default=(user_input or {}).get(
+                        CONF_FORECAST_HOURS,
+                        opts.get(CONF_FORECAST_HOURS, DEFAULT_FORECAST_HOURS),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_FORECAST_HOURS)),
+                vol.Required(
+                    CONF_ATTRIBUTE_PROFILE,
+                    default=(user_input or {}).get(
+                        CONF_ATTRIBUTE_PROFILE,
+                        opts.get(CONF_ATTRIBUTE_PROFILE, DEFAULT_ATTRIBUTE_PROFILE),
+                    ),
+                ): vol.In(ATTRIBUTE_PROFILES),
+                vol.Required(
+                    CONF_WINDOW_MINUTES,
+                    default=(user_input or {}).get(
+                        CONF_WINDOW_MINUTES,
+                        opts.get(CONF_WINDOW_MINUTES, DEFAULT_WINDOW_MINUTES),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=720)),
+                vol.Required(
+                    CONF_BACKFILL_DAYS,
+                    default=(user_input or {}).get(
+                        CONF_BACKFILL_DAYS,
+                        opts.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=90)),
+                vol.Required(
+                    CONF_BACKFILL_REQUEST_BUDGET,
+                    default=(user_input or {}).get(
+                        CONF_BACKFILL_REQUEST_BUDGET,
+                        opts.get(CONF_BACKFILL_REQUEST_BUDGET, DEFAULT_BACKFILL_REQUEST_BUDGET),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=720)),
+                vol.Required(
+                    CONF_FORECAST_HISTORY_DEPTH,
+                    default=(user_input or {}).get(
+                        CONF_FORECAST_HISTORY_DEPTH,
+                        opts.get(CONF_FORECAST_HISTORY_DEPTH, DEFAULT_FORECAST_HISTORY_DEPTH),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=96)),
+                vol.Required(
+                    CONF_IMPORT_THRESHOLD,
+                    default=(user_input or {}).get(
+                        CONF_IMPORT_THRESHOLD,
+                        opts.get(CONF_IMPORT_THRESHOLD, DEFAULT_IMPORT_THRESHOLD),
+                    ),
+                ): vol.Coerce(float),
+                vol.Required(
+                    CONF_EXPORT_THRESHOLD,
+                    default=(user_input or {}).get(
+                        CONF_EXPORT_THRESHOLD,
+                        opts.get(CONF_EXPORT_THRESHOLD, DEFAULT_EXPORT_THRESHOLD),
+                    ),
+                ): vol.Coerce(float),
+                vol.Required(
+                    CONF_RECORD_RESPONSES,
+                    default=(user_input or {}).get(
+                        CONF_RECORD_RESPONSES,
+                        opts.get(CONF_RECORD_RESPONSES, DEFAULT_RECORD_RESPONSES),
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_POWER_ENTITY,
+                    description={
+                        "suggested_value": (user_input or {}).get(
+                            CONF_POWER_ENTITY, opts.get(CONF_POWER_ENTITY)
+                        )
+                    },
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor", device_class=SensorDeviceClass.POWER
+                    )
+                ),
             }),
             errors=errors,
         )
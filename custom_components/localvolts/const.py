@@ -2,6 +2,71 @@
 
 DOMAIN = "localvolts"
 
+# hass.data key for the partner hubs, kept apart from hass.data[DOMAIN]
+# (which maps config entry ids to coordinators).
+DATA_HUBS = f"{DOMAIN}_hubs"
+
 CONF_API_KEY = "api_key"
 CONF_PARTNER_ID = "partner_id"
 CONF_NMI_ID = "nmi_id"
+CONF_FORECAST_REFRESH_MINUTES = "forecast_refresh_minutes"
+CONF_ATTRIBUTE_PROFILE = "attribute_profile"
+CONF_WINDOW_MINUTES = "window_minutes"
+CONF_BACKFILL_DAYS = "backfill_days"
+CONF_BACKFILL_REQUEST_BUDGET = "backfill_request_budget"
+CONF_FORECAST_HISTORY_DEPTH = "forecast_history_depth"
+CONF_IMPORT_THRESHOLD = "import_threshold"
+CONF_EXPORT_THRESHOLD = "export_threshold"
+CONF_RECORD_RESPONSES = "record_responses"
+CONF_FORECAST_HOURS = "forecast_hours"
+# Optional: a grid power sensor to accumulate costs and earnings from
+CONF_POWER_ENTITY = "power_entity"
+
+DEFAULT_FORECAST_REFRESH_MINUTES = 15
+# How far ahead to fetch the forecast, and the most it can be set to
+DEFAULT_FORECAST_HOURS = 24
+MAX_FORECAST_HOURS = 168
+# Length of the cheapest import / best export windows the window sensors
+# look for, e.g. how long a battery or EV takes to charge.
+DEFAULT_WINDOW_MINUTES = 60
+# How far back to fetch history into the long-term statistics for a new
+# NMI, and the most backfill requests to make per hour (per NMI).
+DEFAULT_BACKFILL_DAYS = 7
+DEFAULT_BACKFILL_REQUEST_BUDGET = 60
+# Distinct forecasts kept per upcoming interval for forecast error (see
+# vintages.py) - six hours' worth at the default 15 minute refresh.
+DEFAULT_FORECAST_HISTORY_DEPTH = 24
+# Flex prices (c/kWh) the Cheap Import and High Export binary sensors
+# switch at.
+DEFAULT_IMPORT_THRESHOLD = 10.0
+DEFAULT_EXPORT_THRESHOLD = 15.0
+# Write every API response to disk, for replaying offline (transport.py)
+DEFAULT_RECORD_RESPONSES = False
+
+# How much of the forecast the forecast sensor carries as attributes.
+# "full" is every field of every interval (~400KB, far over the recorder's
+# 16KB attribute limit); the others keep state writes small, with the full
+# detail available from the localvolts.get_forecast action instead.
+ATTRIBUTE_PROFILE_COMPACT = "compact"
+ATTRIBUTE_PROFILE_SUMMARY = "summary"
+ATTRIBUTE_PROFILE_FULL = "full"
+ATTRIBUTE_PROFILES = [
+    ATTRIBUTE_PROFILE_COMPACT,
+    ATTRIBUTE_PROFILE_SUMMARY,
+    ATTRIBUTE_PROFILE_FULL,
+]
+DEFAULT_ATTRIBUTE_PROFILE = ATTRIBUTE_PROFILE_COMPACT
+
+COSTS_FLEX_UP = "costsFlexUp"
+EARNINGS_FLEX_UP = "earningsFlexUp"
+
+# Parts of the coordinator's data an entity can depend on, passed as its
+# coordinator context. The coordinator fingerprints each one and only
+# notifies the entities whose sections changed; an entity with no context
+# is notified whenever anything does.
+SECTION_EXP = "exp"
+# Interval times and flex prices of the forecast (plus its stale flag)
+SECTION_FORECAST_PRICES = "forecast_prices"
+# Everything else in the forecast records: lastUpdate and the other fields
+SECTION_FORECAST_META = "forecast_meta"
+SECTIONS = (SECTION_EXP, SECTION_FORECAST_PRICES, SECTION_FORECAST_META)
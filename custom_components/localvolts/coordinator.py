@@ -1,22 +1,113 @@
 """Coordinator for Localvolts integration."""
 
+import asyncio
 import datetime
+from functools import partial
 import logging
-from dateutil import parser, tz
-from typing import Any, Dict
+import math
+import pathlib
+import time
+from typing import TYPE_CHECKING, Any, Collection, Dict, List, Mapping, Optional, Sequence, Tuple
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+from homeassistant.util.read_only_dict import ReadOnlyDict
 
-import aiohttp
+from .analytics import ForecastAnalytics
+from .backfill import HistoryBackfill
+from .const import (
+    COSTS_FLEX_UP,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BACKFILL_REQUEST_BUDGET,
+    DEFAULT_FORECAST_HISTORY_DEPTH,
+    DEFAULT_FORECAST_HOURS,
+    DEFAULT_FORECAST_REFRESH_MINUTES,
+    DOMAIN,
+    EARNINGS_FLEX_UP,
+    MAX_FORECAST_HOURS,
+    SECTION_EXP,
+    SECTION_FORECAST_META,
+    SECTION_FORECAST_PRICES,
+    SECTIONS,
+)
+from .forecast import (
+    DEFAULT_INTERVAL_MINUTES,
+    ForecastStore,
+    parse_utc,
+    records_from_compact,
+    to_float,
+)
+from .metrics import (
+    COUNTER_MALFORMED_RECORDS,
+    COUNTER_NOOP_POLLS,
+    COUNTER_SKIPPED_ENTITY_UPDATES,
+    COUNTER_SUPPRESSED_NOTIFICATIONS,
+    SPAN_DECODE,
+    SPAN_FORECAST,
+    SPAN_LOOP_BLOCK,
+    SPAN_NOTIFY,
+    SPAN_POLL,
+    SPAN_PROCESS,
+    PollMetrics,
+)
+from .processing import EXECUTOR_THRESHOLD_BYTES, ProcessedResponse, process_response
+from .records import IntervalRecord, RecordDecoder
+from .resilience import LIVE_TIMEOUT, LocalvoltsAuthError, backoff_delay
+from .scheduler import PublishLagTracker, is_late, next_poll_time
+from .statistics import IntervalStatistics
+from .transport import RECORDINGS_DIR, ResponseRecorder
+from .vintages import ForecastVintages
+
+if TYPE_CHECKING:
+    from .hub import LocalvoltsPartnerHub
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = datetime.timedelta(seconds=10)  # Update every 10 seconds
+# The API returns the intervals ending within (from, to], so a 5 minute
+# window from now is just the current interval.
+CURRENT_INTERVAL_WINDOW = datetime.timedelta(minutes=5)
+# The forecast window is fetched in shards of at most this long (144
+# intervals, ~145KB), a couple at a time (see MAX_CONCURRENT_BULK_REQUESTS),
+# so a longer horizon costs more requests rather than one giant one.
+FORECAST_SHARD = datetime.timedelta(hours=12)
+# However long the horizon, and whatever the API sends back, the forecast
+# store never holds more than this many intervals.
+MAX_FORECAST_INTERVALS = MAX_FORECAST_HOURS * 60 // DEFAULT_INTERVAL_MINUTES
+
+# First wait before retrying a failed background forecast refresh; it
+# doubles with each failure, up to the refresh interval.
+FORECAST_RETRY_BASE = 60.0
+
+STORAGE_VERSION = 1
+# Seconds to batch up changes before writing the warm-start cache
+SAVE_DELAY = 30
+
+
+def forecast_shards(
+    start: datetime.datetime, end: datetime.datetime
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """Split the window (start, end] into FORECAST_SHARD-sized requests."""
+    shards = []
+    while start < end:
+        shard_end = min(start + FORECAST_SHARD, end)
+        shards.append((start, shard_end))
+        start = shard_end
+    return shards
+
+
+def _store(hass: HomeAssistant, nmi_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{nmi_id}")
+
+
+async def async_remove_store(hass: HomeAssistant, nmi_id: str) -> None:
+    """Delete an NMI's warm-start cache."""
+    await _store(hass, nmi_id).async_remove()
 
 
 class LocalvoltsDataUpdateCoordinator(DataUpdateCoordinator):
@@ -25,14 +116,22 @@ class LocalvoltsDataUpdateCoordinator(DataUpdateCoordinator):
     def __init__(
         self,
         hass,
-        api_key: str,
-        partner_id: str,
+        hub: "LocalvoltsPartnerHub",
         nmi_id: str,
+        forecast_refresh: datetime.timedelta = datetime.timedelta(
+            minutes=DEFAULT_FORECAST_REFRESH_MINUTES
+        ),
+        backfill_days: int = DEFAULT_BACKFILL_DAYS,
+        backfill_request_budget: int = DEFAULT_BACKFILL_REQUEST_BUDGET,
+        forecast_history_depth: int = DEFAULT_FORECAST_HISTORY_DEPTH,
+        record_responses: bool = False,
+        forecast_hours: int = DEFAULT_FORECAST_HOURS,
     ) -> None:
         """Initialize the coordinator."""
         self.hass = hass
-        self.api_key: str = api_key
-        self.partner_id: str = partner_id
+        # Scheduling and HTTP are shared with every other NMI under the same
+        # API key/partner ID; see LocalvoltsPartnerHub.
+        self.hub = hub
         self.nmi_id: str = nmi_id
         self.intervalEnd: Any = None
         self.lastUpdate: Any = None
@@ -44,40 +143,338 @@ class LocalvoltsDataUpdateCoordinator(DataUpdateCoordinator):
         # self-collide: the wrapped dict from the last poll would get wrapped
         # again on the next one, nesting deeper every poll where no fresh
         # interval data arrives.
-        self.interval_data: Dict[str, Any] = {}
-        self.forecast_data: List[Dict[str, Any]] = []
+        self.interval_data: Mapping[str, Any] = {}
+        # Turns each response's dicts into compact IntervalRecords; see
+        # records.py.
+        self._decoder = RecordDecoder()
+        # Parsed once per fetch; sensors read typed columns from this rather
+        # than re-parsing the raw API dicts on every state write.
+        self.forecast: ForecastStore = ForecastStore()
+        self._analytics: Optional[ForecastAnalytics] = None
         self._last_notified_key: Any = None
+        # Bumped every time an API response changes the data (not on the
+        # polls in between that find nothing new), so entities can cache
+        # anything derived from the data until it next changes.
+        self.generation: int = 0
+        # The same per section (see SECTIONS), bumped only when that
+        # section's fingerprint changes; see async_update_listeners.
+        self._section_generations: Dict[str, int] = dict.fromkeys(SECTIONS, 0)
+        self._fingerprints: Dict[str, int] = {}
+        # When each interval's data has shown up so far, and how many polls
+        # have been made since the current one became overdue - together
+        # these drive the hub's adaptive schedule (see scheduler.py).
+        self.publish_lag = PublishLagTracker()
+        self._late_polls: int = 0
+        # Worked out once after each refresh, not on every check: the
+        # schedule is relative to when it's computed, so recomputing it at
+        # the moment it comes due would just push it back again.
+        self._next_poll: Optional[datetime.datetime] = None
+        # The forecast is refreshed on its own, slower cadence than the
+        # current interval (see _async_update_data).
+        self.forecast_refresh = forecast_refresh
+        # How far ahead the forecast reaches, and the most intervals kept
+        self.forecast_window = (
+            datetime.timedelta(hours=forecast_hours) - CURRENT_INTERVAL_WINDOW
+        )
+        self.forecast_limit = min(
+            MAX_FORECAST_INTERVALS, forecast_hours * 60 // DEFAULT_INTERVAL_MINUTES
+        )
+        self._forecast_fetched: Optional[datetime.datetime] = None
+        self._forecast_task: Optional[asyncio.Task] = None
+        self._forecast_failures = 0
+        self._forecast_retry_at: Optional[datetime.datetime] = None
+        # Last processed data, saved so a restart can show it immediately
+        # (marked stale) instead of waiting on the API; see async_restore.
+        self._store = _store(hass, nmi_id)
+        self.stale: bool = False
+        # Each 'exp' interval also goes into hourly long-term statistics
+        self.statistics = IntervalStatistics(hass, nmi_id)
+        self._statistics_task: Optional[asyncio.Task] = None
+        # ...and anything the live poll missed is fetched into them later
+        self.backfill = HistoryBackfill(
+            hass, hub, nmi_id, self.statistics, backfill_days, backfill_request_budget
+        )
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._history_gap = False
+        # Timing spans and counters, for diagnostics (see metrics.py)
+        self.metrics = PollMetrics()
+        # How each interval's forecast changed before it arrived, and how
+        # far off it was
+        self.vintages = ForecastVintages(forecast_history_depth)
+        # Every API response, written to disk for replay (see transport.py)
+        self.recorder: Optional[ResponseRecorder] = (
+            ResponseRecorder(hass, pathlib.Path(hass.config.path(RECORDINGS_DIR, nmi_id)))
+            if record_responses else None
+        )
 
         super().__init__(
             hass,
             _LOGGER,
             name="Localvolts Data",
-            update_interval=SCAN_INTERVAL,
+            # No timer of our own - the partner hub decides when to refresh.
+            update_interval=None,
         )
 
+    def needs_refresh(self, now: datetime.datetime) -> bool:
+        """Return True once the current interval has ended (or none is known)."""
+        return self.intervalEnd is None or now > self.intervalEnd
+
+    def next_poll_time(self, now: datetime.datetime) -> datetime.datetime:
+        """Return when the hub should next refresh this coordinator."""
+        if self._next_poll is None:
+            self._next_poll = next_poll_time(
+                self.intervalEnd, now, self.publish_lag, self._late_polls
+            )
+        return self._next_poll
+
     def async_update_listeners(self) -> None:
-        """Notify entities only when something actually changed.
-
-        Polling runs every 10s so a new interval's price data is picked up
-        with minimal delay, but the API is only actually queried once per
-        5-minute interval - the other ~29 polls out of 30 return unchanged
-        data. Without this, every entity re-writes state and pushes its
-        (now large, for the forecast sensor) attributes on every single
-        poll. Key includes last_update_success so failures/recoveries are
-        still always reported immediately.
+        """Notify entities only when something they show actually changed.
+
+        The hub polls densely around each interval boundary so a new
+        interval's price data is picked up with minimal delay, but most of
+        those polls find the interval unchanged and return the same data.
+        Without this, every entity re-writes state and pushes its (now
+        large, for the forecast sensor) attributes on every such refresh.
+        Key includes last_update_success so failures/recoveries are still
+        always reported immediately, to every entity.
+
+        When the data did change, only entities whose sections (their
+        coordinator context) have a new fingerprint are notified - a new
+        interval leaves the forecast-based sensors alone, and a forecast
+        revision reaches them whether or not its length changed.
         """
-        key = (self.intervalEnd, len(self.forecast_data), self.last_update_success)
+        key = (self.generation, self.last_update_success)
         if key == self._last_notified_key:
+            self.metrics.count(COUNTER_SUPPRESSED_NOTIFICATIONS)
             return
+        notify_all = (
+            self._last_notified_key is None
+            or key[1] != self._last_notified_key[1]
+        )
         self._last_notified_key = key
-        super().async_update_listeners()
+        dirty = self._dirty_sections()
+        with self.metrics.span(SPAN_NOTIFY):
+            for update_callback, context in list(self._listeners.values()):
+                if notify_all or context is None or not dirty.isdisjoint(context):
+                    update_callback()
+                else:
+                    self.metrics.count(COUNTER_SKIPPED_ENTITY_UPDATES)
+
+    def _dirty_sections(self) -> set:
+        """Fingerprint each section, returning those changed since last time."""
+        forecast = self.forecast
+        fingerprints = {
+            SECTION_EXP: hash(
+                (self.intervalEnd, self.lastUpdate, tuple(self.interval_data.items()))
+            ),
+            SECTION_FORECAST_PRICES: hash((
+                self.stale,
+                forecast.start.tobytes(),
+                forecast.end.tobytes(),
+                *(
+                    column.tobytes() if column is not None else None
+                    for column in map(forecast.columns.get, (COSTS_FLEX_UP, EARNINGS_FLEX_UP))
+                ),
+            )),
+            # Forecast records are only ever replaced when their lastUpdate
+            # changes, so that stands in for every other field.
+            SECTION_FORECAST_META: hash(
+                tuple(record.get("lastUpdate") for record in forecast.records)
+            ),
+        }
+        dirty = set()
+        for section, fingerprint in fingerprints.items():
+            if self._fingerprints.get(section) != fingerprint:
+                self._section_generations[section] += 1
+                dirty.add(section)
+        self._fingerprints = fingerprints
+        return dirty
+
+    def section_generation(self, sections: Optional[Collection[str]]) -> int:
+        """Return a number that changes whenever any of sections does.
+
+        With no sections, that's whenever anything does (self.generation).
+        """
+        if sections is None:
+            return self.generation
+        return sum(self._section_generations[section] for section in sections)
+
+    async def async_refresh(self) -> None:
+        """Refresh data, timing the whole poll including listener fan-out."""
+        with self.metrics.span(SPAN_POLL):
+            await super().async_refresh()
+        self._next_poll = None
+
+    @property
+    def analytics(self) -> ForecastAnalytics:
+        """Window/ranking queries over the forecast, cached until it changes."""
+        if self._analytics is None or self._analytics.store is not self.forecast:
+            self._analytics = ForecastAnalytics(self.forecast)
+        return self._analytics
+
+    def _current_interval_entry(self, timestamp: float) -> Optional[Dict[str, Any]]:
+        """Return the 'exp' interval as a price entry if it covers timestamp."""
+        if self.intervalEnd is None or not self.interval_data:
+            return None
+        try:
+            duration = int(self.interval_data.get("intervalDuration", 5))
+        except (TypeError, ValueError):
+            return None
+        interval_start = self.intervalEnd - datetime.timedelta(minutes=duration)
+        if not interval_start.timestamp() <= timestamp < self.intervalEnd.timestamp():
+            return None
+        entry: Dict[str, Any] = {
+            "start_time": interval_start.isoformat(),
+            "end_time": self.intervalEnd.isoformat(),
+        }
+        for field in (COSTS_FLEX_UP, EARNINGS_FLEX_UP):
+            value = to_float(self.interval_data.get(field))
+            entry[field] = None if math.isnan(value) else value
+        entry["quality"] = self.interval_data.get("quality")
+        return entry
+
+    def price_at(self, when: datetime.datetime) -> Optional[Dict[str, Any]]:
+        """Return the prices in effect at `when`, or None if not covered.
+
+        Checks the current 'exp' interval first, then bisects the forecast
+        store, so this is O(log n) rather than a scan of every interval.
+        """
+        timestamp = when.timestamp()
+        entry = self._current_interval_entry(timestamp)
+        if entry is not None:
+            return entry
+        index = self.forecast.index_at(timestamp)
+        if index is None:
+            return None
+        return self.forecast.price_entry(index)
+
+    def price_range(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> List[Dict[str, Any]]:
+        """Return the prices of every interval overlapping [start, end)."""
+        start_ts = start.timestamp()
+        end_ts = end.timestamp()
+        entries: List[Dict[str, Any]] = []
+        current = self._current_interval_entry(start_ts)
+        if current is not None:
+            entries.append(current)
+        for index in self.forecast.indices_between(start_ts, end_ts):
+            # The current interval can briefly still be in the forecast if
+            # it hasn't rolled over to 'exp' yet; don't report it twice.
+            if current is not None and self.forecast.end_iso[index] == current["end_time"]:
+                continue
+            entries.append(self.forecast.price_entry(index))
+        return entries
+
+    def _build_data(self) -> Mapping[str, Any]:
+        # Return both exp data and forecast data. This becomes `self.data`
+        # (the base class assigns it), so it must never read `self.data`
+        # itself - see the note on self.interval_data in __init__.
+        # Both values are immutable and replaced wholesale when new data
+        # is processed, so this is a consistent snapshot for readers.
+        return ReadOnlyDict({
+            "exp": self.interval_data,
+            "fcst": self.forecast
+        })
+
+    @callback
+    def _async_data_changed(self) -> None:
+        """Record that the data changed: new generation, cache save queued."""
+        self.generation += 1
+        self._store.async_delay_save(self._data_to_store, SAVE_DELAY)
+
+    @callback
+    def _data_to_store(self) -> Dict[str, Any]:
+        return {
+            "exp": dict(self.interval_data),
+            "forecast": self.forecast.to_compact(),
+            "forecast_fetched": (
+                self._forecast_fetched.isoformat() if self._forecast_fetched else None
+            ),
+            "publish_lag": self.publish_lag.samples(),
+            "statistics": self.statistics.to_store(),
+        }
+
+    async def async_restore(self) -> bool:
+        """Load the last saved data so entities have something right away.
+
+        The restored data is marked stale until the first live refresh
+        succeeds. The 'exp' record is only used if its interval hasn't
+        ended yet, and forecast intervals that have ended are dropped, so
+        nothing out of date is presented as current. Returns True if
+        anything was restored.
+        """
+        try:
+            stored = await self._store.async_load()
+        except HomeAssistantError as err:
+            _LOGGER.warning("Ignoring unreadable Localvolts cache: %s", err)
+            return False
+        if not stored:
+            return False
+
+        current_utc_time = dt_util.utcnow()
+        try:
+            for seconds in stored.get("publish_lag") or ():
+                self.publish_lag.add(float(seconds))
+            self.forecast = ForecastStore.from_records(
+                self._decoder.decode_all(records_from_compact(stored.get("forecast")))
+            ).merge(now=current_utc_time.timestamp(), limit=self.forecast_limit)
+            exp = self._decoder.decode(stored.get("exp"))
+            if exp and parse_utc(exp["intervalEnd"]) > current_utc_time:
+                self._apply_exp(exp, record_lag=False)
+            self.statistics.restore(stored.get("statistics"))
+            if stored.get("forecast_fetched"):
+                self._forecast_fetched = parse_utc(stored["forecast_fetched"])
+        except (KeyError, ValueError, TypeError, AttributeError) as err:
+            _LOGGER.warning("Ignoring malformed Localvolts cache: %s", err)
+            return False
+
+        if not self.forecast and not self.interval_data:
+            return False
+        _LOGGER.debug(
+            "Restored cached data: intervalEnd=%s, %d forecast intervals",
+            self.intervalEnd, len(self.forecast),
+        )
+        self.stale = True
+        self.generation += 1
+        self.data = self._build_data()
+        return True
+
+    @property
+    def forecast_fetched(self) -> Optional[datetime.datetime]:
+        """When the forecast was last fetched, if it has been."""
+        return self._forecast_fetched
+
+    def _forecast_due(self, now: datetime.datetime) -> bool:
+        if not self.forecast:
+            return True
+        if self._forecast_retry_at is not None and now < self._forecast_retry_at:
+            return False
+        return (
+            self._forecast_fetched is None
+            or now - self._forecast_fetched >= self.forecast_refresh
+        )
 
-    async def _async_update_data(self) -> Dict[str, Any]:
-        """Fetch data from the API endpoint."""
-        current_utc_time: datetime.datetime = datetime.datetime.now(
-            datetime.timezone.utc)
+    async def _async_update_data(self) -> Mapping[str, Any]:
+        """Fetch the current interval, and the forecast when it's due.
+
+        The current interval is the latency-critical part, so it's fetched
+        on its own with a narrow window. The forecast is refreshed on its
+        own cadence after that - inline on the very first refresh, in
+        the background afterwards so it never holds up costsFlexUp.
+
+        Rejected credentials raise ConfigEntryAuthFailed, which has the
+        base class start a reauth flow for the entry.
+        """
+        try:
+            return await self._async_update()
+        except LocalvoltsAuthError as err:
+            raise ConfigEntryAuthFailed(str(err)) from err
+
+    async def _async_update(self) -> Mapping[str, Any]:
+        current_utc_time: datetime.datetime = dt_util.utcnow()
         from_time: datetime.datetime = current_utc_time
-        to_time: datetime.datetime = current_utc_time + datetime.timedelta(hours=24) - datetime.timedelta(minutes=5)
+        to_time: datetime.datetime = current_utc_time + CURRENT_INTERVAL_WINDOW
 
         _LOGGER.debug("intervalEnd = %s", self.intervalEnd)
         _LOGGER.debug("lastUpdate = %s", self.lastUpdate)
@@ -85,106 +482,283 @@ class LocalvoltsDataUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.debug("to_time = %s", to_time)
 
         # Determine if we need to fetch new data
-        if (self.intervalEnd is None) or (current_utc_time > self.intervalEnd):
+        if self.needs_refresh(current_utc_time):
             _LOGGER.debug("New interval detected. Retrieving the latest data.")
-            from_time_str: str = from_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-            to_time_str: str = to_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-            url: str = (
-                f"https://api.localvolts.com/v1/customer/interval?"
-                f"NMI={self.nmi_id}&from={from_time_str}&to={to_time_str}"
+            # Drop forecast intervals that have ended even if the fetch below
+            # fails, so an outage never leaves past prices on show.
+            forecast = self.forecast.merge(now=current_utc_time.timestamp())
+            if forecast is not self.forecast:
+                self.forecast = forecast
+                self._async_data_changed()
+            if is_late(self.intervalEnd, current_utc_time, self.publish_lag):
+                # Counted before the request so failures back off too
+                self._late_polls += 1
+            body: bytes = await self.hub.async_fetch_intervals(
+                self.nmi_id, from_time, to_time, metrics=self.metrics, raw=True,
+                timeout=LIVE_TIMEOUT, recorder=self.recorder,
             )
+            changed = await self._async_process([body], current_utc_time)
+            if self.stale:
+                self.stale = False
+                changed = True
 
-            headers: Dict[str, str] = {
-                "Authorization": f"apikey {self.api_key}",
-                "partner": self.partner_id,
-            }
+            if self._forecast_due(current_utc_time):
+                if not self.forecast:
+                    changed = await self._async_refresh_forecast() or changed
+                elif self._forecast_task is None:
+                    self._forecast_task = self.hass.async_create_background_task(
+                        self._async_refresh_forecast(notify=True),
+                        f"Localvolts forecast refresh {self.nmi_id}",
+                    )
 
-            try:
-                session = async_get_clientsession(self.hass)
-                async with session.get(url, headers=headers) as response:
-                    # The Localvolts API returns auth failures (missing/invalid
-                    # API key or partner id) as HTTP 500 with the specific
-                    # reason as plain text in the body, e.g. "Invalid API Key
-                    # (partner: 1234)" or "Unregistered partner: 1234". 401/403
-                    # are kept as a defensive fallback in case that ever
-                    # changes, but per the API docs 500 is what's actually
-                    # sent.
-                    if response.status in (401, 403, 500):
-                        error_text = (await response.text()).strip()
-                        _LOGGER.critical(
-                            "Localvolts API authentication error (HTTP %s): %s",
-                            response.status, error_text,
-                        )
-                        raise UpdateFailed(
-                            f"Localvolts API authentication error: {error_text or response.status}"
-                        )
-
-                    response.raise_for_status()
-                    data: Any = await response.json()
-
-                # If the API returns an empty list, log a warning
-                if isinstance(data, list) and not data:
-                    _LOGGER.warning(
-                        "No data received, check that your NMI, PartnerID and API Key are correct.")
-                    raise UpdateFailed("No data received: Invalid NMI?")
-
-            except aiohttp.ClientError as e:
-                _LOGGER.error(
-                    "Failed to fetch data from Localvolts API: %s", str(e))
-                raise UpdateFailed(f"Error communicating with API: {e}") from e
-
-            # Process data
-            # Clear existing forecast data to prevent duplicates
-            self.forecast_data.clear()
-            for item in data:
-                quality = item.get("quality", "").lower()
-                try:
-                    if quality == "exp":
-                        interval_end = parser.isoparse(item["intervalEnd"])
-                        last_update_time = parser.isoparse(item["lastUpdate"])
-
-                        # Ensure timezone awareness
-                        if interval_end.tzinfo is None:
-                            interval_end = interval_end.replace(tzinfo=tz.UTC)
-                        if last_update_time.tzinfo is None:
-                            last_update_time = last_update_time.replace(
-                                tzinfo=tz.UTC)
-
-                        # Update variables
-                        self.intervalEnd = interval_end
-                        self.lastUpdate = last_update_time
-                        self.interval_data = item
-
-                        duration = int(item.get("intervalDuration", 5))
-                        interval_start: datetime.datetime = interval_end - \
-                            datetime.timedelta(minutes=duration)
-                        self.time_past_start = last_update_time - interval_start
-                        _LOGGER.debug(
-                            "Data updated: intervalEnd=%s, lastUpdate=%s",
-                            self.intervalEnd,
-                            self.lastUpdate,
-                        )
-                    elif quality == "fcst":
-                        # Store forecast data
-                        self.forecast_data.append(item)
-                        _LOGGER.debug(
-                            "Stored forecast data: intervalEnd=%s", item["intervalEnd"])
-                    else:
-                        _LOGGER.debug(
-                            "Skipping non-'exp' and non-'fcst' quality data. Only 'exp' and 'fcst' are processed."
-                        )
-                except (KeyError, ValueError, TypeError) as err:
-                    _LOGGER.warning(
-                        "Skipping malformed interval record %s: %s", item, err)
-                    continue
+            if changed:
+                self._async_data_changed()
+                if self._history_gap:
+                    self._history_gap = False
+                    self.async_start_backfill()
+                else:
+                    self._async_write_statistics()
+            else:
+                self.metrics.count(COUNTER_NOOP_POLLS)
         else:
             _LOGGER.debug("Data did not change. Still in the same interval.")
+            self.metrics.count(COUNTER_NOOP_POLLS)
 
-        # Return both exp data and forecast data. This becomes `self.data`
-        # (the base class assigns it), so it must never read `self.data`
-        # itself - see the note on self.interval_data in __init__.
-        return {
-            "exp": self.interval_data,
-            "fcst": self.forecast_data
-        }
+        return self._build_data()
+
+    @callback
+    def _async_write_statistics(self) -> None:
+        """Write any completed hours to long-term statistics, off the poll path."""
+        if self._statistics_task is not None:
+            return
+
+        async def _async_flush() -> None:
+            try:
+                await self.statistics.async_flush()
+            finally:
+                self._statistics_task = None
+
+        self._statistics_task = self.hass.async_create_background_task(
+            _async_flush(), f"Localvolts statistics {self.nmi_id}"
+        )
+
+    @callback
+    def async_start_backfill(self) -> None:
+        """Fetch any missing history into the statistics, in the background."""
+        if self._backfill_task is not None:
+            return
+
+        async def _async_backfill() -> None:
+            try:
+                await self.backfill.async_run()
+            finally:
+                self._backfill_task = None
+            # Write whatever the live poll held back while it ran
+            self._async_write_statistics()
+
+        self._backfill_task = self.hass.async_create_background_task(
+            _async_backfill(), f"Localvolts backfill {self.nmi_id}"
+        )
+
+    async def async_shutdown(self) -> None:
+        """Stop all background work and write out the cache, e.g. on unload.
+
+        The forecast refresh, statistics write and backfill run as their own
+        tasks, and the cache is saved on a delay; left alone, any of them
+        could still be writing for an entry that has been unloaded (or
+        removed, which deletes the cache right after). So the tasks are
+        cancelled and waited for, and the cache saved now instead.
+        """
+        await super().async_shutdown()
+        tasks = [
+            task for task in (self._forecast_task, self._statistics_task, self._backfill_task)
+            if task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        self._forecast_task = self._statistics_task = self._backfill_task = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.forecast or self.interval_data:
+            # Replaces any save still waiting on SAVE_DELAY
+            await self._store.async_save(self._data_to_store())
+
+    def _apply_exp(self, item: IntervalRecord, record_lag: bool = True) -> bool:
+        """Make item the current interval. Returns True if anything changed."""
+        interval_end = parse_utc(item["intervalEnd"])
+        last_update_time = parse_utc(item["lastUpdate"])
+
+        # Update variables
+        new_interval = interval_end != self.intervalEnd
+        if new_interval:
+            self._late_polls = 0
+        duration = int(item.get("intervalDuration", 5))
+        if (
+            new_interval and record_lag and self.intervalEnd is not None
+            and interval_end - self.intervalEnd > datetime.timedelta(minutes=duration)
+        ):
+            # Intervals were skipped (e.g. the API was down); backfill them
+            self._history_gap = True
+        if new_interval and record_lag and self.interval_data:
+            # The interval that just ended is final; score its forecasts
+            self.vintages.resolve(self.interval_data)
+        changed = new_interval or item != self.interval_data
+        self.intervalEnd = interval_end
+        self.lastUpdate = last_update_time
+        self.interval_data = item
+        self.statistics.add(item)
+
+        interval_start: datetime.datetime = interval_end - \
+            datetime.timedelta(minutes=duration)
+        self.time_past_start = last_update_time - interval_start
+        if new_interval and record_lag:
+            self.publish_lag.add(self.time_past_start.total_seconds())
+        _LOGGER.debug(
+            "Data updated: intervalEnd=%s, lastUpdate=%s",
+            self.intervalEnd,
+            self.lastUpdate,
+        )
+        return changed
+
+    async def _async_process(
+        self, bodies: Sequence[bytes], now: datetime.datetime, forecast_only: bool = False
+    ) -> bool:
+        """Apply responses' records. Returns True if anything changed.
+
+        A forecast response is a few hundred KB of JSON, enough to hold the
+        event loop for tens of milliseconds, so above EXECUTOR_THRESHOLD_BYTES
+        decoding and merging go to the executor and only the swap-in runs
+        here. With forecast_only, 'exp' records are ignored.
+        """
+        base = self.forecast
+        job = partial(
+            process_response, bodies, self._decoder, base,
+            (self.intervalEnd or now).timestamp(), forecast_only, self.forecast_limit,
+        )
+        started = time.perf_counter()
+        try:
+            if sum(map(len, bodies)) >= EXECUTOR_THRESHOLD_BYTES:
+                result = await self.hass.async_add_executor_job(job)
+                blocked = 0.0
+            else:
+                result = job()
+                blocked = time.perf_counter() - started
+        except ValueError as err:
+            _LOGGER.error("Malformed response from Localvolts API: %s", err)
+            raise UpdateFailed(f"Malformed response from API: {err}") from err
+        self.metrics.record(SPAN_DECODE, result.decode_seconds)
+        self.metrics.record(SPAN_PROCESS, result.process_seconds)
+        if result.malformed:
+            self.metrics.count(COUNTER_MALFORMED_RECORDS, result.malformed)
+
+        # If the API returns an empty list, log a warning
+        if result.empty and not forecast_only:
+            _LOGGER.warning(
+                "No data received, check that your NMI, PartnerID and API Key are correct.")
+            raise UpdateFailed("No data received: Invalid NMI?")
+
+        started = time.perf_counter()
+        changed = self._apply_result(result, base, now)
+        self.metrics.record(SPAN_LOOP_BLOCK, blocked + time.perf_counter() - started)
+        return changed
+
+    def _apply_result(
+        self, result: ProcessedResponse, base: ForecastStore, now: datetime.datetime
+    ) -> bool:
+        """Swap a processed response in. Returns True if anything changed.
+
+        base is the forecast store the response was merged into.
+        """
+        changed = False
+        for item in result.exp:
+            try:
+                changed = self._apply_exp(item) or changed
+            except (KeyError, ValueError, TypeError) as err:
+                _LOGGER.warning(
+                    "Skipping malformed interval record %s: %s", item, err)
+                self.metrics.count(COUNTER_MALFORMED_RECORDS)
+
+        forecast = result.forecast
+        if forecast is not base:
+            if self.forecast is not base:
+                # The store was replaced while this response was processed
+                # (a poll dropping ended intervals); drop them here too.
+                forecast = forecast.merge(now=(self.intervalEnd or now).timestamp())
+            self.forecast = forecast
+            self.vintages.observe(forecast, now.timestamp())
+            changed = True
+        return changed
+
+    async def _async_refresh_forecast(self, notify: bool = False) -> bool:
+        """Fetch the forecast window and merge it into the store.
+
+        Returns True if the store changed. With notify, a change is pushed
+        to listeners directly, as this then runs outside a refresh.
+        """
+        current_utc_time = dt_util.utcnow()
+        from_time = (
+            self.intervalEnd if self.intervalEnd and self.intervalEnd > current_utc_time
+            else current_utc_time
+        )
+        to_time = current_utc_time + self.forecast_window
+        started = time.perf_counter()
+        errors: List[UpdateFailed] = []
+        try:
+            results = await asyncio.gather(
+                *(
+                    self.hub.async_fetch_intervals(
+                        self.nmi_id, shard_start, shard_end, metrics=self.metrics,
+                        raw=True, recorder=self.recorder, bulk=True,
+                    )
+                    for shard_start, shard_end in forecast_shards(from_time, to_time)
+                ),
+                return_exceptions=True,
+            )
+            bodies: List[bytes] = []
+            for result in results:
+                if isinstance(result, UpdateFailed):
+                    errors.append(result)
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    bodies.append(result)
+            if errors and not bodies:
+                raise errors[0]
+            # Whichever shards did arrive are merged; the rest of the window
+            # keeps its previous forecast until the retry.
+            changed = await self._async_process(bodies, current_utc_time, forecast_only=True)
+        except UpdateFailed as err:
+            if not notify:
+                raise
+            self._async_forecast_failed(current_utc_time, err)
+            return False
+        finally:
+            # Cleared only once processing is done, so a poll landing while
+            # it's in the executor doesn't start a second refresh.
+            self._forecast_task = None
+
+        if errors:
+            self._async_forecast_failed(current_utc_time, errors[0])
+        else:
+            self._forecast_fetched = current_utc_time
+            self._forecast_failures = 0
+            self._forecast_retry_at = None
+        self.metrics.record(SPAN_FORECAST, time.perf_counter() - started)
+        if changed and notify:
+            self._async_data_changed()
+            self.async_set_updated_data(self._build_data())
+        return changed
+
+    @callback
+    def _async_forecast_failed(self, now: datetime.datetime, err: UpdateFailed) -> None:
+        """Keep the old forecast, and retry after a backoff rather than every poll."""
+        self._forecast_failures += 1
+        delay = backoff_delay(
+            self._forecast_failures,
+            FORECAST_RETRY_BASE,
+            max(FORECAST_RETRY_BASE, self.forecast_refresh.total_seconds()),
+        )
+        self._forecast_retry_at = now + datetime.timedelta(seconds=delay)
+        _LOGGER.warning(
+            "Forecast refresh failed, keeping the previous forecast for %.0f seconds: %s",
+            delay, err,
+        )
@@ -0,0 +1,62 @@
+"""Diagnostics support for the Localvolts integration."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, CONF_NMI_ID, CONF_PARTNER_ID, DOMAIN
+
+TO_REDACT = {CONF_API_KEY, CONF_PARTNER_ID, CONF_NMI_ID, "NMI"}
+
+
+def _isoformat(value) -> Any:
+    return value.isoformat() if value is not None else None
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return the entry's polling state and performance metrics."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "interval_end": _isoformat(coordinator.intervalEnd),
+            "last_update": _isoformat(coordinator.lastUpdate),
+            "generation": coordinator.generation,
+            "stale": coordinator.stale,
+            "forecast_intervals": len(coordinator.forecast),
+            "forecast_fetched": _isoformat(coordinator.forecast_fetched),
+            "publish_lag_samples": len(coordinator.publish_lag),
+            "publish_window_seconds": list(coordinator.publish_lag.window()),
+            "current_interval": async_redact_data(dict(coordinator.interval_data), TO_REDACT),
+        },
+        "hub": {
+            "coordinators": hub.coordinator_count,
+            "api_calls": hub.api_calls,
+            "wakeups": hub.wakeups,
+            "circuit_breaker": hub.breaker.as_dict(),
+        },
+        "statistics": {
+            "written_until": coordinator.statistics.written_until,
+            "hours_written": coordinator.statistics.hours_written,
+            "backfill_requests": coordinator.backfill.requests,
+            "backfill_intervals": coordinator.backfill.intervals,
+        },
+        "forecast_history": {
+            "depth": coordinator.vintages.depth,
+            "intervals": len(coordinator.vintages),
+            "resolved": coordinator.vintages.resolved,
+        },
+        "recording": coordinator.recorder is not None,
+        "metrics": coordinator.metrics.as_dict(),
+    }
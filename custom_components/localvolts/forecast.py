@@ -0,0 +1,330 @@
+"""Columnar forecast store for the Localvolts integration."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import math
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .const import COSTS_FLEX_UP, EARNINGS_FLEX_UP
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fields that are identifiers, timestamps or quality flags rather than
+# quantities. Everything else that isn't a "...Units" label is treated as a
+# numeric column, coercing the API's string-typed numbers (e.g.
+# costsAllVarRate: '12.62183895') along the way.
+NON_NUMERIC_FIELDS = frozenset(
+    {"NMI", "quality", "intervalEnd", "lastUpdate", "intervalDuration"}
+)
+
+DEFAULT_INTERVAL_MINUTES = 5
+# Enough for every intervalEnd and lastUpdate of a 7-day forecast
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_utc(value: str) -> datetime.datetime:
+    """Parse an API timestamp, treating naive values as UTC.
+
+    The API only sends two fixed formats, "2025-01-01T00:05:00Z"
+    (intervalEnd) and "2025-01-01 00:00:20" (lastUpdate, naive UTC), both
+    of which datetime.fromisoformat reads directly - many times faster
+    than dateutil's general-purpose parser. Cached, as each forecast
+    refresh sees mostly the same timestamps as the last.
+    """
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def is_numeric_field(field: str) -> bool:
+    """Return True if field holds a quantity rather than a label/identifier."""
+    return field not in NON_NUMERIC_FIELDS and not field.endswith("Units")
+
+
+def to_float(value: Any) -> float:
+    """Coerce an API value to float, NaN if it isn't a number ('N/A', None)."""
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _isoformat(epoch: float) -> str:
+    # Interned: every NMI's store has the same interval times
+    return sys.intern(
+        datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat()
+    )
+
+
+class IntervalDetail(Mapping):
+    """Every field of one interval, plus duration/start/end times, by reference.
+
+    A read-only view over the store's record rather than a copy of it, so
+    an attribute payload of ~287 of these costs a few slots per interval,
+    not a dict of ~45 fields. Home Assistant serialises it via as_dict().
+    """
+
+    __slots__ = ("record", "duration", "start_time", "end_time")
+
+    EXTRA_FIELDS = ("duration", "start_time", "end_time")
+
+    def __init__(
+        self, record: Mapping[str, Any], duration: int, start_time: str, end_time: str
+    ) -> None:
+        self.record = record
+        self.duration = duration
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def __getitem__(self, field: str) -> Any:
+        if field in IntervalDetail.EXTRA_FIELDS:
+            return getattr(self, field)
+        value = self.record[field]
+        if field in (EARNINGS_FLEX_UP, COSTS_FLEX_UP):
+            number = to_float(value)
+            if not math.isnan(number):
+                return round(number, 5)
+        return value
+
+    def __contains__(self, field: object) -> bool:
+        return field in IntervalDetail.EXTRA_FIELDS or field in self.record
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.record
+        for field in IntervalDetail.EXTRA_FIELDS:
+            if field not in self.record:
+                yield field
+
+    def __len__(self) -> int:
+        return len(self.record) + sum(
+            field not in self.record for field in IntervalDetail.EXTRA_FIELDS
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"IntervalDetail({self.as_dict()!r})"
+
+
+class ForecastStore:
+    """Typed, array-backed view of one fetch's forecast intervals.
+
+    Built once per API response, sorted by intervalEnd. Timestamps are kept
+    as epoch seconds and every numeric field as an array('d') column (NaN
+    where the API sent nothing usable), so sensors can read prices and
+    times directly instead of re-parsing ~287 dicts of strings on every
+    state write. The records themselves (see records.py) are kept alongside
+    for consumers that still want every field.
+    """
+
+    __slots__ = ("start", "end", "duration", "start_iso", "end_iso", "columns", "records")
+
+    def __init__(self) -> None:
+        self.start: array = array("d")
+        self.end: array = array("d")
+        self.duration: array = array("H")
+        self.start_iso: Tuple[str, ...] = ()
+        self.end_iso: Tuple[str, ...] = ()
+        self.columns: Dict[str, array] = {}
+        self.records: Tuple[Mapping[str, Any], ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.end)
+
+    def __bool__(self) -> bool:
+        return len(self.end) > 0
+
+    @classmethod
+    def from_records(cls, items: Iterable[Mapping[str, Any]]) -> "ForecastStore":
+        """Build a store from raw 'fcst' API records, skipping malformed ones."""
+        return cls().merge(items)
+
+    def merge(
+        self,
+        items: Iterable[Mapping[str, Any]] = (),
+        now: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> "ForecastStore":
+        """Return a store with items merged in and expired intervals dropped.
+
+        Intervals are matched on their intervalEnd; one whose lastUpdate is
+        unchanged keeps its already-parsed row, so only revised or newly
+        published intervals are parsed. Intervals not in items are kept
+        until they end (at or before now, an epoch). Only the first limit
+        intervals are kept, if given. Returns self when nothing changed, so
+        callers can tell a no-op merge by identity.
+        """
+        by_end = {record.get("intervalEnd"): index for index, record in enumerate(self.records)}
+        # Each row: (end epoch, duration, raw record, index into self or None)
+        rows: Dict[float, Tuple[float, int, Mapping[str, Any], Optional[int]]] = {}
+        changed = False
+        for item in items:
+            index = by_end.get(item.get("intervalEnd"))
+            if index is not None and self.records[index].get("lastUpdate") == item.get("lastUpdate"):
+                continue
+            try:
+                end = parse_utc(item["intervalEnd"]).timestamp()
+                duration = int(item.get("intervalDuration", DEFAULT_INTERVAL_MINUTES))
+            except (KeyError, ValueError, TypeError, AttributeError) as err:
+                _LOGGER.debug("Skipping unparsable forecast entry %s: %s", item, err)
+                continue
+            rows[end] = (end, duration, item, None)
+            changed = True
+
+        for index, end in enumerate(self.end):
+            if now is not None and end <= now:
+                changed = True
+            elif end not in rows:
+                rows[end] = (end, self.duration[index], self.records[index], index)
+
+        if limit is not None and len(rows) > limit:
+            changed = True
+        if not changed:
+            return self
+        return self._build(sorted(rows.values(), key=lambda row: row[0])[:limit])
+
+    def _build(
+        self, rows: List[Tuple[float, int, Mapping[str, Any], Optional[int]]]
+    ) -> "ForecastStore":
+        fields: Dict[str, None] = dict.fromkeys(self.columns)
+        for row in rows:
+            if row[3] is None:
+                for field in row[2]:
+                    if field not in fields and is_numeric_field(field):
+                        fields[field] = None
+
+        def column_values(field: str):
+            old = self.columns.get(field)
+            for _end, _duration, record, index in rows:
+                if index is None:
+                    yield to_float(record.get(field))
+                elif old is None:
+                    yield math.nan
+                else:
+                    yield old[index]
+
+        store = ForecastStore()
+        store.end = array("d", (row[0] for row in rows))
+        store.duration = array("H", (row[1] for row in rows))
+        store.start = array("d", (row[0] - row[1] * 60 for row in rows))
+        store.start_iso = tuple(
+            _isoformat(row[0] - row[1] * 60) if row[3] is None else self.start_iso[row[3]]
+            for row in rows
+        )
+        store.end_iso = tuple(
+            _isoformat(row[0]) if row[3] is None else self.end_iso[row[3]]
+            for row in rows
+        )
+        store.columns = {field: array("d", column_values(field)) for field in fields}
+        store.records = tuple(row[2] for row in rows)
+        return store
+
+    def changes_since(self, previous: "ForecastStore") -> Tuple[List[int], List[str]]:
+        """Return what changed since previous, an earlier store of this one.
+
+        That's the indices of intervals that are new or were revised (merge
+        only replaces a record when its lastUpdate changes, so an unchanged
+        interval still holds the very same record), and the intervalEnd
+        (ISO) of each interval previous had that this doesn't.
+        """
+        if previous is self:
+            return [], []
+        before = dict(zip(previous.end, previous.records))
+        changed = [
+            index for index, (end, record) in enumerate(zip(self.end, self.records))
+            if before.pop(end, None) is not record
+        ]
+        remaining = set(before)
+        removed = [
+            previous.end_iso[index]
+            for index, end in enumerate(previous.end) if end in remaining
+        ]
+        return changed, removed
+
+    def index_at(self, timestamp: float) -> Optional[int]:
+        """Return the index of the interval covering timestamp (epoch), if any.
+
+        Intervals are start-inclusive and end-exclusive, matching how the
+        API's intervalEnd labels the 5 minutes leading up to it.
+        """
+        index = bisect_right(self.end, timestamp)
+        if index < len(self.end) and self.start[index] <= timestamp:
+            return index
+        return None
+
+    def indices_between(self, start: float, end: float) -> range:
+        """Return the indices of intervals overlapping [start, end) (epochs)."""
+        return range(bisect_right(self.end, start), bisect_left(self.start, end))
+
+    def value(self, field: str, index: int) -> Optional[float]:
+        """Return field's value for interval index, None if missing/non-numeric."""
+        column = self.columns.get(field)
+        if column is None:
+            return None
+        value = column[index]
+        return None if math.isnan(value) else value
+
+    def price_entry(self, index: int) -> Dict[str, Any]:
+        """Return the start/end times and flex prices of one interval."""
+        return {
+            "start_time": self.start_iso[index],
+            "end_time": self.end_iso[index],
+            COSTS_FLEX_UP: self.value(COSTS_FLEX_UP, index),
+            EARNINGS_FLEX_UP: self.value(EARNINGS_FLEX_UP, index),
+            "quality": self.records[index].get("quality"),
+        }
+
+    def detail(self, index: int) -> IntervalDetail:
+        """Return every field of one interval, plus duration/start/end times.
+
+        Carries through every field the API returned for the interval (not
+        just a hand-picked subset), so nothing the API exposes is silently
+        dropped. duration/start_time/end_time are added as convenience
+        fields on top, taken from the store rather than parsed again.
+        """
+        return IntervalDetail(
+            self.records[index], self.duration[index], self.start_iso[index], self.end_iso[index]
+        )
+
+    def detail_entry(self, index: int) -> Dict[str, Any]:
+        """Return detail(index) as a plain dict, e.g. for a service response."""
+        return self.detail(index).as_dict()
+
+    def to_compact(self) -> Dict[str, Any]:
+        """Return the raw records as one field list plus a row per interval.
+
+        Used for the on-disk warm-start cache: the ~40 field names are
+        written once instead of once per interval.
+        """
+        fields: Dict[str, None] = {}
+        for record in self.records:
+            fields.update(dict.fromkeys(record))
+        return {
+            "fields": list(fields),
+            "rows": [[record.get(field) for field in fields] for record in self.records],
+        }
+
+
+def records_from_compact(compact: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn ForecastStore.to_compact() output back into raw records."""
+    if not compact:
+        return []
+    fields = compact.get("fields") or []
+    return [
+        {field: value for field, value in zip(fields, row) if value is not None}
+        for row in compact.get("rows") or []
+    ]
@@ -0,0 +1,331 @@
+"""Partner-level polling hub for the Localvolts integration."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set, Tuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import DATA_HUBS
+from .metrics import (
+    COUNTER_API_CALLS,
+    COUNTER_FAILED_REQUESTS,
+    COUNTER_PAYLOAD_BYTES,
+    COUNTER_SHORT_CIRCUITED_REQUESTS,
+    SPAN_DECODE,
+    SPAN_HTTP,
+    PollMetrics,
+)
+from .resilience import (
+    BULK_TIMEOUT,
+    CircuitBreaker,
+    LocalvoltsAuthError,
+    is_auth_error,
+)
+from .transport import ERROR_CLIENT, ERROR_TIMEOUT, HttpTransport, ResponseRecorder
+
+if TYPE_CHECKING:
+    from .coordinator import LocalvoltsDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+API_URL = "https://api.localvolts.com/v1/customer/interval"
+
+# Bounds on how long the hub sleeps between wakeups. The upper bound only
+# matters if every coordinator's next poll is further out than that, e.g.
+# while waiting out a long backoff.
+MIN_SLEEP = datetime.timedelta(seconds=1)
+MAX_SLEEP = datetime.timedelta(minutes=5)
+
+# Shared across every NMI under one partner, so adding sites never turns
+# an interval boundary into a burst of simultaneous requests.
+MAX_CONCURRENT_REQUESTS = 3
+# Of those, how many forecast shards and backfill chunks can take at once,
+# so a live poll always has a slot.
+MAX_CONCURRENT_BULK_REQUESTS = MAX_CONCURRENT_REQUESTS - 1
+
+
+def _format_time(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class LocalvoltsPartnerHub:
+    """One scheduler and request budget per API key + partner ID.
+
+    Every config entry used to run its own coordinator timer and fire its
+    own request at each interval boundary, so N NMIs meant N timers and N
+    bursts (gurrier/localvolts#22). The hub owns the only timer; on each
+    wakeup it refreshes just the coordinators that are due, in one batch,
+    with all HTTP going through a shared concurrency limit. The interval
+    endpoint takes a single NMI per request, so requests are still per NMI
+    - but wakeups scale with partners, not NMIs.
+
+    Rather than ticking every 10 seconds, the hub sleeps until the earliest
+    time any coordinator wants to poll, which each works out from when its
+    data has been published recently (see scheduler.py).
+
+    Every request goes through one circuit breaker (see resilience.py):
+    while the API is down, polls fail without a request until it's time
+    to probe again, and bad credentials stop polling until reauth.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_key: str, partner_id: str) -> None:
+        self.hass = hass
+        self.api_key = api_key
+        self.partner_id = partner_id
+        self._coordinators: Set[LocalvoltsDataUpdateCoordinator] = set()
+        self._request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._bulk_slots = asyncio.Semaphore(MAX_CONCURRENT_BULK_REQUESTS)
+        self._unsub_timer: Optional[Callable[[], None]] = None
+        self._polling = False
+        # Set whenever no live poll is in progress; background requests
+        # (see async_fetch_intervals) wait on it.
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.api_calls = 0
+        self.wakeups = 0
+        self.breaker = CircuitBreaker()
+        # Swapped for a ReplayTransport to run against recorded responses
+        self.transport = HttpTransport(hass, API_URL)
+
+    @property
+    def has_coordinators(self) -> bool:
+        return bool(self._coordinators)
+
+    @property
+    def coordinator_count(self) -> int:
+        return len(self._coordinators)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.api_key, self.partner_id)
+
+    @callback
+    def async_add_coordinator(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
+        """Start polling coordinator on the shared schedule."""
+        self._coordinators.add(coordinator)
+        if self.breaker.auth_failed is not None:
+            # Set up again with these credentials, e.g. after reauth
+            self.breaker.reset()
+        if not self._polling:
+            self._async_schedule()
+
+    @callback
+    def async_remove_coordinator(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
+        """Stop polling coordinator, stopping the timer with the last one."""
+        self._coordinators.discard(coordinator)
+        if not self._coordinators:
+            self._async_cancel_timer()
+
+    @callback
+    def _async_cancel_timer(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_schedule(self) -> None:
+        """(Re)arm the single wakeup for the earliest coordinator poll."""
+        self._async_cancel_timer()
+        wake = self.next_wakeup(dt_util.utcnow())
+        if wake is not None:
+            self._unsub_timer = async_track_point_in_utc_time(
+                self.hass, self._async_poll, wake
+            )
+
+    def next_wakeup(self, now: datetime.datetime) -> Optional[datetime.datetime]:
+        """Return when the hub should next poll, or None to stop polling.
+
+        That's the earliest coordinator poll, but no sooner than the
+        breaker's next probe; polling stops while the credentials are bad.
+        """
+        if not self._coordinators or self.breaker.auth_failed is not None:
+            return None
+        wake = min(c.next_poll_time(now) for c in self._coordinators)
+        if self.breaker.retry_at is not None:
+            wake = max(wake, self.breaker.retry_at)
+        return max(now + MIN_SLEEP, min(wake, now + MAX_SLEEP))
+
+    async def _async_poll(self, now: Optional[datetime.datetime] = None) -> None:
+        self._unsub_timer = None
+        try:
+            await self.async_poll_due()
+        finally:
+            self._async_schedule()
+
+    async def async_poll_due(self) -> None:
+        """Refresh, in one batch, every coordinator that is due to poll."""
+        self.wakeups += 1
+        current_utc_time = dt_util.utcnow()
+        due = [
+            c for c in self._coordinators
+            if c.next_poll_time(current_utc_time) <= current_utc_time
+        ]
+        self._polling = True
+        self._idle.clear()
+        try:
+            if due:
+                await asyncio.gather(*(c.async_refresh() for c in due))
+        finally:
+            self._polling = False
+            self._idle.set()
+
+    async def async_fetch_intervals(
+        self,
+        nmi_id: str,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+        background: bool = False,
+        metrics: Optional[PollMetrics] = None,
+        raw: bool = False,
+        timeout: float = BULK_TIMEOUT,
+        recorder: Optional[ResponseRecorder] = None,
+        bulk: bool = False,
+    ) -> Any:
+        """Fetch interval records for one NMI, within the partner's budget.
+
+        background requests (history backfill) hold off until no live poll
+        is running, so they never take a request slot a live poll needs.
+        They and bulk requests (forecast shards) share fewer slots than
+        there are in all, so a live poll never waits behind them either.
+        The round trip, payload size and decode time go to metrics, if given.
+        With raw, the undecoded response body is returned instead, for the
+        caller to decode wherever suits it (see processing.py). The request
+        is abandoned after timeout seconds, and the response (or failure)
+        written to recorder, if given.
+
+        Raises LocalvoltsAuthError if the credentials were rejected, and
+        UpdateFailed for anything else, including when the circuit breaker
+        is open and no request was sent.
+        """
+        params: Dict[str, str] = {
+            "NMI": nmi_id,
+            "from": _format_time(from_time),
+            "to": _format_time(to_time),
+        }
+        headers: Dict[str, str] = {
+            "Authorization": f"apikey {self.api_key}",
+            "partner": self.partner_id,
+        }
+
+        if background:
+            await self._idle.wait()
+        if background or bulk:
+            async with self._bulk_slots:
+                return await self._async_fetch(params, headers, metrics, raw, timeout, recorder)
+        return await self._async_fetch(params, headers, metrics, raw, timeout, recorder)
+
+    async def _async_fetch(
+        self,
+        params: Dict[str, str],
+        headers: Dict[str, str],
+        metrics: Optional[PollMetrics],
+        raw: bool,
+        timeout: float,
+        recorder: Optional[ResponseRecorder],
+    ) -> Any:
+        async with self._request_slots:
+            try:
+                self.breaker.check()
+            except UpdateFailed:
+                if metrics is not None:
+                    metrics.count(COUNTER_SHORT_CIRCUITED_REQUESTS)
+                raise
+            self.api_calls += 1
+            if metrics is not None:
+                metrics.count(COUNTER_API_CALLS)
+            started = time.perf_counter()
+            try:
+                status, body = await self.transport.request(params, headers, timeout)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                if recorder is not None:
+                    recorder.record(params, error=ERROR_TIMEOUT if timed_out else ERROR_CLIENT)
+                self._async_record_failure(metrics)
+                reason = f"no response within {timeout:.0f}s" if timed_out else str(e)
+                _LOGGER.error("Failed to fetch data from Localvolts API: %s", reason)
+                raise UpdateFailed(f"Error communicating with API: {reason}") from e
+            if recorder is not None:
+                recorder.record(params, status, body)
+
+            if status >= 400:
+                error_text = body.decode("utf-8", "replace").strip()
+                # The Localvolts API returns auth failures (missing/invalid
+                # API key or partner id) as HTTP 500 with the specific
+                # reason as plain text in the body, e.g. "Invalid API Key
+                # (partner: 1234)" or "Unregistered partner: 1234", matched
+                # whole; other 500s - even ones mentioning a partner or key
+                # - are outages like any other, since the hub is shared and
+                # an auth failure stops polling for every NMI on it.
+                # 401/403 are kept as a fallback in case that ever changes.
+                if is_auth_error(status, error_text):
+                    _LOGGER.critical(
+                        "Localvolts API authentication error (HTTP %s): %s",
+                        status, error_text,
+                    )
+                    reason = f"Localvolts API authentication error: {error_text or status}"
+                    self.breaker.record_auth_failure(reason)
+                    if metrics is not None:
+                        metrics.count(COUNTER_FAILED_REQUESTS)
+                    raise LocalvoltsAuthError(reason)
+                self._async_record_failure(metrics)
+                _LOGGER.error(
+                    "Failed to fetch data from Localvolts API: HTTP %s %s",
+                    status, error_text[:200],
+                )
+                raise UpdateFailed(f"Error communicating with API: HTTP {status}")
+
+            self.breaker.record_success()
+            if metrics is not None:
+                metrics.record(SPAN_HTTP, time.perf_counter() - started)
+                metrics.count(COUNTER_PAYLOAD_BYTES, len(body))
+            if raw:
+                return body
+            # HA's json_loads is orjson - several times faster than the
+            # stdlib decoder aiohttp's response.json() uses.
+            try:
+                if metrics is None:
+                    return json_loads(body)
+                with metrics.span(SPAN_DECODE):
+                    return json_loads(body)
+            except ValueError as e:
+                _LOGGER.error("Malformed response from Localvolts API: %s", e)
+                raise UpdateFailed(f"Malformed response from API: {e}") from e
+
+    @callback
+    def _async_record_failure(self, metrics: Optional[PollMetrics]) -> None:
+        self.breaker.record_failure()
+        if metrics is not None:
+            metrics.count(COUNTER_FAILED_REQUESTS)
+
+
+@callback
+def async_get_hub(hass: HomeAssistant, api_key: str, partner_id: str) -> LocalvoltsPartnerHub:
+    """Return the hub for api_key/partner_id, creating it on first use."""
+    hubs: Dict[Tuple[str, str], LocalvoltsPartnerHub] = hass.data.setdefault(DATA_HUBS, {})
+    hub = hubs.get((api_key, partner_id))
+    if hub is None:
+        hub = hubs[(api_key, partner_id)] = LocalvoltsPartnerHub(hass, api_key, partner_id)
+    return hub
+
+
+@callback
+def async_release_hub(hass: HomeAssistant, hub: LocalvoltsPartnerHub) -> None:
+    """Forget a hub once its last coordinator has been removed."""
+    if hub.has_coordinators:
+        return
+    hubs: Dict[Tuple[str, str], LocalvoltsPartnerHub] = hass.data.get(DATA_HUBS, {})
+    if hubs.get(hub.key) is hub:
+        hubs.pop(hub.key)
+    if not hubs:
+        hass.data.pop(DATA_HUBS, None)
@@ -0,0 +1,117 @@
+"""Lightweight per-poll timing and counters for the Localvolts integration."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator
+
+# Enough to cover a day's worth of intervals at a poll or two each
+SAMPLES = 512
+
+# Timing spans, one sample per occurrence
+SPAN_POLL = "poll"
+SPAN_HTTP = "http"
+SPAN_DECODE = "decode"
+SPAN_PROCESS = "process"
+SPAN_NOTIFY = "notify"
+SPAN_FORECAST = "forecast_refresh"
+# Time response handling held the event loop: processing done inline plus
+# swapping the result in. Large responses are processed in the executor,
+# so for those this is just the swap.
+SPAN_LOOP_BLOCK = "loop_block"
+
+# Counters, totals since the entry was set up
+COUNTER_API_CALLS = "api_calls"
+COUNTER_NOOP_POLLS = "noop_polls"
+COUNTER_SUPPRESSED_NOTIFICATIONS = "suppressed_notifications"
+# Entities left alone by a notification because none of their data changed
+COUNTER_SKIPPED_ENTITY_UPDATES = "skipped_entity_updates"
+COUNTER_MALFORMED_RECORDS = "malformed_records"
+COUNTER_PAYLOAD_BYTES = "payload_bytes"
+# Requests that got an error or no response, and polls that sent none
+# because the hub's circuit breaker was open
+COUNTER_FAILED_REQUESTS = "failed_requests"
+COUNTER_SHORT_CIRCUITED_REQUESTS = "short_circuited_requests"
+COUNTERS = (
+    COUNTER_API_CALLS,
+    COUNTER_NOOP_POLLS,
+    COUNTER_SUPPRESSED_NOTIFICATIONS,
+    COUNTER_SKIPPED_ENTITY_UPDATES,
+    COUNTER_MALFORMED_RECORDS,
+    COUNTER_PAYLOAD_BYTES,
+    COUNTER_FAILED_REQUESTS,
+    COUNTER_SHORT_CIRCUITED_REQUESTS,
+)
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class RollingHistogram:
+    """The last SAMPLES durations of one span, summarised on demand."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, maxlen: int = SAMPLES) -> None:
+        self._samples: Deque[float] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return count and p50/p95/max in milliseconds."""
+        if not self._samples:
+            return {"count": 0}
+        ordered = sorted(self._samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(_percentile(ordered, 0.5) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+class PollMetrics:
+    """Where one coordinator's time goes, and how often things happen.
+
+    Recording a span is a perf_counter() pair and a deque append, so this
+    stays on permanently; the summaries are only computed when something
+    (diagnostics, the diagnostic sensors) reads them.
+    """
+
+    def __init__(self) -> None:
+        self.spans: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        histogram = self.spans.get(name)
+        if histogram is None:
+            histogram = self.spans[name] = RollingHistogram()
+        histogram.add(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, name: str) -> Dict[str, Any]:
+        histogram = self.spans.get(name)
+        return histogram.summary() if histogram is not None else {"count": 0}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "spans": {name: histogram.summary() for name, histogram in self.spans.items()},
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,100 @@
+"""Response processing for the Localvolts integration, safe to run off the event loop."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from homeassistant.util.json import json_loads
+
+from .forecast import ForecastStore, parse_utc
+from .records import IntervalRecord, RecordDecoder
+
+_LOGGER = logging.getLogger(__name__)
+
+# Responses at least this big (all shards together) are processed in the
+# executor. A current interval response (one record, ~1.4KB) is quicker to
+# handle inline than to hand off; a 24h forecast (~290KB) is not.
+EXECUTOR_THRESHOLD_BYTES = 32 * 1024
+
+
+class ProcessedResponse(NamedTuple):
+    """Everything derived from one API response (or forecast shards), ready to swap in.
+
+    Nothing here is shared with state the event loop is reading: the
+    forecast is a new store (or the one passed in, unchanged) and records
+    are immutable, so applying a result is a few reference assignments.
+    """
+
+    # Every decoded response was an empty list
+    empty: bool
+    exp: List[IntervalRecord]
+    forecast: ForecastStore
+    malformed: int
+    decode_seconds: float
+    process_seconds: float
+
+
+def process_response(
+    bodies: Sequence[Any],
+    decoder: RecordDecoder,
+    forecast: ForecastStore,
+    expire_before: float,
+    forecast_only: bool = False,
+    limit: Optional[int] = None,
+) -> ProcessedResponse:
+    """Decode responses and merge their forecast intervals into forecast.
+
+    bodies are raw responses (or already-decoded JSON) - one, or the
+    shards of a forecast window - merged together in a single pass.
+    Forecast intervals ending at or before expire_before, or before the
+    end of an 'exp' interval in these responses, are dropped, and only the
+    first limit are kept, if given. With forecast_only, 'exp' records are
+    ignored. Raises ValueError if a body isn't valid JSON.
+    """
+    started = time.perf_counter()
+    decoded_bodies = [
+        json_loads(body) if isinstance(body, (bytes, bytearray, str)) else body
+        for body in bodies
+    ]
+    decoded = time.perf_counter()
+
+    # RecordDecoder's shared schemas and values may be filled from here
+    # and from the loop at once; see records.py for why that's safe.
+    records: List[IntervalRecord] = []
+    malformed = 0
+    for data in decoded_bodies:
+        body_records = decoder.decode_all(data)
+        malformed += len(data) - len(body_records) if isinstance(data, list) else 0
+        records.extend(body_records)
+    exp: List[IntervalRecord] = []
+    forecast_items: List[IntervalRecord] = []
+    for item in records:
+        quality = str(item.get("quality", "")).lower()
+        if quality == "exp" and not forecast_only:
+            try:
+                expire_before = max(expire_before, parse_utc(item["intervalEnd"]).timestamp())
+            except (KeyError, ValueError, TypeError, AttributeError) as err:
+                _LOGGER.warning("Skipping malformed interval record %s: %s", item, err)
+                malformed += 1
+                continue
+            exp.append(item)
+        elif quality == "fcst":
+            forecast_items.append(item)
+        else:
+            _LOGGER.debug(
+                "Skipping non-'exp' and non-'fcst' quality data. Only 'exp' and 'fcst' are processed."
+            )
+
+    # Merge rather than replace: only intervals whose lastUpdate changed
+    # are re-parsed, and anything that has already ended (including the
+    # interval that just became 'exp') drops out.
+    return ProcessedResponse(
+        empty=all(isinstance(data, list) and not data for data in decoded_bodies),
+        exp=exp,
+        forecast=forecast.merge(forecast_items, expire_before, limit),
+        malformed=malformed,
+        decode_seconds=decoded - started,
+        process_seconds=time.perf_counter() - decoded,
+    )
@@ -0,0 +1,190 @@
+"""Compact interval records for the Localvolts integration."""
+
+from __future__ import annotations
+
+import logging
+import re
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .forecast import is_numeric_field
+
+_LOGGER = logging.getLogger(__name__)
+
+# The last camelCase word of a field name, e.g. "Up" in costsFlexUp
+_LAST_WORD = re.compile(r"[A-Z][a-z]*$")
+
+# Record shapes (field names plus unit labels) whose schemas are kept,
+# least recently used dropped first. The API sends one or two.
+SCHEMA_CACHE_SIZE = 16
+# Distinct float values kept in the shared pool before it's started afresh
+VALUE_POOL_SIZE = 1 << 15
+
+# Process-wide, so equal values - the same intervalEnd, the same regional
+# price - are one object however many NMIs hold them (schemas likewise,
+# see _schema). Read and filled from the loop and from executor threads
+# at once: setdefault keeps that to one winner per value, and a full pool
+# is replaced rather than cleared, so no thread ever sees it emptied
+# under it.
+_FLOATS: Dict[float, float] = {}
+
+
+class IntervalSchema:
+    """Field layout and unit labels shared by every record with that shape.
+
+    The API repeats ~20 "...Units" labels (costsAllUnits: cents, ...) on
+    every interval. They're identical from row to row, so they live here,
+    once, and records only carry the values that actually vary.
+    """
+
+    __slots__ = ("fields", "value_fields", "units", "positions")
+
+    def __init__(self, fields: Tuple[str, ...], units: Dict[str, str]) -> None:
+        # All field names in API order, units included, so records read
+        # back with the same shape the API sent.
+        self.fields = tuple(sys.intern(field) for field in fields)
+        self.units = {sys.intern(field): sys.intern(unit) for field, unit in units.items()}
+        self.value_fields = tuple(field for field in self.fields if field not in self.units)
+        self.positions = {field: index for index, field in enumerate(self.value_fields)}
+
+    def unit_for(self, field: str) -> Optional[str]:
+        """Return field's unit label, if the API sends one.
+
+        Most fields have their own (costsAll -> costsAllUnits), but some
+        pairs share one: costsFlexUp and costsFlexDown -> costsFlexUnits.
+        """
+        unit = self.units.get(f"{field}Units")
+        if unit is None:
+            unit = self.units.get(f"{_LAST_WORD.sub('', field)}Units")
+        return unit
+
+    def numeric_fields(self) -> Tuple[str, ...]:
+        """Return the fields holding quantities, in API order."""
+        return tuple(field for field in self.value_fields if is_numeric_field(field))
+
+
+class IntervalRecord(Mapping):
+    """One interval from the API: a schema plus a tuple of typed values.
+
+    Behaves as a read-only mapping of the original record, so it can be
+    used anywhere the raw dict was (including dict(record) for attribute
+    payloads), but numbers that arrived as strings are floats here and the
+    unit labels come from the shared schema instead of each row.
+    """
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema: IntervalSchema, values: Tuple[Any, ...]) -> None:
+        self.schema = schema
+        self.values = values
+
+    def __getitem__(self, field: str) -> Any:
+        position = self.schema.positions.get(field)
+        if position is not None:
+            return self.values[position]
+        return self.schema.units[field]
+
+    def get(self, field: str, default: Any = None) -> Any:
+        position = self.schema.positions.get(field)
+        if position is not None:
+            return self.values[position]
+        return self.schema.units.get(field, default)
+
+    def __contains__(self, field: object) -> bool:
+        return field in self.schema.positions or field in self.schema.units
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.fields)
+
+    def __len__(self) -> int:
+        return len(self.schema.fields)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IntervalRecord) and other.schema is self.schema:
+            return other.values == self.values
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"IntervalRecord({dict(self)!r})"
+
+
+def _shared_float(value: float) -> float:
+    """Return the process-wide instance of a float equal to value."""
+    # NaN never equals itself, and 0.0 == -0.0 would lose a sign; neither
+    # is worth pooling.
+    global _FLOATS
+    if not value or value != value:
+        return value
+    pool = _FLOATS
+    if len(pool) >= VALUE_POOL_SIZE:
+        # Values already shared stay shared; only new ones start over
+        pool = _FLOATS = {}
+    return pool.setdefault(value, value)
+
+
+def _typed(field: str, value: Any) -> Any:
+    """Return value shared, as a float if it's a numeric field sent as a string."""
+    kind = type(value)
+    if kind is float:
+        return _FLOATS.get(value) or _shared_float(value)
+    if kind is str:
+        if is_numeric_field(field):
+            try:
+                return _shared_float(float(value))
+            except ValueError:
+                pass  # e.g. earningsAllVarRate: 'N/A'
+        return sys.intern(value)
+    return value
+
+
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def _schema(fields: Tuple[str, ...], units: Tuple[Tuple[str, str], ...]) -> IntervalSchema:
+    """Return the schema for a record shape, shared by every config entry.
+
+    Cached process-wide, so every NMI's records share one copy of the field
+    names and unit labels. Two threads missing at once can each build one;
+    the worst case is two equal schemas, never a bad one.
+    """
+    return IntervalSchema(fields, dict(units))
+
+
+class RecordDecoder:
+    """Map decoded JSON dicts to IntervalRecords, reusing schemas.
+
+    Schemas are keyed on a record's field names plus its unit labels, so
+    the ~287 records of a response - and those of every other NMI on the
+    same API - normally share a single schema.
+    """
+
+    def schema_for(self, item: Dict[str, Any]) -> IntervalSchema:
+        units = tuple(
+            (field, value) for field, value in item.items()
+            if field.endswith("Units") and isinstance(value, str)
+        )
+        return _schema(tuple(item), units)
+
+    def decode(self, item: Any) -> Optional[IntervalRecord]:
+        """Return item as an IntervalRecord, or None if it isn't a record."""
+        if isinstance(item, IntervalRecord):
+            return item
+        if not isinstance(item, dict):
+            return None
+        schema = self.schema_for(item)
+        return IntervalRecord(
+            schema, tuple(_typed(field, item[field]) for field in schema.value_fields)
+        )
+
+    def decode_all(self, items: Iterable[Any]) -> List[IntervalRecord]:
+        """Decode a response's records, skipping anything that isn't one."""
+        records: List[IntervalRecord] = []
+        for item in items:
+            record = self.decode(item)
+            if record is None:
+                _LOGGER.warning("Skipping malformed interval record %s", item)
+                continue
+            records.append(record)
+        return records
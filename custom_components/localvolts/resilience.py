@@ -0,0 +1,164 @@
+"""Failure handling for Localvolts API requests: error types and a circuit breaker."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import random
+import re
+from typing import Any, Dict, Optional
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Per-request timeouts, seconds. The current interval is ~1.4KB and polled
+# every few seconds around a boundary, so a slow answer is better dropped
+# for the next poll; the forecast and history are bigger and rarer.
+LIVE_TIMEOUT = 10.0
+BULK_TIMEOUT = 30.0
+
+# Consecutive failures (across every NMI of a partner) that open the
+# circuit, and how long it stays open: exponential from BREAKER_BASE, with
+# jitter, capped low enough that recovery is still noticed within minutes.
+FAILURE_THRESHOLD = 3
+BREAKER_BASE = 15.0
+BREAKER_MAX = 120.0
+
+# Bodies of the HTTP 500s the API sends for bad credentials, matched
+# whole: "Invalid API Key (partner: 1234)" or "Unregistered partner: 1234".
+# Any other 500 is an outage, however it's worded.
+AUTH_ERROR_MESSAGES = (
+    re.compile(r"invalid api key(?: \(partner: [^)]*\))?", re.IGNORECASE),
+    re.compile(r"unregistered partner(?::\s*\S+)?", re.IGNORECASE),
+)
+
+
+class LocalvoltsAuthError(UpdateFailed):
+    """The API rejected the API key or partner ID. Retrying won't help."""
+
+
+class LocalvoltsUnavailable(UpdateFailed):
+    """Not sent: the circuit breaker is open after repeated failures."""
+
+
+def is_auth_error(status: int, body: str) -> bool:
+    """Return True if a failed response means the credentials are bad."""
+    if status in (401, 403):
+        return True
+    if status != 500:
+        return False
+    text = body.strip().strip('"').strip()
+    return any(message.fullmatch(text) for message in AUTH_ERROR_MESSAGES)
+
+
+def backoff_delay(failures: int, base: float = BREAKER_BASE, cap: float = BREAKER_MAX) -> float:
+    """Return a jittered exponential delay in seconds after failures failures.
+
+    "Equal jitter": between half and all of the exponential delay, so
+    clients that failed together don't all retry in the same second.
+    """
+    delay = min(cap, base * 2 ** max(0, failures - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """Stops sending requests to an API that keeps failing, probing for recovery.
+
+    Closed: requests go through. After FAILURE_THRESHOLD failures in a row
+    the breaker opens, and requests fail straight away (no HTTP) until
+    retry_at; the first request after that is let through as a probe,
+    closing the breaker if it succeeds and reopening it for longer if not.
+    An auth error opens it for good: nothing is sent until reset(), which
+    happens when the entry is set up again (e.g. after reauthentication).
+    """
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.retry_at: Optional[datetime.datetime] = None
+        self.auth_failed: Optional[str] = None
+        self._probing = False
+        # Outage metrics. An outage is from the first of the failures that
+        # opened the breaker until the next success.
+        self.outages = 0
+        self.outage_started: Optional[datetime.datetime] = None
+        self.last_outage_seconds: Optional[float] = None
+        self.total_outage_seconds = 0.0
+        self.short_circuited = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.auth_failed is not None or self.retry_at is not None
+
+    def check(self) -> None:
+        """Raise instead of sending a request, if the breaker is open."""
+        if self.auth_failed is not None:
+            self.short_circuited += 1
+            raise LocalvoltsAuthError(self.auth_failed)
+        if self.retry_at is None:
+            return
+        if self._probing or dt_util.utcnow() < self.retry_at:
+            self.short_circuited += 1
+            raise LocalvoltsUnavailable(
+                f"Localvolts API unavailable, retrying after {self.retry_at.isoformat()}"
+            )
+        self._probing = True
+
+    def record_success(self) -> None:
+        if self.retry_at is not None and self.outage_started is not None:
+            self.last_outage_seconds = (dt_util.utcnow() - self.outage_started).total_seconds()
+            self.total_outage_seconds += self.last_outage_seconds
+            _LOGGER.info(
+                "Localvolts API reachable again after %.0f seconds", self.last_outage_seconds
+            )
+        self.failures = 0
+        self.retry_at = None
+        self.outage_started = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        now = dt_util.utcnow()
+        self.failures += 1
+        self._probing = False
+        if self.outage_started is None:
+            self.outage_started = now
+        if self.failures >= FAILURE_THRESHOLD:
+            delay = backoff_delay(self.failures - FAILURE_THRESHOLD + 1)
+            if self.retry_at is None:
+                self.outages += 1
+                _LOGGER.warning(
+                    "Localvolts API failed %d times in a row; pausing requests for %.0f seconds",
+                    self.failures, delay,
+                )
+            self.retry_at = now + datetime.timedelta(seconds=delay)
+
+    def record_auth_failure(self, reason: str) -> None:
+        self.record_failure()
+        if self.retry_at is None:
+            self.outages += 1
+        self.auth_failed = reason
+
+    def reset(self) -> None:
+        """Forget an auth failure and any backoff, e.g. after new credentials."""
+        self.auth_failed = None
+        self.failures = 0
+        self.retry_at = None
+        self.outage_started = None
+        self._probing = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "open": self.is_open,
+            "auth_failed": self.auth_failed is not None,
+            "consecutive_failures": self.failures,
+            "retry_at": self.retry_at.isoformat() if self.retry_at else None,
+            "outages": self.outages,
+            "outage_started": (
+                self.outage_started.isoformat()
+                if self.outage_started and self.is_open else None
+            ),
+            "last_outage_seconds": self.last_outage_seconds,
+            "total_outage_seconds": round(self.total_outage_seconds, 1),
+            "short_circuited_requests": self.short_circuited,
+        }
@@ -0,0 +1,117 @@
+"""Adaptive poll scheduling for the Localvolts integration."""
+
+from __future__ import annotations
+
+import datetime
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+# A day of 5-minute intervals - enough to follow the API's daily rhythm
+# without one slow afternoon skewing the window for long.
+LAG_SAMPLES = 288
+MIN_LAG_SAMPLES = 3
+
+# Used until enough lag has been observed. The API usually publishes a new
+# interval 15-30 seconds after it starts.
+DEFAULT_EARLY_LAG = 10.0
+DEFAULT_LATE_LAG = 45.0
+
+# Start polling this far ahead of the earliest lag seen recently, and keep
+# polling densely until this far past the usual worst case.
+EARLY_MARGIN = 3.0
+LATE_MARGIN = 10.0
+
+DENSE_POLL_INTERVAL = 5.0
+BACKOFF_BASE = 10.0
+BACKOFF_MAX = 60.0
+
+
+class PublishLagTracker:
+    """Rolling distribution of when each interval's data gets published.
+
+    Samples are the seconds from an interval's start to its lastUpdate,
+    i.e. what the DataLag sensor reports.
+    """
+
+    def __init__(self, maxlen: int = LAG_SAMPLES) -> None:
+        self._samples: Deque[float] = deque(maxlen=maxlen)
+        self._window: Optional[Tuple[float, float]] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def samples(self) -> List[float]:
+        return list(self._samples)
+
+    def add(self, seconds: float) -> None:
+        """Record one observed publish lag."""
+        if seconds < 0:
+            return
+        self._samples.append(seconds)
+        self._window = None
+
+    def window(self) -> Tuple[float, float]:
+        """Return (start, end) seconds after interval start to poll densely."""
+        if self._window is None:
+            if len(self._samples) < MIN_LAG_SAMPLES:
+                self._window = (DEFAULT_EARLY_LAG, DEFAULT_LATE_LAG)
+            else:
+                ordered = sorted(self._samples)
+                early = _quantile(ordered, 0.05) - EARLY_MARGIN
+                late = _quantile(ordered, 0.95) + LATE_MARGIN
+                self._window = (max(0.0, early), late)
+        return self._window
+
+
+def _quantile(ordered: list, q: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def next_poll_time(
+    interval_end: Optional[datetime.datetime],
+    now: datetime.datetime,
+    lag: PublishLagTracker,
+    late_polls: int,
+) -> datetime.datetime:
+    """Return when a coordinator should next query the API.
+
+    interval_end is the end of the latest 'exp' interval we have, which is
+    also the start of the next one we're waiting for. Until that interval's
+    data is expected we sleep; inside the expected publish window we poll
+    every few seconds; once past it, late_polls (polls made after the
+    window closed) drives an exponential backoff so a stalled API isn't
+    hammered.
+    """
+    if interval_end is None:
+        if late_polls == 0:
+            return now
+        return now + datetime.timedelta(seconds=_backoff(late_polls))
+
+    early, late = lag.window()
+    window_start = interval_end + datetime.timedelta(seconds=early)
+    window_end = interval_end + datetime.timedelta(seconds=late)
+    if now < window_start:
+        return window_start
+    if now < window_end:
+        return min(now + datetime.timedelta(seconds=DENSE_POLL_INTERVAL), window_end)
+    if late_polls == 0:
+        # First poll since the data became overdue (e.g. right after a
+        # restart with a stale cache) - don't make it wait.
+        return now
+    return now + datetime.timedelta(seconds=_backoff(late_polls))
+
+
+def is_late(
+    interval_end: Optional[datetime.datetime],
+    now: datetime.datetime,
+    lag: PublishLagTracker,
+) -> bool:
+    """Return True if the next interval's data is overdue (or none is known)."""
+    if interval_end is None:
+        return True
+    return now >= interval_end + datetime.timedelta(seconds=lag.window()[1])
+
+
+def _backoff(late_polls: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, late_polls - 1))
@@ -3,29 +3,108 @@
 from __future__ import annotations
 
 import logging
+import math
+from abc import ABC, abstractmethod
 from typing import Any
-from datetime import datetime, timedelta
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfPower,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .const import DOMAIN
+from homeassistant.util import dt as dt_util
+from homeassistant.util.read_only_dict import ReadOnlyDict
+
+from .accumulator import (
+    KIND_COSTS,
+    KIND_EARNINGS,
+    KINDS,
+    PERIOD_INTERVAL,
+    PERIOD_TODAY,
+    PERIOD_TOTAL,
+    CostAccumulator,
+)
+from .const import (
+    ATTRIBUTE_PROFILE_FULL,
+    ATTRIBUTE_PROFILE_SUMMARY,
+    CONF_ATTRIBUTE_PROFILE,
+    CONF_POWER_ENTITY,
+    CONF_WINDOW_MINUTES,
+    COSTS_FLEX_UP,
+    DEFAULT_ATTRIBUTE_PROFILE,
+    DEFAULT_WINDOW_MINUTES,
+    DOMAIN,
+    EARNINGS_FLEX_UP,
+    SECTION_EXP,
+    SECTION_FORECAST_META,
+    SECTION_FORECAST_PRICES,
+)
 from .coordinator import LocalvoltsDataUpdateCoordinator
+from .forecast import ForecastStore, to_float
+from .metrics import (
+    COUNTER_API_CALLS,
+    COUNTER_FAILED_REQUESTS,
+    COUNTER_MALFORMED_RECORDS,
+    COUNTER_NOOP_POLLS,
+    COUNTER_PAYLOAD_BYTES,
+    COUNTER_SHORT_CIRCUITED_REQUESTS,
+    COUNTER_SKIPPED_ENTITY_UPDATES,
+    COUNTER_SUPPRESSED_NOTIFICATIONS,
+    SPAN_POLL,
+)
 
 MONETARY_CONVERSION_FACTOR = 100
 
-COSTS_FLEX_UP = "costsFlexUp"
-EARNINGS_FLEX_UP = "earningsFlexUp"
+# Upcoming intervals listed individually by the "summary" attribute profile
+SUMMARY_NEXT_INTERVALS = 12
+# The forecast attributes cover at most this many intervals (24h) however
+# long the configured horizon, so they stay within the recorder's 16KB
+# attribute limit; the window sensors and actions use the whole forecast.
+ATTRIBUTE_MAX_INTERVALS = 288
 
 _LOGGER = logging.getLogger(__name__)
 
+# API unit labels with a Home Assistant equivalent: (unit, device class,
+# state class). Anything else keeps the API's label (cents, c/kWh, g-CO2e)
+# as a plain measurement. Interval energy is neither a total nor a
+# measurement HA accepts for the energy class, hence no state class - the
+# long-term statistics (see statistics.py) cover that instead.
+FIELD_UNITS: dict[str, tuple[str, SensorDeviceClass | None, SensorStateClass | None]] = {
+    "kWh": (UnitOfEnergy.KILO_WATT_HOUR, SensorDeviceClass.ENERGY, None),
+    "kW": (UnitOfPower.KILO_WATT, SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "minutes": (UnitOfTime.MINUTES, SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT),
+    "%": (PERCENTAGE, None, SensorStateClass.MEASUREMENT),
+}
+# Fields that already have a dedicated sensor
+DEDICATED_FIELDS = frozenset({COSTS_FLEX_UP, EARNINGS_FLEX_UP})
+
+# Accumulated cost/earnings sensors: (unique_id suffix, name suffix) per period
+ACCUMULATED_PERIODS = {
+    PERIOD_INTERVAL: ("interval", "This Interval"),
+    PERIOD_TODAY: ("today", "Today"),
+    PERIOD_TOTAL: ("total", "Total"),
+}
+ACCUMULATED_KIND_NAMES = {KIND_COSTS: "Costs", KIND_EARNINGS: "Earnings"}
+
+# Coordinator contexts: which parts of the data each sensor shows, so it's
+# only written when one of them changes (see async_update_listeners).
+EXP_SECTIONS = frozenset({SECTION_EXP})
+PRICE_SECTIONS = frozenset({SECTION_FORECAST_PRICES})
+FORECAST_SECTIONS = frozenset({SECTION_FORECAST_PRICES, SECTION_FORECAST_META})
+
 
 def _interval_attrs(coordinator: LocalvoltsDataUpdateCoordinator) -> dict[str, Any]:
     """Return the common intervalEnd/lastUpdate attribute pair."""
@@ -37,6 +116,75 @@ def _interval_attrs(coordinator: LocalvoltsDataUpdateCoordinator) -> dict[str, A
     }
 
 
+def _rounded(values, digits: int = 3) -> list:
+    """Round a column for an attribute, with None where the API had no value."""
+    return [None if math.isnan(value) else round(value, digits) for value in values]
+
+
+def _compact_attrs(forecast: ForecastStore, count: int) -> dict[str, Any]:
+    """Return the first count start times and flex prices as parallel arrays.
+
+    Roughly 12KB for a 24h forecast, against ~400KB for every field of
+    every interval - small enough for the recorder to store.
+    """
+    return {
+        "start_times": list(forecast.start_iso[:count]),
+        COSTS_FLEX_UP: _rounded(forecast.columns.get(COSTS_FLEX_UP, ())[:count]),
+        EARNINGS_FLEX_UP: _rounded(forecast.columns.get(EARNINGS_FLEX_UP, ())[:count]),
+    }
+
+
+def _summary_attrs(forecast: ForecastStore, count: int) -> dict[str, Any]:
+    """Return min/max/mean of the flex prices plus the next few intervals."""
+    attributes: dict[str, Any] = {}
+    for field in (COSTS_FLEX_UP, EARNINGS_FLEX_UP):
+        values = [
+            value for value in forecast.columns.get(field, ())[:count] if not math.isnan(value)
+        ]
+        if values:
+            attributes[f"{field}_min"] = round(min(values), 3)
+            attributes[f"{field}_max"] = round(max(values), 3)
+            attributes[f"{field}_mean"] = round(sum(values) / len(values), 3)
+    upcoming = min(SUMMARY_NEXT_INTERVALS, len(forecast))
+    costs = _rounded(forecast.columns.get(COSTS_FLEX_UP, ())[:upcoming])
+    earnings = _rounded(forecast.columns.get(EARNINGS_FLEX_UP, ())[:upcoming])
+    attributes["next"] = [
+        {
+            "start_time": forecast.start_iso[index],
+            COSTS_FLEX_UP: costs[index] if costs else None,
+            EARNINGS_FLEX_UP: earnings[index] if earnings else None,
+        }
+        for index in range(upcoming)
+    ]
+    return attributes
+
+
+class GenerationCachedAttributesMixin(ABC):
+    """Build extra_state_attributes once per change to the data they show.
+
+    HA reads extra_state_attributes on every state write, diagnostics dump
+    and websocket snapshot, not just when the data changes. Subclasses
+    implement _build_attributes(); the result is frozen and served as-is
+    until the sections in the entity's coordinator context change (or,
+    without a context, until the coordinator processes a new response).
+    """
+
+    _attributes_generation: int | None = None
+    _attributes: ReadOnlyDict | None = None
+
+    @abstractmethod
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return the attributes for the coordinator's current data."""
+
+    @property
+    def extra_state_attributes(self):
+        generation = self.coordinator.section_generation(self.coordinator_context)
+        if self._attributes is None or self._attributes_generation != generation:
+            self._attributes = ReadOnlyDict(self._build_attributes())
+            self._attributes_generation = generation
+        return self._attributes
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -44,6 +192,7 @@ async def async_setup_entry(
 ) -> None:
     """Set up Localvolts sensors from a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    window_minutes = config_entry.options.get(CONF_WINDOW_MINUTES, DEFAULT_WINDOW_MINUTES)
 
     async_add_entities(
         [
@@ -51,16 +200,84 @@ async def async_setup_entry(
             LocalvoltsEarningsFlexUpSensor(coordinator),
             LocalvoltsDataLagSensor(coordinator),
             LocalvoltsIntervalEndSensor(coordinator),
-            LocalvoltsForecastCostsSensor(coordinator),
+            LocalvoltsForecastCostsSensor(
+                coordinator,
+                config_entry.options.get(CONF_ATTRIBUTE_PROFILE, DEFAULT_ATTRIBUTE_PROFILE),
+            ),
+            LocalvoltsCheapestImportWindowSensor(coordinator, window_minutes),
+            LocalvoltsBestExportWindowSensor(coordinator, window_minutes),
+            LocalvoltsCheapestImportIntervalsSensor(coordinator, window_minutes),
+            LocalvoltsForecastErrorSensor(coordinator),
+            LocalvoltsPollDurationSensor(coordinator),
+            LocalvoltsCounterSensor(coordinator, COUNTER_API_CALLS, "API Calls"),
+            LocalvoltsCounterSensor(coordinator, COUNTER_NOOP_POLLS, "No-op Polls"),
+            LocalvoltsCounterSensor(
+                coordinator, COUNTER_SUPPRESSED_NOTIFICATIONS, "Suppressed Notifications"
+            ),
+            LocalvoltsCounterSensor(
+                coordinator, COUNTER_SKIPPED_ENTITY_UPDATES, "Skipped Entity Updates"
+            ),
+            LocalvoltsCounterSensor(coordinator, COUNTER_MALFORMED_RECORDS, "Malformed Records"),
+            LocalvoltsCounterSensor(coordinator, COUNTER_FAILED_REQUESTS, "Failed Requests"),
+            LocalvoltsCounterSensor(
+                coordinator, COUNTER_SHORT_CIRCUITED_REQUESTS, "Short-circuited Requests"
+            ),
+            LocalvoltsCounterSensor(
+                coordinator,
+                COUNTER_PAYLOAD_BYTES,
+                "Payload Bytes",
+                UnitOfInformation.BYTES,
+                SensorDeviceClass.DATA_SIZE,
+            ),
         ]
     )
 
+    # One sensor per numeric field of the current interval. The fields
+    # aren't known until a record arrives (restored, or from the first
+    # poll), and could change with the API, so watch for new ones.
+    known_fields: set[str] = set(DEDICATED_FIELDS)
+    last_schema = None
+
+    @callback
+    def _async_add_field_sensors() -> None:
+        nonlocal last_schema
+        record = coordinator.interval_data
+        schema = getattr(record, "schema", None)
+        if schema is None or schema is last_schema:
+            return
+        last_schema = schema
+        new_fields = [field for field in schema.numeric_fields() if field not in known_fields]
+        if new_fields:
+            known_fields.update(new_fields)
+            async_add_entities(
+                LocalvoltsIntervalFieldSensor(coordinator, field, schema.unit_for(field))
+                for field in new_fields
+            )
+
+    _async_add_field_sensors()
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(_async_add_field_sensors, EXP_SECTIONS)
+    )
+
+    # Running costs and earnings, if a grid power sensor is configured
+    power_entity = config_entry.options.get(CONF_POWER_ENTITY)
+    if power_entity:
+        accumulator = CostAccumulator(hass, coordinator, power_entity)
+        await accumulator.async_restore()
+        # Unloading waits on the stop, which saves the totals
+        config_entry.async_on_unload(accumulator.async_start())
+        async_add_entities(
+            LocalvoltsAccumulatedSensor(accumulator, kind, period)
+            for kind in KINDS
+            for period in ACCUMULATED_PERIODS
+        )
+
 
 class LocalvoltsSensor(CoordinatorEntity, SensorEntity):
     """Representation of a generic Localvolts sensor."""
 
     def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, data_key: str) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, EXP_SECTIONS)
         self.data_key = data_key
         self._attr_should_poll = False
         self._last_value = None
@@ -115,7 +332,7 @@ class LocalvoltsDataLagSensor(CoordinatorEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.DURATION
 
     def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, EXP_SECTIONS)
         self._attr_name = "DataLag"
         self._attr_unique_id = f"{coordinator.nmi_id}_data_lag"
         self._attr_should_poll = False
@@ -131,13 +348,13 @@ class LocalvoltsDataLagSensor(CoordinatorEntity, SensorEntity):
         """Return basic interval attributes for data lag."""
         return _interval_attrs(self.coordinator)
 
-class LocalvoltsIntervalEndSensor(CoordinatorEntity, SensorEntity):
+class LocalvoltsIntervalEndSensor(GenerationCachedAttributesMixin, CoordinatorEntity, SensorEntity):
     """Sensor for monitoring the end time of the latest interval."""
 
     _attr_device_class = SensorDeviceClass.TIMESTAMP
 
     def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, EXP_SECTIONS)
         self._attr_name = "IntervalEnd"
         self._attr_unique_id = f"{coordinator.nmi_id}_interval_end"
         self._attr_should_poll = False
@@ -147,8 +364,7 @@ class LocalvoltsIntervalEndSensor(CoordinatorEntity, SensorEntity):
         """Return the interval end as a datetime object."""
         return self.coordinator.intervalEnd
 
-    @property
-    def extra_state_attributes(self):
+    def _build_attributes(self) -> dict[str, Any]:
         """Return every field the API returned for the current interval.
 
         Unlike the forecast sensor's list of ~287 intervals, this is a
@@ -159,67 +375,378 @@ class LocalvoltsIntervalEndSensor(CoordinatorEntity, SensorEntity):
         data = data.get("exp", data) or {}
         return dict(data)
 
-class LocalvoltsForecastCostsSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for monitoring forecasted costsFlexUp for the next 24 hours."""
+class LocalvoltsForecastCostsSensor(GenerationCachedAttributesMixin, CoordinatorEntity, SensorEntity):
+    """Sensor for monitoring forecasted costsFlexUp over the forecast horizon."""
 
     _attr_native_unit_of_measurement = "c/kWh"
     _attr_device_class = SensorDeviceClass.MONETARY
     _attr_name = "Forecasted Costs Flex Up"
 
-    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
-        super().__init__(coordinator)
+    def __init__(
+        self,
+        coordinator: LocalvoltsDataUpdateCoordinator,
+        profile: str = DEFAULT_ATTRIBUTE_PROFILE,
+    ) -> None:
+        # Only the full profile shows more than the times and flex prices
+        super().__init__(
+            coordinator,
+            FORECAST_SECTIONS if profile == ATTRIBUTE_PROFILE_FULL else PRICE_SECTIONS,
+        )
+        self._profile = profile
         self._attr_name = "Forecasted Costs Flex Up"
         self._attr_unique_id = f"{coordinator.nmi_id}_forecast_costs_flex_up"
         self._attr_should_poll = False
 
+    @property
+    def available(self) -> bool:
+        """Stay available while the forecast still has upcoming intervals.
+
+        The forecast is kept (and restored across restarts) through an API
+        outage, with intervals dropping out as they end, so it's still
+        usable even while refreshes are failing.
+        """
+        return super().available or bool(self.coordinator.forecast)
+
     @property
     def native_value(self):
         """Return the state of the sensor (cents per kWh)."""
-        if not self.coordinator.forecast_data:
-            return None
-
-        try:
-            # Get the next upcoming forecast interval (soonest intervalEnd)
-            next_forecast = min(self.coordinator.forecast_data,
-                                key=lambda x: x["intervalEnd"])
-        except (KeyError, TypeError) as err:
-            _LOGGER.debug("Could not determine next forecast interval: %s", err)
+        # The store is sorted by intervalEnd, so the next upcoming forecast
+        # interval is simply the first row.
+        forecast = self.coordinator.forecast
+        if not forecast:
             return None
 
-        value = next_forecast.get("costsFlexUp")
+        value = forecast.value(COSTS_FLEX_UP, 0)
         if value is not None:
             return round(value, 3)
         return None
 
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return the forecast in the configured attribute profile."""
+        attributes = {}
+        forecast_store = self.coordinator.forecast
+        if forecast_store:
+            count = min(len(forecast_store), ATTRIBUTE_MAX_INTERVALS)
+            if self._profile == ATTRIBUTE_PROFILE_FULL:
+                # Views onto the coordinator's records, not copies of them
+                attributes["forecast"] = tuple(
+                    forecast_store.detail(index) for index in range(count)
+                )
+            elif self._profile == ATTRIBUTE_PROFILE_SUMMARY:
+                attributes.update(_summary_attrs(forecast_store, count))
+            else:
+                attributes.update(_compact_attrs(forecast_store, count))
+            # Every interval held, not just the ones in the attributes
+            attributes["forecastcount"] = len(forecast_store)
+            if self.coordinator.stale:
+                # Restored from the cache at startup, not yet refreshed
+                attributes["stale"] = True
+
+        return attributes
+
+
+class LocalvoltsForecastWindowSensor(GenerationCachedAttributesMixin, CoordinatorEntity, SensorEntity):
+    """Base for sensors answering "when is the best time" over the forecast.
+
+    The analysis runs once per forecast (see analytics.py), not per state
+    write or template render; this only picks the answer out.
+    """
+
+    _attr_native_unit_of_measurement = "c/kWh"
+    _attr_device_class = SensorDeviceClass.MONETARY
+
+    def __init__(
+        self,
+        coordinator: LocalvoltsDataUpdateCoordinator,
+        field: str,
+        lowest: bool,
+        window_minutes: int,
+    ) -> None:
+        super().__init__(coordinator, PRICE_SECTIONS)
+        self._field = field
+        self._lowest = lowest
+        self._window_minutes = window_minutes
+        self._attr_should_poll = False
+
+    @property
+    def available(self) -> bool:
+        """Follow the forecast sensor: available while there's a forecast."""
+        return super().available or bool(self.coordinator.forecast)
+
+    def _window(self) -> int | None:
+        analytics = self.coordinator.analytics
+        return analytics.best_window(
+            self._field, analytics.intervals_for(self._window_minutes), self._lowest
+        )
+
+    @property
+    def native_value(self):
+        """Return the window's mean price (cents per kWh)."""
+        index = self._window()
+        if index is None:
+            return None
+        analytics = self.coordinator.analytics
+        intervals = analytics.intervals_for(self._window_minutes)
+        return round(analytics.window_means(self._field, intervals)[index], 3)
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return when the window starts and ends."""
+        index = self._window()
+        if index is None:
+            return {}
+        analytics = self.coordinator.analytics
+        entry = analytics.window_entry(
+            self._field, index, analytics.intervals_for(self._window_minutes)
+        )
+        del entry[self._field]
+        return entry
+
+
+class LocalvoltsCheapestImportWindowSensor(LocalvoltsForecastWindowSensor):
+    """Sensor for the cheapest run of consecutive intervals to import in."""
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, window_minutes: int) -> None:
+        super().__init__(coordinator, COSTS_FLEX_UP, True, window_minutes)
+        self._attr_name = "Cheapest Import Window"
+        self._attr_unique_id = f"{coordinator.nmi_id}_cheapest_import_window"
+
+
+class LocalvoltsBestExportWindowSensor(LocalvoltsForecastWindowSensor):
+    """Sensor for the best-paid run of consecutive intervals to export in."""
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, window_minutes: int) -> None:
+        super().__init__(coordinator, EARNINGS_FLEX_UP, False, window_minutes)
+        self._attr_name = "Best Export Window"
+        self._attr_unique_id = f"{coordinator.nmi_id}_best_export_window"
+
+
+class LocalvoltsCheapestImportIntervalsSensor(LocalvoltsForecastWindowSensor):
+    """Sensor for the cheapest intervals to import in, not necessarily consecutive.
+
+    Takes as many intervals as the window sensors cover, e.g. the twelve
+    cheapest 5-minute intervals for a 60 minute window - for loads that
+    can be switched on and off rather than needing one continuous run.
+    """
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator, window_minutes: int) -> None:
+        super().__init__(coordinator, COSTS_FLEX_UP, True, window_minutes)
+        self._attr_name = "Cheapest Import Intervals"
+        self._attr_unique_id = f"{coordinator.nmi_id}_cheapest_import_intervals"
+
+    def _top(self) -> list[int]:
+        analytics = self.coordinator.analytics
+        return analytics.top(
+            self._field, analytics.intervals_for(self._window_minutes), self._lowest
+        )
+
+    @property
+    def native_value(self):
+        """Return the mean price of the selected intervals (cents per kWh)."""
+        indices = self._top()
+        if not indices:
+            return None
+        column = self.coordinator.forecast.columns[self._field]
+        return round(sum(column[index] for index in indices) / len(indices), 3)
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return the selected intervals' times and prices, in time order."""
+        forecast = self.coordinator.forecast
+        return {
+            "intervals": [
+                {
+                    "start_time": forecast.start_iso[index],
+                    "end_time": forecast.end_iso[index],
+                    self._field: round(forecast.columns[self._field][index], 3),
+                }
+                for index in self._top()
+            ]
+        }
+
+
+class LocalvoltsForecastErrorSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for how far off the costsFlexUp forecast has been lately.
+
+    The state is the mean absolute error over every lead time; attributes
+    break it down by lead time, for both flex prices. Updated as each
+    interval's final data arrives (see vintages.py).
+    """
+
+    _attr_native_unit_of_measurement = "c/kWh"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
+        super().__init__(coordinator, EXP_SECTIONS)
+        self._attr_name = "Forecast Error"
+        self._attr_unique_id = f"{coordinator.nmi_id}_forecast_error"
+        self._attr_should_poll = False
+
+    @property
+    def native_value(self):
+        """Return the costsFlexUp forecast's mean absolute error."""
+        return self.coordinator.vintages.mean_absolute_error(COSTS_FLEX_UP)
+
     @property
     def extra_state_attributes(self):
+        """Return MAE, bias and sample count per field and lead time."""
+        vintages = self.coordinator.vintages
         attributes = {}
-        forecast = []
-        if self.coordinator.forecast_data:
-            for fcast in self.coordinator.forecast_data:
-                try:
-                    interval_end_dt = datetime.fromisoformat(fcast["intervalEnd"].replace("Z", "+00:00"))
-                    duration = int(fcast.get("intervalDuration", 5))
-                    start_time_dt = interval_end_dt - timedelta(minutes=duration)
-                    # Carry through every field the API returned for this interval
-                    # (not just a hand-picked subset), so nothing the API exposes
-                    # is silently dropped. duration/start_time/end_time are added
-                    # as convenience fields on top of the raw data.
-                    entry = dict(fcast)
-                    entry["duration"] = duration
-                    entry["start_time"] = start_time_dt.isoformat()
-                    entry["end_time"] = interval_end_dt.isoformat()
-                    if "earningsFlexUp" in entry:
-                        entry["earningsFlexUp"] = round(entry["earningsFlexUp"], 5)
-                    if "costsFlexUp" in entry:
-                        entry["costsFlexUp"] = round(entry["costsFlexUp"], 5)
-                    forecast.append(entry)
-                except Exception as err:
-                    _LOGGER.debug("Skipping unparsable forecast entry %s: %s", fcast, err)
-                    continue
-            attributes["forecast"] = forecast
-            attributes["forecastcount"] = len(forecast)
+        for field in (COSTS_FLEX_UP, EARNINGS_FLEX_UP):
+            for lead, summary in vintages.error(field).items():
+                for key, value in summary.items():
+                    attributes[f"{field}_{lead}_{key}"] = value
+        return attributes
+
+
+class LocalvoltsPollDurationSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the p95 poll time, with a breakdown by stage.
+
+    Disabled by default. Like every sensor here it only updates when the
+    coordinator notifies, i.e. when the data changes, not on every poll.
+    """
+
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: LocalvoltsDataUpdateCoordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_name = "Poll Duration"
+        self._attr_unique_id = f"{coordinator.nmi_id}_poll_duration"
+        self._attr_should_poll = False
+
+    @property
+    def native_value(self):
+        """Return the 95th percentile poll duration in milliseconds."""
+        return self.coordinator.metrics.summary(SPAN_POLL).get("p95_ms")
 
+    @property
+    def extra_state_attributes(self):
+        """Return p50/p95/max for every timed stage."""
+        attributes = {}
+        for span, summary in self.coordinator.metrics.as_dict()["spans"].items():
+            for key, value in summary.items():
+                attributes[f"{span}_{key}"] = value
         return attributes
 
 
+class LocalvoltsCounterSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for one of the coordinator's counters (see metrics.py)."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: LocalvoltsDataUpdateCoordinator,
+        counter: str,
+        name: str,
+        unit: str | None = None,
+        device_class: SensorDeviceClass | None = None,
+    ) -> None:
+        super().__init__(coordinator)
+        self._counter = counter
+        self._attr_name = name
+        self._attr_unique_id = f"{coordinator.nmi_id}_{counter}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_should_poll = False
+
+    @property
+    def native_value(self):
+        """Return the count since the integration was set up."""
+        return self.coordinator.metrics.counters.get(self._counter, 0)
+
+
+class LocalvoltsIntervalFieldSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for one numeric field of the current interval, e.g. importsAll.
+
+    Created for every numeric field the API sends, disabled by default.
+    Reads straight from the coordinator's typed record, so enabling a few
+    of these is cheaper than templates over the IntervalEnd attributes,
+    which re-render on every one of its state changes.
+    """
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: LocalvoltsDataUpdateCoordinator,
+        field: str,
+        unit: str | None,
+    ) -> None:
+        super().__init__(coordinator, EXP_SECTIONS)
+        self._field = field
+        self._attr_name = field
+        self._attr_unique_id = f"{coordinator.nmi_id}_{field}"
+        self._attr_should_poll = False
+        if unit in FIELD_UNITS:
+            unit, self._attr_device_class, self._attr_state_class = FIELD_UNITS[unit]
+        else:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = unit
+
+    @property
+    def native_value(self):
+        """Return the field's value, None if the API sent a non-number ('N/A')."""
+        value = to_float(self.coordinator.interval_data.get(self._field))
+        return None if math.isnan(value) else value
+
+
+class LocalvoltsAccumulatedSensor(SensorEntity):
+    """Costs or earnings from the power sensor over one period ($).
+
+    Kept by a CostAccumulator (see accumulator.py), which calls back only
+    when this sensor's kind changed, so an importing household's power
+    updates never rewrite the earnings sensors and vice versa. This
+    Interval resets at each intervalEnd, Today at local midnight.
+    """
+
+    _attr_native_unit_of_measurement = "$"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_should_poll = False
+
+    def __init__(self, accumulator: CostAccumulator, kind: str, period: int) -> None:
+        self._accumulator = accumulator
+        self._kind = kind
+        self._period = period
+        key, name = ACCUMULATED_PERIODS[period]
+        self._attr_name = f"{ACCUMULATED_KIND_NAMES[kind]} {name}"
+        self._attr_unique_id = f"{accumulator.coordinator.nmi_id}_{kind}_{key}"
+        # Five-minute totals would only clutter the long-term statistics
+        if period != PERIOD_INTERVAL:
+            self._attr_state_class = SensorStateClass.TOTAL
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._accumulator.async_add_listener(self._kind, self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self):
+        """Return the accumulated amount in dollars."""
+        cents = self._accumulator.totals[self._kind][self._period]
+        return round(cents / MONETARY_CONVERSION_FACTOR, 4)
+
+    @property
+    def last_reset(self):
+        """Return when Today last started over."""
+        if self._period == PERIOD_TODAY and self._accumulator.day is not None:
+            return dt_util.start_of_local_day(self._accumulator.day)
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the interval This Interval covers, and the power sensor."""
+        attributes: dict[str, Any] = {"power_entity": self._accumulator.power_entity_id}
+        if self._period == PERIOD_INTERVAL:
+            attributes["start_time"] = dt_util.utc_from_timestamp(
+                self._accumulator.interval_start
+            ).isoformat()
+            attributes["end_time"] = dt_util.utc_from_timestamp(
+                self._accumulator.interval_end
+            ).isoformat()
+        return attributes
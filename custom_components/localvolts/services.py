@@ -0,0 +1,212 @@
+"""Services for the Localvolts integration."""
+
+from __future__ import annotations
+
+import logging
+import math
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import COSTS_FLEX_UP, DOMAIN, EARNINGS_FLEX_UP
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_GET_PRICES = "get_prices"
+SERVICE_GET_FORECAST = "get_forecast"
+SERVICE_FIND_WINDOW = "find_window"
+SERVICE_GET_FORECAST_HISTORY = "get_forecast_history"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_DURATION = "duration"
+ATTR_DEADLINE = "deadline"
+ATTR_DIRECTION = "direction"
+
+DIRECTION_IMPORT = "import"
+DIRECTION_EXPORT = "export"
+
+GET_PRICES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+GET_FORECAST_SCHEMA = GET_PRICES_SCHEMA
+GET_FORECAST_HISTORY_SCHEMA = GET_PRICES_SCHEMA
+FIND_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_DURATION): cv.positive_time_period,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_DEADLINE): cv.datetime,
+        vol.Optional(ATTR_DIRECTION, default=DIRECTION_IMPORT): vol.In(
+            [DIRECTION_IMPORT, DIRECTION_EXPORT]
+        ),
+    }
+)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall):
+    """Return the coordinator a service call targets.
+
+    config_entry_id may be left out when only one NMI is configured.
+    """
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None:
+        if len(coordinators) != 1:
+            raise ServiceValidationError(
+                "config_entry_id is required when more than one NMI is configured"
+            )
+        return next(iter(coordinators.values()))
+    coordinator = coordinators.get(entry_id)
+    if coordinator is None:
+        raise ServiceValidationError(f"Unknown Localvolts config entry: {entry_id}")
+    return coordinator
+
+
+async def _async_get_prices(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return costs/earnings at one point in time, or across a time range.
+
+    Answered from the coordinator's bisect index, so automations can look
+    up a price without pulling the whole forecast attribute through the
+    state machine and scanning it in a template.
+    """
+    coordinator = _get_coordinator(hass, call)
+    start = dt_util.as_utc(call.data.get(ATTR_START) or dt_util.utcnow())
+    end = call.data.get(ATTR_END)
+    if end is None:
+        entry = coordinator.price_at(start)
+        return {"prices": [entry] if entry is not None else []}
+
+    end = dt_util.as_utc(end)
+    if end <= start:
+        raise ServiceValidationError("end must be after start")
+    return {"prices": coordinator.price_range(start, end)}
+
+
+async def _async_get_forecast(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return every field of the forecast intervals, optionally within a range.
+
+    This is the full per-interval detail the forecast sensor used to carry
+    as its attribute; only fetched when something actually asks for it.
+    """
+    coordinator = _get_coordinator(hass, call)
+    forecast = coordinator.forecast
+    start = call.data.get(ATTR_START)
+    end = call.data.get(ATTR_END)
+    indices = forecast.indices_between(
+        dt_util.as_utc(start).timestamp() if start else float("-inf"),
+        dt_util.as_utc(end).timestamp() if end else float("inf"),
+    )
+    return {"forecast": [forecast.detail_entry(index) for index in indices]}
+
+
+async def _async_find_window(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the cheapest (import) or best-paid (export) run of intervals.
+
+    The run is `duration` long, starts no earlier than the interval in
+    progress at `start` and ends by `deadline`. Window means come from the
+    per-forecast analytics cache, so repeated calls only rescan that range.
+    """
+    coordinator = _get_coordinator(hass, call)
+    analytics = coordinator.analytics
+    importing = call.data[ATTR_DIRECTION] == DIRECTION_IMPORT
+    field = COSTS_FLEX_UP if importing else EARNINGS_FLEX_UP
+    intervals = analytics.intervals_for(call.data[ATTR_DURATION].total_seconds() / 60)
+    start = dt_util.as_utc(call.data.get(ATTR_START) or dt_util.utcnow())
+    deadline = call.data.get(ATTR_DEADLINE)
+    if deadline is not None:
+        deadline = dt_util.as_utc(deadline)
+        if deadline <= start:
+            raise ServiceValidationError("deadline must be after start")
+
+    index = analytics.best_window(
+        field,
+        intervals,
+        lowest=importing,
+        start=start.timestamp(),
+        deadline=deadline.timestamp() if deadline else None,
+    )
+    if index is None:
+        return {"window": None, "prices": []}
+    forecast = coordinator.forecast
+    window = analytics.window_entry(field, index, intervals)
+    window[field] = round(window[field], 5)
+    return {
+        "window": window,
+        "prices": [forecast.price_entry(i) for i in range(index, index + intervals)],
+    }
+
+
+async def _async_get_forecast_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return how the forecast changed for upcoming intervals, and its error.
+
+    history lists the kept forecasts of each interval ending between start
+    and end, longest lead first. error is the bias and mean absolute error
+    (forecast minus actual, c/kWh) by lead time, over the last day of
+    intervals scored.
+    """
+    coordinator = _get_coordinator(hass, call)
+    vintages = coordinator.vintages
+    start = call.data.get(ATTR_START)
+    end = call.data.get(ATTR_END)
+    return {
+        "history": vintages.history(
+            dt_util.as_utc(start).timestamp() if start else -math.inf,
+            dt_util.as_utc(end).timestamp() if end else math.inf,
+        ),
+        "error": {field: vintages.error(field) for field in (COSTS_FLEX_UP, EARNINGS_FLEX_UP)},
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_get_prices(call: ServiceCall) -> ServiceResponse:
+        return await _async_get_prices(hass, call)
+
+    async def async_get_forecast(call: ServiceCall) -> ServiceResponse:
+        return await _async_get_forecast(hass, call)
+
+    async def async_find_window(call: ServiceCall) -> ServiceResponse:
+        return await _async_find_window(hass, call)
+
+    async def async_get_forecast_history(call: ServiceCall) -> ServiceResponse:
+        return await _async_get_forecast_history(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICES,
+        async_get_prices,
+        schema=GET_PRICES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        async_get_forecast,
+        schema=GET_FORECAST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_WINDOW,
+        async_find_window,
+        schema=FIND_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST_HISTORY,
+        async_get_forecast_history,
+        schema=GET_FORECAST_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
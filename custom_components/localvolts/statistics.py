@@ -0,0 +1,227 @@
+"""Long-term statistics for the Localvolts integration."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import math
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .forecast import DEFAULT_INTERVAL_MINUTES, parse_utc, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+# Write an hour that's still missing intervals once it's this far in the
+# past; by then the data isn't coming (e.g. Home Assistant was down).
+INCOMPLETE_HOUR_GRACE = 2 * HOUR
+
+
+class IntervalStatistic(NamedTuple):
+    """One per-interval API field tracked as an hourly external statistic."""
+
+    field: str
+    key: str
+    name: str
+    # Divides the API value; costs/earnings come in cents
+    scale: float = 1.0
+    # None: use the currency configured in Home Assistant
+    unit: Optional[str] = "kWh"
+
+
+INTERVAL_STATISTICS = (
+    IntervalStatistic("costsAll", "costs", "Costs", 100.0, None),
+    IntervalStatistic("earningsAll", "earnings", "Earnings", 100.0, None),
+    IntervalStatistic("importsAll", "imports", "Imports"),
+    IntervalStatistic("exportsAll", "exports", "Exports"),
+    IntervalStatistic("importsAllEmissions", "import_emissions", "Import emissions", unit="g"),
+    IntervalStatistic("exportsAllEmissions", "export_emissions", "Export emissions", unit="g"),
+)
+
+
+def statistic_id(nmi_id: str, statistic: IntervalStatistic) -> str:
+    return f"{DOMAIN}:{nmi_id.lower()}_{statistic.key}"
+
+
+class IntervalStatistics:
+    """Batches each NMI's 'exp' intervals into hourly external statistics.
+
+    Intervals are held, keyed by their intervalEnd so a revised interval
+    replaces rather than adds to the earlier copy, until every interval of
+    an hour is in. The hour is then written to every statistic in one
+    recorder job per statistic, with the running sum carried on from the
+    last hour written. This is independent of the sensors' state history,
+    so it's unaffected by excluding intervalEnd from the recorder.
+    """
+
+    def __init__(self, hass: HomeAssistant, nmi_id: str) -> None:
+        self.hass = hass
+        self.nmi_id = nmi_id
+        # intervalEnd epoch -> (interval start epoch, value per statistic)
+        self._pending: Dict[float, tuple] = {}
+        # End of the last hour written, and each statistic's sum by then;
+        # loaded from the recorder on the first write.
+        self._written_until: Optional[float] = None
+        self._sums: Optional[Dict[str, float]] = None
+        self._lock = asyncio.Lock()
+        # Set while a backfill is catching up on older hours, which have to
+        # be written before anything the live poll adds after them.
+        self.backfilling = False
+        self.hours_written = 0
+
+    @property
+    def written_until(self) -> Optional[float]:
+        return self._written_until
+
+    def add(self, record: Mapping[str, Any]) -> bool:
+        """Hold one interval for the next write. Returns False if ignored."""
+        if "recorder" not in self.hass.config.components:
+            # Nothing would ever write them out
+            return False
+        try:
+            end = parse_utc(record["intervalEnd"]).timestamp()
+            duration = int(record.get("intervalDuration", DEFAULT_INTERVAL_MINUTES))
+        except (KeyError, ValueError, TypeError, AttributeError):
+            return False
+        if self._written_until is not None and end <= self._written_until:
+            return False
+        self._pending[end] = (
+            end - duration * 60,
+            tuple(to_float(record.get(statistic.field)) for statistic in INTERVAL_STATISTICS),
+        )
+        return True
+
+    def _ready_hours(self, now: float) -> Dict[float, List[tuple]]:
+        """Group pending intervals into hours, keeping only the writable ones.
+
+        An hour is writable once its intervals cover the whole hour, or once
+        it's INCOMPLETE_HOUR_GRACE old. Hours go out in order, so the first
+        hour that isn't writable holds back every hour after it.
+        """
+        hours: Dict[float, List[tuple]] = {}
+        for end in sorted(self._pending):
+            start, values = self._pending[end]
+            hours.setdefault(start - start % HOUR, []).append((end, start, values))
+        ready: Dict[float, List[tuple]] = {}
+        for hour, intervals in hours.items():
+            covered = sum(end - start for end, start, _values in intervals)
+            if covered < HOUR and now < hour + HOUR + INCOMPLETE_HOUR_GRACE:
+                break
+            ready[hour] = intervals
+        return ready
+
+    def to_store(self) -> List[list]:
+        """Return the pending intervals for the warm-start cache."""
+        return [[end, start, list(values)] for end, (start, values) in self._pending.items()]
+
+    def restore(self, stored: Optional[List[list]]) -> None:
+        for end, start, values in stored or ():
+            if len(values) == len(INTERVAL_STATISTICS):
+                self._pending[float(end)] = (float(start), tuple(to_float(v) for v in values))
+
+    async def _async_load_sums(self) -> None:
+        """Pick the running sums up from the last hour already recorded."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        instance = get_instance(self.hass)
+        sums: Dict[str, float] = {}
+        written_until: Optional[float] = None
+        for statistic in INTERVAL_STATISTICS:
+            sid = statistic_id(self.nmi_id, statistic)
+            last = await instance.async_add_executor_job(
+                get_last_statistics, self.hass, 1, sid, True, {"sum"}
+            )
+            rows = last.get(sid)
+            if not rows:
+                continue
+            sums[sid] = rows[0].get("sum") or 0.0
+            end = _timestamp(rows[0]["start"]) + HOUR
+            written_until = end if written_until is None else min(written_until, end)
+        self._sums = sums
+        self._written_until = written_until
+        if written_until is not None:
+            for end in [end for end in self._pending if end <= written_until]:
+                del self._pending[end]
+
+    async def async_load_sums(self) -> None:
+        """Load the running sums and written_until, if not yet loaded, writing nothing."""
+        if "recorder" not in self.hass.config.components:
+            return
+        async with self._lock:
+            if self._sums is None:
+                await self._async_load_sums()
+
+    async def async_flush(self, now: Optional[float] = None, backfill: bool = False) -> int:
+        """Write every hour that's ready. Returns the number of hours written.
+
+        While a backfill is running only it writes (backfill=True); the
+        live poll's intervals wait in the pending hours until it's done.
+        """
+        if "recorder" not in self.hass.config.components:
+            return 0
+        if self.backfilling and not backfill:
+            return 0
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        async with self._lock:
+            if self._sums is None:
+                await self._async_load_sums()
+            if now is None:
+                now = dt_util.utcnow().timestamp()
+            ready = self._ready_hours(now)
+            if not ready:
+                return 0
+
+            for position, statistic in enumerate(INTERVAL_STATISTICS):
+                sid = statistic_id(self.nmi_id, statistic)
+                running = self._sums.get(sid, 0.0)
+                rows = []
+                for hour, intervals in ready.items():
+                    total = math.fsum(
+                        values[position] for _end, _start, values in intervals
+                        if not math.isnan(values[position])
+                    ) / statistic.scale
+                    running += total
+                    rows.append({
+                        "start": datetime.datetime.fromtimestamp(hour, datetime.timezone.utc),
+                        "state": total,
+                        "sum": running,
+                    })
+                metadata = {
+                    "has_mean": False,
+                    "has_sum": True,
+                    "name": f"Localvolts {self.nmi_id} {statistic.name.lower()}",
+                    "source": DOMAIN,
+                    "statistic_id": sid,
+                    "unit_of_measurement": statistic.unit or self.hass.config.currency,
+                }
+                try:
+                    async_add_external_statistics(self.hass, metadata, rows)
+                except HomeAssistantError as err:
+                    _LOGGER.error("Failed to write Localvolts statistic %s: %s", sid, err)
+                    return 0
+                self._sums[sid] = running
+
+            self._written_until = max(ready) + HOUR
+            for end in [end for end in self._pending if end <= self._written_until]:
+                del self._pending[end]
+            self.hours_written += len(ready)
+            _LOGGER.debug(
+                "Wrote %d hour(s) of Localvolts statistics for NMI %s", len(ready), self.nmi_id
+            )
+            return len(ready)
+
+
+def _timestamp(value: Any) -> float:
+    """Return a statistics row's start as an epoch (datetime in older HA)."""
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
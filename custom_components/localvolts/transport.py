@@ -0,0 +1,205 @@
+"""How Localvolts API requests are sent, recorded and replayed."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import gzip
+import json
+import logging
+import pathlib
+from bisect import bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Under the HA config directory, one subdirectory per NMI
+RECORDINGS_DIR = "localvolts_recordings"
+# Daily files older than this are deleted as new days start
+RECORDING_RETENTION_DAYS = 7
+
+# Replayed requests are matched to recordings of the same kind: the
+# current interval (a window this long or less) or a forecast/history one.
+CURRENT_WINDOW = datetime.timedelta(minutes=5)
+
+# What a recorded request failed with, instead of a status and body
+ERROR_TIMEOUT = "timeout"
+ERROR_CLIENT = "client_error"
+
+
+class HttpTransport:
+    """Sends interval requests to the live API."""
+
+    def __init__(self, hass: HomeAssistant, url: str) -> None:
+        self.hass = hass
+        self.url = url
+
+    async def request(
+        self, params: Dict[str, str], headers: Dict[str, str], timeout: float
+    ) -> Tuple[int, bytes]:
+        """Return the status and body of one request.
+
+        Raises aiohttp.ClientError or asyncio.TimeoutError if there's no
+        response within timeout seconds.
+        """
+        session = async_get_clientsession(self.hass)
+        async with session.get(
+            self.url,
+            params=params,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            return response.status, await response.read()
+
+
+def _recording_path(directory: pathlib.Path, when: datetime.datetime) -> pathlib.Path:
+    return directory / f"{when.date().isoformat()}.jsonl.gz"
+
+
+class ResponseRecorder:
+    """Writes every API response for one NMI to disk, for replay later.
+
+    One gzipped JSON-lines file per UTC day, each line a request's time,
+    window and either its status and body or how it failed. Lines are
+    queued from the event loop and appended in the executor, a gzip member
+    per batch, so recording never blocks a poll.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: pathlib.Path) -> None:
+        self.hass = hass
+        self.directory = directory
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._day: Optional[datetime.date] = None
+
+    @callback
+    def record(
+        self,
+        params: Dict[str, str],
+        status: Optional[int] = None,
+        body: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Queue one request's outcome to be written."""
+        line: Dict[str, Any] = {
+            "time": dt_util.utcnow().isoformat(),
+            "from": params["from"],
+            "to": params["to"],
+        }
+        if error is not None:
+            line["error"] = error
+        else:
+            line["status"] = status
+            line["body"] = (body or b"").decode("utf-8", "replace")
+        self._pending.append(line)
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._async_write_pending(), "Localvolts response recorder"
+            )
+
+    async def async_flush(self) -> None:
+        """Wait until everything queued so far has been written."""
+        if self._task is not None:
+            await self._task
+
+    async def _async_write_pending(self) -> None:
+        try:
+            while self._pending:
+                lines, self._pending = self._pending, []
+                await self.hass.async_add_executor_job(self._write, lines)
+        except OSError as err:
+            _LOGGER.warning("Could not write Localvolts recording: %s", err)
+        finally:
+            self._task = None
+
+    def _write(self, lines: List[Dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        by_day: Dict[pathlib.Path, List[str]] = {}
+        for line in lines:
+            path = _recording_path(self.directory, datetime.datetime.fromisoformat(line["time"]))
+            by_day.setdefault(path, []).append(json.dumps(line, separators=(",", ":")))
+        for path, day_lines in by_day.items():
+            with gzip.open(path, "at", encoding="utf-8") as file:
+                file.write("\n".join(day_lines) + "\n")
+        today = dt_util.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self._prune(today)
+
+    def _prune(self, today: datetime.date) -> None:
+        cutoff = (today - datetime.timedelta(days=RECORDING_RETENTION_DAYS)).isoformat()
+        for path in self.directory.glob("*.jsonl.gz"):
+            if path.name[:10] < cutoff:
+                path.unlink(missing_ok=True)
+
+
+def read_recordings(directory: pathlib.Path) -> Iterator[Dict[str, Any]]:
+    """Yield every recorded request under directory, oldest day first."""
+    for path in sorted(directory.glob("*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _is_current(params: Dict[str, str]) -> bool:
+    start = datetime.datetime.fromisoformat(params["from"].replace("Z", "+00:00"))
+    end = datetime.datetime.fromisoformat(params["to"].replace("Z", "+00:00"))
+    return end - start <= CURRENT_WINDOW
+
+
+class ReplayTransport:
+    """Answers interval requests from recorded responses instead of the API.
+
+    Meant to run under a simulated clock (see benchmarks/replay.py): each
+    request gets the latest response of the same kind - current interval,
+    or forecast/history - recorded at or before the current (simulated)
+    time, so late data, malformed records and errors come back at the
+    point in the day they originally did. Recorded failures are raised
+    again as the same exceptions HttpTransport raises.
+    """
+
+    def __init__(self, recordings: Iterator[Dict[str, Any]]) -> None:
+        self._times: Dict[bool, List[float]] = {True: [], False: []}
+        self._lines: Dict[bool, List[Dict[str, Any]]] = {True: [], False: []}
+        for line in sorted(recordings, key=lambda line: line["time"]):
+            current = _is_current(line)
+            self._times[current].append(datetime.datetime.fromisoformat(line["time"]).timestamp())
+            self._lines[current].append(line)
+        self.requests = 0
+        self.unanswered = 0
+
+    @property
+    def start(self) -> Optional[datetime.datetime]:
+        """When the first recorded request was made, if any."""
+        times = [times[0] for times in self._times.values() if times]
+        return dt_util.utc_from_timestamp(min(times)) if times else None
+
+    @property
+    def end(self) -> Optional[datetime.datetime]:
+        """When the last recorded request was made, if any."""
+        times = [times[-1] for times in self._times.values() if times]
+        return dt_util.utc_from_timestamp(max(times)) if times else None
+
+    async def request(
+        self, params: Dict[str, str], headers: Dict[str, str], timeout: float
+    ) -> Tuple[int, bytes]:
+        self.requests += 1
+        current = _is_current(params)
+        index = bisect_right(self._times[current], dt_util.utcnow().timestamp()) - 1
+        if index < 0:
+            # Nothing recorded yet at this point in the replay
+            self.unanswered += 1
+            raise aiohttp.ClientConnectionError("No recorded response")
+        line = self._lines[current][index]
+        if line.get("error") == ERROR_TIMEOUT:
+            raise asyncio.TimeoutError
+        if "error" in line:
+            raise aiohttp.ClientConnectionError(line["error"])
+        return line["status"], line["body"].encode("utf-8")
@@ -0,0 +1,45 @@
+"""Credential format checks for the Localvolts integration.
+
+Kept apart from the package so the config flow can use them without
+importing the coordinator and everything it brings with it.
+"""
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def validate_api_key(api_key):
+    """Validate the API key."""
+    expected_length = 32  # Length of a valid API key
+
+    # Check if the API key is of the expected length and a valid hexadecimal
+    if len(api_key) == expected_length and all(c in '0123456789abcdef' for c in api_key.lower()):
+        return True
+    else:
+        _LOGGER.error("Invalid API key format or length.")
+        return False
+
+
+def validate_partner_id(partner_id):
+    """Validate the Partner ID."""
+    # Check if the partner_id is a digit string
+    if partner_id.isdigit():
+        return True
+    else:
+        _LOGGER.error("Invalid Partner ID. It should be numeric.")
+        return False
+
+
+def validate_nmi_id(nmi_id):
+    """Validate the NMI."""
+    expected_length = 11  # Length of a valid NMI is 10 or 11 alphanumeric characters
+
+    # Check if the NMI id is of the expected length and contains only alphanumeric characters
+    if 10 <= len(nmi_id) <= expected_length and nmi_id.isalnum():
+        return True
+    else:
+        _LOGGER.error("Invalid NMI id format or length. NMI must be 10-11 alphanumeric characters.")
+        return False
+
+
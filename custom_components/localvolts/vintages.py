@@ -0,0 +1,192 @@
+"""Forecast revision history and forecast error for the Localvolts integration."""
+
+from __future__ import annotations
+
+import datetime
+import math
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .const import COSTS_FLEX_UP, EARNINGS_FLEX_UP
+from .forecast import ForecastStore, parse_utc, to_float
+
+FIELDS = (COSTS_FLEX_UP, EARNINGS_FLEX_UP)
+# Each vintage: seconds before the interval starts, then one price per field
+SLOT = 1 + len(FIELDS)
+# Lead-time buckets errors are reported in: (label, upper bound in minutes)
+LEAD_BUCKETS: Tuple[Tuple[str, float], ...] = (
+    ("30m", 30),
+    ("2h", 120),
+    ("6h", 360),
+    ("24h", math.inf),
+)
+_BUCKET_BOUNDS = [bound * 60 for _label, bound in LEAD_BUCKETS]
+# Errors kept per field and bucket: a day's worth of intervals
+ERROR_WINDOW = 288
+# Intervals that never got an 'exp' (e.g. during an outage) are dropped
+# this long after they end.
+UNRESOLVED_GRACE = 3600.0
+
+
+def _isoformat(epoch: float) -> str:
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat()
+
+
+class _VintageRing:
+    """The last `depth` forecasts for one interval, in one flat array."""
+
+    __slots__ = ("values", "written")
+
+    def __init__(self, depth: int) -> None:
+        self.values = array("d", [math.nan]) * (SLOT * depth)
+        self.written = 0
+
+    def add(self, lead: float, prices: array) -> None:
+        """Add a forecast, unless its prices are the same as the last one's."""
+        depth = len(self.values) // SLOT
+        if self.written:
+            last = ((self.written - 1) % depth) * SLOT
+            # Compared as bytes so NaN (no price) matches NaN
+            if self.values[last + 1:last + SLOT].tobytes() == prices.tobytes():
+                return
+        offset = (self.written % depth) * SLOT
+        self.values[offset] = lead
+        self.values[offset + 1:offset + SLOT] = prices
+        self.written += 1
+
+    def vintages(self) -> List[Tuple[float, ...]]:
+        """Return the kept vintages, oldest (longest lead) first."""
+        depth = len(self.values) // SLOT
+        count = min(self.written, depth)
+        first = self.written - count
+        return [
+            tuple(self.values[(index % depth) * SLOT:(index % depth + 1) * SLOT])
+            for index in range(first, self.written)
+        ]
+
+
+class _ErrorWindow:
+    """Running bias and mean absolute error over the last ERROR_WINDOW errors."""
+
+    __slots__ = ("errors", "count", "total", "total_abs")
+
+    def __init__(self) -> None:
+        self.errors = array("d", bytes(8 * ERROR_WINDOW))
+        self.count = 0
+        self.total = 0.0
+        self.total_abs = 0.0
+
+    def add(self, error: float) -> None:
+        slot = self.count % ERROR_WINDOW
+        if self.count >= ERROR_WINDOW:
+            old = self.errors[slot]
+            self.total -= old
+            self.total_abs -= abs(old)
+        self.errors[slot] = error
+        self.total += error
+        self.total_abs += abs(error)
+        self.count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        samples = min(self.count, ERROR_WINDOW)
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": samples,
+            "mae": round(self.total_abs / samples, 3),
+            "bias": round(self.total / samples, 3),
+        }
+
+
+class ForecastVintages:
+    """How the forecast for each upcoming interval changed as it got closer.
+
+    Every time the forecast changes, each interval's flex prices are added
+    to that interval's ring of the last `depth` distinct forecasts, along
+    with how far ahead they were made. When the interval's final 'exp'
+    record arrives, each kept forecast's error (forecast minus actual,
+    c/kWh) goes into a rolling window for its lead-time bucket, and the
+    ring is dropped.
+
+    Memory is bounded by the forecast length: about depth * 24 + 160 bytes
+    per forecast interval (~210KB for a 24h forecast at the default depth
+    of 24, ~700KB at the maximum of 96), plus a fixed ~20KB of errors.
+    """
+
+    def __init__(self, depth: int) -> None:
+        self.depth = depth
+        self._targets: Dict[float, _VintageRing] = {}
+        self._errors = {
+            (field, label): _ErrorWindow() for field in FIELDS for label, _bound in LEAD_BUCKETS
+        }
+        self.resolved = 0
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def observe(self, forecast: ForecastStore, now: float) -> None:
+        """Record the forecast for every interval in it, as of now (epoch)."""
+        columns = [forecast.columns.get(field) for field in FIELDS]
+        for index, end in enumerate(forecast.end):
+            ring = self._targets.get(end)
+            if ring is None:
+                ring = self._targets[end] = _VintageRing(self.depth)
+            ring.add(
+                forecast.start[index] - now,
+                array("d", [column[index] if column is not None else math.nan for column in columns]),
+            )
+        for end in [end for end in self._targets if end < now - UNRESOLVED_GRACE]:
+            del self._targets[end]
+
+    def resolve(self, record: Mapping[str, Any]) -> None:
+        """Score the forecasts made for record's interval against it."""
+        try:
+            end = parse_utc(record["intervalEnd"]).timestamp()
+        except (KeyError, ValueError, TypeError, AttributeError):
+            return
+        ring = self._targets.pop(end, None)
+        if ring is None:
+            return
+        actual = [to_float(record.get(field)) for field in FIELDS]
+        for lead, *prices in ring.vintages():
+            if math.isnan(lead):
+                continue
+            label = LEAD_BUCKETS[min(bisect_left(_BUCKET_BOUNDS, lead), len(LEAD_BUCKETS) - 1)][0]
+            for field, price, value in zip(FIELDS, prices, actual):
+                if not (math.isnan(price) or math.isnan(value)):
+                    self._errors[(field, label)].add(price - value)
+        self.resolved += 1
+
+    def error(self, field: str) -> Dict[str, Dict[str, Any]]:
+        """Return bias/MAE/count per lead-time bucket for field."""
+        return {label: self._errors[(field, label)].summary() for label, _bound in LEAD_BUCKETS}
+
+    def mean_absolute_error(self, field: str) -> Optional[float]:
+        """Return field's MAE across every lead time, None before any errors."""
+        windows = [self._errors[(field, label)] for label, _bound in LEAD_BUCKETS]
+        samples = sum(min(window.count, ERROR_WINDOW) for window in windows)
+        if not samples:
+            return None
+        return round(sum(window.total_abs for window in windows) / samples, 3)
+
+    def history(self, start: float = -math.inf, end: float = math.inf) -> List[Dict[str, Any]]:
+        """Return the kept forecasts of each interval ending in (start, end]."""
+        entries = []
+        for target in sorted(self._targets):
+            if not start < target <= end:
+                continue
+            entries.append({
+                "end_time": _isoformat(target),
+                "vintages": [
+                    {
+                        "lead_minutes": round(lead / 60, 1),
+                        **{
+                            field: None if math.isnan(price) else round(price, 5)
+                            for field, price in zip(FIELDS, prices)
+                        },
+                    }
+                    for lead, *prices in self._targets[target].vintages()
+                ],
+            })
+        return entries
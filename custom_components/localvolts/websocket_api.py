@@ -0,0 +1,135 @@
+"""Websocket API for the Localvolts integration."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    COSTS_FLEX_UP,
+    DOMAIN,
+    EARNINGS_FLEX_UP,
+    SECTION_FORECAST_META,
+    SECTION_FORECAST_PRICES,
+)
+from .forecast import ForecastStore, is_numeric_field
+
+WS_FORECAST_SUBSCRIBE = f"{DOMAIN}/forecast/subscribe"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FIELDS = "fields"
+
+DEFAULT_FIELDS = (COSTS_FLEX_UP, EARNINGS_FLEX_UP)
+# Subscriptions listen like the forecast sensor does, so they're woken by
+# any forecast change but not by a new current interval on its own.
+SUBSCRIPTION_SECTIONS = frozenset({SECTION_FORECAST_PRICES, SECTION_FORECAST_META})
+
+
+def _row(forecast: ForecastStore, index: int, fields: Iterable[str]) -> List[Any]:
+    row: List[Any] = [forecast.start_iso[index], forecast.end_iso[index]]
+    for field in fields:
+        value = forecast.value(field, index)
+        row.append(None if value is None else round(value, 5))
+    row.append(forecast.records[index].get("quality"))
+    return row
+
+
+def forecast_message(
+    forecast: ForecastStore,
+    fields: List[str],
+    previous: Optional[ForecastStore] = None,
+) -> Optional[Dict[str, Any]]:
+    """Return a subscription event: the forecast, or what changed since previous.
+
+    upsert holds a row per new or revised interval, columns as in
+    "columns"; remove holds the end_time of each interval gone since
+    previous (mostly ones that have ended). Without previous it's a
+    snapshot of every interval. Returns None if nothing changed.
+    """
+    if previous is None:
+        changed, removed = list(range(len(forecast))), []
+    else:
+        changed, removed = forecast.changes_since(previous)
+        if not changed and not removed:
+            return None
+    message: Dict[str, Any] = {
+        "upsert": [_row(forecast, index, fields) for index in changed],
+        "remove": removed,
+    }
+    if previous is None:
+        message["snapshot"] = True
+        message["columns"] = ["start_time", "end_time", *fields, "quality"]
+    return message
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_FORECAST_SUBSCRIBE,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): str,
+        vol.Optional(ATTR_FIELDS, default=list(DEFAULT_FIELDS)): vol.All(
+            [str], vol.Length(min=1)
+        ),
+    }
+)
+@callback
+def ws_subscribe_forecast(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """Stream an NMI's forecast: a snapshot, then only what each fetch changed.
+
+    A dashboard charting the forecast would otherwise re-read the whole
+    forecast attribute on every change, for every open dashboard. Here a
+    forecast revision sends just the revised intervals, and a new interval
+    just the one that ended (plus any newly published).
+    """
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = msg.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None and len(coordinators) == 1:
+        coordinator = next(iter(coordinators.values()))
+    else:
+        coordinator = coordinators.get(entry_id)
+    if coordinator is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.const.ERR_NOT_FOUND,
+            "config_entry_id is required when more than one NMI is configured"
+            if entry_id is None else f"Unknown Localvolts config entry: {entry_id}",
+        )
+        return
+    fields = msg[ATTR_FIELDS]
+    invalid = [field for field in fields if not is_numeric_field(field)]
+    if invalid:
+        connection.send_error(
+            msg["id"],
+            websocket_api.const.ERR_INVALID_FORMAT,
+            f"Not numeric forecast fields: {', '.join(invalid)}",
+        )
+        return
+
+    sent = coordinator.forecast
+
+    @callback
+    def forecast_updated() -> None:
+        nonlocal sent
+        message = forecast_message(coordinator.forecast, fields, sent)
+        sent = coordinator.forecast
+        if message is not None:
+            connection.send_message(websocket_api.event_message(msg["id"], message))
+
+    connection.subscriptions[msg["id"]] = coordinator.async_add_listener(
+        forecast_updated, SUBSCRIPTION_SECTIONS
+    )
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], forecast_message(sent, fields))
+    )
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the integration's websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_forecast)
@@ -0,0 +1,260 @@
+"""Helpers shared by the Localvolts integration's tests (and benchmarks).
+
+FakeLocalvoltsApi is a local stand-in for the Localvolts interval endpoint.
+It serves /v1/customer/interval with records shaped like the README
+example. A request for more than one interval gets every interval in its
+window, up to `intervals` of them (None for no limit, e.g. to answer a
+sharded multi-day forecast), and each request can be delayed or failed on
+purpose.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime
+import json
+import random
+import tempfile
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, List, Optional
+from unittest.mock import patch
+
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+PATH = "/v1/customer/interval"
+INTERVAL = datetime.timedelta(minutes=5)
+
+
+def run(test: Callable[[], Coroutine[Any, Any, None]]) -> None:
+    """Run an async test to completion, without needing a pytest plugin."""
+    asyncio.run(test())
+
+
+@contextlib.asynccontextmanager
+async def async_test_hass() -> AsyncIterator[HomeAssistant]:
+    """Yield a running Home Assistant with a throwaway config directory."""
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="localvolts-test-"))
+    hass.config.components.add("localvolts")
+    await hass.async_start()
+    try:
+        yield hass
+    finally:
+        await hass.async_stop(force=True)
+
+
+class FakeClock:
+    """Stands in for dt_util.utcnow, moved on by hand."""
+
+    def __init__(self, now: datetime.datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += datetime.timedelta(**kwargs)
+
+    @contextlib.contextmanager
+    def patched(self):
+        with patch.object(dt_util, "utcnow", self):
+            yield self
+
+
+class FakeConnection:
+    """Records what a websocket command sends, in order."""
+
+    def __init__(self) -> None:
+        self.subscriptions: dict = {}
+        self.events: List[dict] = []
+        self.results: List[int] = []
+        self.errors: List[tuple] = []
+
+    def send_message(self, message: dict) -> None:
+        self.events.append(message["event"])
+
+    def send_result(self, msg_id: int, result: Any = None) -> None:
+        self.results.append(msg_id)
+
+    def send_error(self, msg_id: int, code: str, message: str) -> None:
+        self.errors.append((msg_id, code, message))
+
+
+async def async_make_coordinator(hass: HomeAssistant, nmi_id: str = "4103326458", **options: Any):
+    """Return a coordinator for nmi_id, on its own hub, without polling it."""
+    from custom_components.localvolts.coordinator import LocalvoltsDataUpdateCoordinator
+    from custom_components.localvolts.hub import LocalvoltsPartnerHub
+
+    hub = LocalvoltsPartnerHub(hass, "0" * 32, "1")
+    return LocalvoltsDataUpdateCoordinator(hass, hub, nmi_id, **options)
+
+
+async def async_setup_sensors(hass: HomeAssistant, coordinator, options: Optional[dict] = None) -> list:
+    """Set up the sensor platform for coordinator's NMI; returns its entities."""
+    from custom_components.localvolts import sensor
+    from custom_components.localvolts.const import DOMAIN
+
+    entry = SimpleNamespace(
+        entry_id=coordinator.nmi_id, options=options or {}, data={},
+        async_on_unload=lambda func: None,
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    entities: list = []
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+    return entities
+
+
+def _api_time(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def interval_record(end: datetime.datetime, quality: str, revision: int = 0) -> Dict[str, Any]:
+    """Return one interval record, with prices varying by interval."""
+    rng = random.Random(int(end.timestamp()) + revision)
+    costs = rng.uniform(5, 40)
+    earnings = rng.uniform(-2, 15)
+    last_update = end - INTERVAL + datetime.timedelta(seconds=20)
+    return {
+        "NMI": "4103326458",
+        "intervalDuration": "5",
+        "intervalDurationUnits": "minutes",
+        "intervalEnd": _api_time(end),
+        "exportsAll": 0,
+        "exportsAllUnits": "kWh",
+        "importsAll": 0.235,
+        "importsAllUnits": "kWh",
+        "demandMain": 1.41,
+        "demandMainUnits": "kW",
+        "demandPeriod": 30,
+        "demandPeriodUnits": "minutes",
+        "demandInterval": 1,
+        "earningsAll": 0,
+        "earningsAllUnits": "cents",
+        "earningsAllVar": 0,
+        "earningsAllVarUnits": "cents",
+        "earningsAllFixed": 0,
+        "earningsAllFixedUnits": "cents",
+        "earningsAllVarRate": "N/A",
+        "earningsAllVarRateUnits": "c/kWh",
+        "earningsFlexUp": round(earnings, 5),
+        "earningsFlexDown": -earnings,
+        "earningsFlexUnits": "c/kWh",
+        "costsAll": 3.54601201,
+        "costsAllUnits": "cents",
+        "costsAllVar": 2.96613215,
+        "costsAllVarUnits": "cents",
+        "costsAllFixed": 0.57987986,
+        "costsAllFixedUnits": "cents",
+        "costsDemandMain": 39.485,
+        "costsDemandMainUnits": "c/kW/Day",
+        "costsDemandRate": 39.485,
+        "costsDemandRateUnits": "c/kW/Day",
+        "costsAllVarRate": f"{costs:.8f}",
+        "costsAllVarRateUnits": "c/kWh",
+        "costsFlexUp": round(costs, 5),
+        "costsFlexDown": -costs,
+        "costsFlexUnits": "c/kWh",
+        "exportsAllEmissions": 0,
+        "exportsAllEmissionsUnits": "g-CO2e",
+        "importsAllEmissions": 166.427,
+        "importsAllEmissionsUnits": "g-CO2e",
+        "exportsAllZeroEE": 1,
+        "exportsAllZeroEEUnits": "%",
+        "importsAllZeroEE": "0.21490000",
+        "importsAllZeroEEUnits": "%",
+        "quality": quality,
+        "lastUpdate": (last_update + datetime.timedelta(seconds=revision)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        ),
+    }
+
+
+class FakeLocalvoltsApi:
+    """aiohttp server answering interval requests from generated data.
+
+    latency: seconds to wait before answering each request.
+    error_rate: fraction of requests (0-1) answered with HTTP 503.
+    revision: bump to make every forecast interval look re-published.
+    """
+
+    def __init__(
+        self,
+        intervals: Optional[int] = 287,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.intervals = intervals
+        self.latency = latency
+        self.error_rate = error_rate
+        self.revision = 0
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._rng = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    def payload(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+        now: Optional[datetime.datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the records for a request, as the API would answer at now."""
+        if now is None:
+            # dt_util's, so a test's FakeClock moves the API along with it
+            now = dt_util.utcnow()
+        # Intervals ending in (from, to], like the real endpoint
+        first = from_time.replace(second=0, microsecond=0)
+        first += datetime.timedelta(minutes=5 - first.minute % 5)
+        count = 1 if to_time - from_time <= INTERVAL else int((to_time - first) / INTERVAL) + 1
+        if self.intervals is not None:
+            count = min(count, self.intervals)
+        records = []
+        for index in range(count):
+            end = first + INTERVAL * index
+            if end <= now:
+                quality = "Act"
+            elif end - INTERVAL <= now:
+                quality = "Exp"
+            else:
+                quality = "Fcst"
+            records.append(interval_record(end, quality, self.revision if quality == "Fcst" else 0))
+        return records
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+        from_time = datetime.datetime.fromisoformat(request.query["from"].replace("Z", "+00:00"))
+        to_time = datetime.datetime.fromisoformat(request.query["to"].replace("Z", "+00:00"))
+        # Built in the executor so the server, which shares the loop with
+        # the code under test, doesn't show up in loop_block measurements
+        body = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: json.dumps(self.payload(from_time, to_time))
+        )
+        self.bytes_sent += len(body)
+        return web.Response(text=body, content_type="application/json")
+
+    async def start(self) -> str:
+        """Start serving on a free localhost port; returns the endpoint URL."""
+        app = web.Application()
+        app.router.add_get(PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.url = f"http://127.0.0.1:{port}{PATH}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,193 @@
+"""Tests for the cost accumulator."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+
+import pytest
+
+from custom_components.localvolts.accumulator import (
+    KIND_COSTS,
+    KIND_EARNINGS,
+    PERIOD_INTERVAL,
+    PERIOD_TODAY,
+    PERIOD_TOTAL,
+    CostAccumulator,
+)
+from custom_components.localvolts.const import COSTS_FLEX_UP, EARNINGS_FLEX_UP
+
+from .common import FakeClock, async_test_hass, run
+
+POWER = "sensor.grid_power"
+# Far enough ahead that no rollover timer fires during a test, so the
+# accumulator only moves when the tests move the clock.
+START = datetime.datetime(2099, 6, 1, 10, 0, tzinfo=datetime.timezone.utc)
+
+
+def _price(start: datetime.datetime) -> tuple:
+    """The stub's (costsFlexUp, earningsFlexUp) for the interval starting at start."""
+    index = start.minute // 5
+    return 10.0 + index, 5.0 + index
+
+
+class StubCoordinator:
+    """Just the coordinator surface the accumulator uses: a price per 5 minutes."""
+
+    nmi_id = "4103326458"
+
+    def price_at(self, when: datetime.datetime) -> dict:
+        start = when.replace(minute=when.minute - when.minute % 5, second=0, microsecond=0)
+        costs, earnings = _price(start)
+        return {
+            "start_time": start.isoformat(),
+            "end_time": (start + datetime.timedelta(minutes=5)).isoformat(),
+            COSTS_FLEX_UP: costs,
+            EARNINGS_FLEX_UP: earnings,
+        }
+
+    def async_add_listener(self, update_callback, context=None):
+        return lambda: None
+
+
+def _cents(kw: float, minutes: float, price: float) -> float:
+    return kw * minutes / 60 * price
+
+
+async def _set_power(hass, clock: FakeClock, value: str, minutes: float, unit: str = "kW") -> None:
+    clock.advance(minutes=minutes)
+    hass.states.async_set(POWER, value, {"unit_of_measurement": unit})
+    await hass.async_block_till_done()
+
+
+async def _accumulator(hass) -> CostAccumulator:
+    accumulator = CostAccumulator(hass, StubCoordinator(), POWER)
+    await accumulator.async_restore()
+    return accumulator
+
+
+def test_reading_across_a_price_boundary_is_split() -> None:
+    async def test() -> None:
+        with FakeClock(START + datetime.timedelta(minutes=4)).patched() as clock:
+            async with async_test_hass() as hass:
+                hass.states.async_set(POWER, "2000", {"unit_of_measurement": "W"})
+                accumulator = await _accumulator(hass)
+                stop = accumulator.async_start()
+
+                # 2 kW from 10:04 to 10:07: one minute at 10:00's price, two at 10:05's
+                await _set_power(hass, clock, "0", 3)
+
+                first = _price(START)[0]
+                second = _price(START + datetime.timedelta(minutes=5))[0]
+                totals = accumulator.totals[KIND_COSTS]
+                assert totals[PERIOD_INTERVAL] == pytest.approx(_cents(2, 2, second))
+                assert totals[PERIOD_TODAY] == pytest.approx(_cents(2, 1, first) + _cents(2, 2, second))
+                assert totals[PERIOD_TOTAL] == totals[PERIOD_TODAY]
+                assert accumulator.totals[KIND_EARNINGS] == [0.0, 0.0, 0.0]
+                await stop()
+
+    run(test)
+
+
+def test_export_earns() -> None:
+    async def test() -> None:
+        with FakeClock(START + datetime.timedelta(minutes=1)).patched() as clock:
+            async with async_test_hass() as hass:
+                hass.states.async_set(POWER, "-1.5", {"unit_of_measurement": "kW"})
+                accumulator = await _accumulator(hass)
+                stop = accumulator.async_start()
+
+                await _set_power(hass, clock, "0", 2)
+
+                totals = accumulator.totals[KIND_EARNINGS]
+                assert totals[PERIOD_INTERVAL] == pytest.approx(_cents(1.5, 2, _price(START)[1]))
+                assert accumulator.totals[KIND_COSTS] == [0.0, 0.0, 0.0]
+                await stop()
+
+    run(test)
+
+
+def test_unavailable_sensor_adds_nothing() -> None:
+    async def test() -> None:
+        with FakeClock(START + datetime.timedelta(minutes=1)).patched() as clock:
+            async with async_test_hass() as hass:
+                hass.states.async_set(POWER, "2", {"unit_of_measurement": "kW"})
+                accumulator = await _accumulator(hass)
+                stop = accumulator.async_start()
+
+                # 2 kW for a minute, a minute unavailable, then 1 kW for a minute
+                await _set_power(hass, clock, "unavailable", 1)
+                await _set_power(hass, clock, "1", 1)
+                await _set_power(hass, clock, "0", 1)
+
+                price = _price(START)[0]
+                totals = accumulator.totals[KIND_COSTS]
+                assert totals[PERIOD_INTERVAL] == pytest.approx(_cents(2, 1, price) + _cents(1, 1, price))
+                await stop()
+
+    run(test)
+
+
+def test_stopping_saves_for_a_restart_to_restore() -> None:
+    async def test() -> None:
+        with FakeClock(START + datetime.timedelta(minutes=1)).patched() as clock:
+            async with async_test_hass() as hass:
+                hass.states.async_set(POWER, "3", {"unit_of_measurement": "kW"})
+                accumulator = await _accumulator(hass)
+                stop = accumulator.async_start()
+                await _set_power(hass, clock, "2", 1)
+
+                # Stopped (unloaded) a minute later, with a delayed save still pending
+                clock.advance(minutes=1)
+                await stop()
+                saved = list(accumulator.totals[KIND_COSTS])
+                price = _price(START)[0]
+                assert saved[PERIOD_INTERVAL] == pytest.approx(_cents(3, 1, price) + _cents(2, 1, price))
+
+                # Restarted within the same interval: every period carries on
+                restarted = await _accumulator(hass)
+                assert restarted.totals[KIND_COSTS] == saved
+
+                # In a later interval, the same day: the interval starts afresh
+                clock.advance(minutes=5)
+                restarted = await _accumulator(hass)
+                assert restarted.totals[KIND_COSTS] == [0.0, saved[PERIOD_TODAY], saved[PERIOD_TOTAL]]
+
+                # The next day: only the running total survives
+                clock.advance(days=1)
+                restarted = await _accumulator(hass)
+                assert restarted.totals[KIND_COSTS] == [0.0, 0.0, saved[PERIOD_TOTAL]]
+
+                # Time Home Assistant wasn't running isn't counted
+                hass.states.async_set(POWER, "0", {"unit_of_measurement": "kW"})
+                await restarted.async_start()()
+                assert restarted.totals[KIND_COSTS] == [0.0, 0.0, saved[PERIOD_TOTAL]]
+
+    run(test)
+
+
+def test_rollover_saves_however_often_the_sensor_updates() -> None:
+    async def test() -> None:
+        with FakeClock(START).patched() as clock:
+            async with async_test_hass() as hass:
+                hass.states.async_set(POWER, "1", {"unit_of_measurement": "kW"})
+                accumulator = await _accumulator(hass)
+                stop = accumulator.async_start()
+                # An update every 10s keeps pushing the delayed save back
+                for step in range(30):
+                    await _set_power(hass, clock, str(1 + step % 2), 1 / 6)
+                path = accumulator._store.path
+                assert not os.path.exists(path)
+
+                accumulator._async_rollover(clock())
+                await hass.async_block_till_done()
+
+                with open(path, encoding="utf-8") as file:
+                    stored = json.load(file)["data"]
+                assert stored["interval_end"] == accumulator.interval_end
+                assert stored[KIND_COSTS] == accumulator.totals[KIND_COSTS]
+                assert stored[KIND_COSTS][PERIOD_TOTAL] > 0
+                await stop()
+
+    run(test)
@@ -0,0 +1,93 @@
+"""Tests for the history backfill's hand-off with the live statistics."""
+
+from __future__ import annotations
+
+import datetime
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.localvolts.backfill import HistoryBackfill
+from custom_components.localvolts.statistics import (
+    INTERVAL_STATISTICS,
+    IntervalStatistics,
+    statistic_id,
+)
+
+from .common import FakeClock, async_test_hass, run
+
+NMI_ID = "4103326458"
+# The recorder has every hour up to 08:00; it's now 12:00.
+WRITTEN_UNTIL = datetime.datetime(2099, 6, 1, 8, 0, tzinfo=datetime.timezone.utc)
+NOW = WRITTEN_UNTIL + datetime.timedelta(hours=4)
+# Intervals of the 08:00 hour the live poll never got
+GAP = {WRITTEN_UNTIL + datetime.timedelta(minutes=minutes) for minutes in (25, 30, 35)}
+COSTS = statistic_id(NMI_ID, INTERVAL_STATISTICS[0])
+
+
+def _record(end: datetime.datetime) -> dict:
+    """An 'exp' interval costing a cent."""
+    return {
+        "intervalEnd": end.isoformat().replace("+00:00", "Z"),
+        "intervalDuration": 5,
+        "quality": "Exp",
+        **{statistic.field: 1.0 for statistic in INTERVAL_STATISTICS},
+    }
+
+
+def _ends(start: datetime.datetime, stop: datetime.datetime):
+    end = start + datetime.timedelta(minutes=5)
+    while end <= stop:
+        yield end
+        end += datetime.timedelta(minutes=5)
+
+
+class FakeHub:
+    """Serves every interval asked for, as the API's raw JSON."""
+
+    async def async_fetch_intervals(self, nmi_id, start, end, background=False, raw=False, **kwargs):
+        return json.dumps([_record(interval_end) for interval_end in _ends(start, end)])
+
+
+def test_gap_in_restored_partial_hour_is_backfilled() -> None:
+    async def test() -> None:
+        written = []
+
+        def last_statistics(hass, count, sid, convert_units, types):
+            return {sid: [{"start": (WRITTEN_UNTIL - datetime.timedelta(hours=1)).timestamp(), "sum": 0.0}]}
+
+        def add_statistics(hass, metadata, rows):
+            written.extend((metadata["statistic_id"], row["start"], row["state"]) for row in rows)
+
+        with FakeClock(NOW).patched(), patch(
+            "homeassistant.components.recorder.get_instance",
+            lambda hass: SimpleNamespace(async_add_executor_job=hass.async_add_executor_job),
+        ), patch(
+            "homeassistant.components.recorder.statistics.get_last_statistics", last_statistics
+        ), patch(
+            "homeassistant.components.recorder.statistics.async_add_external_statistics",
+            add_statistics,
+        ):
+            async with async_test_hass() as hass:
+                hass.config.components.add("recorder")
+                statistics = IntervalStatistics(hass, NMI_ID)
+                # The warm-start cache: the 08:00 hour, bar the gap. It's
+                # past INCOMPLETE_HOUR_GRACE, so a flush would write it as is.
+                hour_end = WRITTEN_UNTIL + datetime.timedelta(hours=1)
+                statistics.restore([
+                    [end.timestamp(), end.timestamp() - 300, [1.0] * len(INTERVAL_STATISTICS)]
+                    for end in _ends(WRITTEN_UNTIL, hour_end) if end not in GAP
+                ])
+                backfill = HistoryBackfill(hass, FakeHub(), NMI_ID, statistics, 1, 3600 * 1000)
+
+                recorded = await backfill.async_run()
+
+                assert recorded > 0
+                costs = {start: state for sid, start, state in written if sid == COSTS}
+                # The whole hour, gap included: twelve intervals at a cent each
+                assert costs[WRITTEN_UNTIL] == pytest.approx(12 * 0.01)
+                assert not statistics.backfilling
+
+    run(test)
@@ -0,0 +1,80 @@
+"""Tests for sharing interval records between config entries."""
+
+from __future__ import annotations
+
+import datetime
+import gc
+import tracemalloc
+
+from custom_components.localvolts import forecast as forecast_module
+from custom_components.localvolts import hub as hub_module
+from custom_components.localvolts import records as records_module
+from custom_components.localvolts.const import (
+    ATTRIBUTE_PROFILE_FULL,
+    CONF_ATTRIBUTE_PROFILE,
+    COSTS_FLEX_UP,
+    EARNINGS_FLEX_UP,
+)
+
+from .common import (
+    FakeClock,
+    FakeLocalvoltsApi,
+    async_make_coordinator,
+    async_setup_sensors,
+    async_test_hass,
+    run,
+)
+
+START = datetime.datetime(2099, 6, 1, 10, 0, 2, tzinfo=datetime.timezone.utc)
+NMI_IDS = ("4103326458", "4103326459")
+# Most a second entry may add, as a fraction of the first's footprint.
+# Sharing schemas and values it's under 20% here; with a copy of each per
+# entry, about 45%.
+ADDED_ENTRY_MAX_RATIO = 1 / 3
+
+
+def test_second_entry_shares_records_and_adds_little_memory() -> None:
+    async def test() -> None:
+        api = FakeLocalvoltsApi(None)
+        hub_module.API_URL = await api.start()
+        try:
+            with FakeClock(START).patched():
+                async with async_test_hass() as hass:
+                    # Start from nothing the first entry could share with,
+                    # or it would look cheaper than it is
+                    records_module._FLOATS = {}
+                    forecast_module.parse_utc.cache_clear()
+                    gc.collect()
+                    tracemalloc.start()
+                    coordinators = []
+                    footprints = []
+                    try:
+                        for nmi_id in NMI_IDS:
+                            # One forecast vintage: history is per-NMI by
+                            # design, and would drown out what sharing saves
+                            coordinator = await async_make_coordinator(
+                                hass, nmi_id, forecast_hours=24, forecast_history_depth=1
+                            )
+                            await coordinator.async_refresh()
+                            for entity in await async_setup_sensors(
+                                hass, coordinator, {CONF_ATTRIBUTE_PROFILE: ATTRIBUTE_PROFILE_FULL}
+                            ):
+                                entity.extra_state_attributes
+                            coordinators.append(coordinator)
+                            gc.collect()
+                            footprints.append(tracemalloc.get_traced_memory()[0])
+                    finally:
+                        tracemalloc.stop()
+
+                    first, second = (coordinator.forecast for coordinator in coordinators)
+                    assert len(first) == len(second) > 0
+                    for mine, theirs in zip(first.records, second.records):
+                        assert mine.schema is theirs.schema
+                        assert mine[COSTS_FLEX_UP] is theirs[COSTS_FLEX_UP]
+                        assert mine[EARNINGS_FLEX_UP] is theirs[EARNINGS_FLEX_UP]
+                    added = footprints[1] - footprints[0]
+                    assert added < footprints[0] * ADDED_ENTRY_MAX_RATIO
+        finally:
+            await api.stop()
+
+    run(test)
@@ -0,0 +1,66 @@
+"""Tests for the Localvolts sensors."""
+
+from __future__ import annotations
+
+import datetime
+from typing import Any, Callable
+
+from custom_components.localvolts import hub as hub_module
+
+from .common import (
+    FakeClock,
+    FakeLocalvoltsApi,
+    async_make_coordinator,
+    async_setup_sensors,
+    async_test_hass,
+    run,
+)
+
+# Early in an interval, so every poll below finds the same one
+START = datetime.datetime(2099, 6, 1, 10, 0, 2, tzinfo=datetime.timezone.utc)
+# Polls the hub makes in an interval that usually find nothing new
+POLLS_PER_INTERVAL = 29
+
+
+def test_unchanged_polls_reuse_cached_attributes() -> None:
+    async def test() -> None:
+        api = FakeLocalvoltsApi(None)
+        hub_module.API_URL = await api.start()
+        try:
+            with FakeClock(START).patched() as clock:
+                async with async_test_hass() as hass:
+                    coordinator = await async_make_coordinator(hass, forecast_hours=24)
+                    await coordinator.async_refresh()
+                    cached = [
+                        entity for entity in await async_setup_sensors(hass, coordinator)
+                        if hasattr(entity, "_attributes_generation")
+                    ]
+                    assert cached
+                    builds = {entity.unique_id: 0 for entity in cached}
+
+                    def counting(entity, build: Callable[[], Any]) -> Callable[[], Any]:
+                        def wrapper() -> Any:
+                            builds[entity.unique_id] += 1
+                            return build()
+                        return wrapper
+
+                    for entity in cached:
+                        entity._build_attributes = counting(entity, entity._build_attributes)
+
+                    # Read after each poll, as a state write would
+                    generation = coordinator.generation
+                    for _ in range(POLLS_PER_INTERVAL):
+                        clock.advance(seconds=10)
+                        await coordinator.async_refresh()
+                        for entity in cached:
+                            entity.extra_state_attributes
+                    await coordinator._async_refresh_forecast(notify=True)
+                    for entity in cached:
+                        entity.extra_state_attributes
+
+                    assert coordinator.generation == generation
+                    assert builds == {entity.unique_id: 1 for entity in cached}
+        finally:
+            await api.stop()
+
+    run(test)
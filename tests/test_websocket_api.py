@@ -0,0 +1,126 @@
+"""Tests for the localvolts/forecast/subscribe websocket command."""
+
+from __future__ import annotations
+
+import datetime
+
+from custom_components.localvolts import coordinator as coordinator_module
+from custom_components.localvolts import hub as hub_module
+from custom_components.localvolts.const import COSTS_FLEX_UP, DOMAIN
+from custom_components.localvolts.forecast import ForecastStore
+from custom_components.localvolts.records import RecordDecoder
+from custom_components.localvolts.websocket_api import (
+    DEFAULT_FIELDS,
+    WS_FORECAST_SUBSCRIBE,
+    forecast_message,
+    ws_subscribe_forecast,
+)
+
+from .common import FakeConnection, FakeLocalvoltsApi, async_test_hass, interval_record, run
+
+FIELDS = list(DEFAULT_FIELDS)
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _store(revisions: dict | None = None, count: int = 6) -> ForecastStore:
+    """A forecast of count intervals, each at the revision given for its index."""
+    revisions = revisions or {}
+    return ForecastStore.from_records(RecordDecoder().decode_all(
+        interval_record(START + datetime.timedelta(minutes=5 * (index + 1)), "Fcst", revisions.get(index, 0))
+        for index in range(count)
+    ))
+
+
+def test_revised_interval_is_upserted_alone() -> None:
+    before = _store()
+    after = before.merge(_store({2: 1}).records)
+
+    message = forecast_message(after, FIELDS, before)
+
+    assert message["remove"] == []
+    assert [row[1] for row in message["upsert"]] == [after.end_iso[2]]
+    assert message["upsert"][0][2] == round(after.value(COSTS_FLEX_UP, 2), 5)
+    assert "snapshot" not in message
+
+
+def test_expired_interval_is_removed() -> None:
+    before = _store()
+    after = before.merge(now=before.end[0])
+
+    message = forecast_message(after, FIELDS, before)
+
+    assert message == {"upsert": [], "remove": [before.end_iso[0]]}
+
+
+def test_unchanged_forecast_sends_nothing() -> None:
+    before = _store()
+    after = before.merge(_store().records)
+
+    assert after is before
+    assert forecast_message(after, FIELDS, before) is None
+
+
+def test_subscription_streams_only_changes() -> None:
+    """End to end: a real coordinator polling the stand-in API."""
+
+    async def test() -> None:
+        api = FakeLocalvoltsApi(None)
+        hub_module.API_URL = await api.start()
+        try:
+            async with async_test_hass() as hass:
+                hub = hub_module.LocalvoltsPartnerHub(hass, "0" * 32, "1")
+                coordinator = coordinator_module.LocalvoltsDataUpdateCoordinator(
+                    hass, hub, "4103326458"
+                )
+                await coordinator.async_refresh()
+                hass.data[DOMAIN] = {"entry": coordinator}
+                connection = FakeConnection()
+                ws_subscribe_forecast(hass, connection, {
+                    "id": 1, "type": WS_FORECAST_SUBSCRIBE, "fields": FIELDS,
+                })
+                assert connection.results == [1]
+                snapshot = connection.events[-1]
+                assert snapshot["snapshot"] is True
+                assert len(snapshot["upsert"]) == len(coordinator.forecast)
+
+                # A poll that finds the same forecast sends nothing
+                await coordinator._async_refresh_forecast(notify=True)
+                coordinator.async_set_updated_data(coordinator._build_data())
+                assert len(connection.events) == 1
+
+                # Every interval re-published: each arrives as an update
+                api.revision += 1
+                await coordinator._async_refresh_forecast(notify=True)
+                revised = connection.events[-1]
+                assert len(connection.events) == 2
+                assert revised["remove"] == []
+                assert [row[1] for row in revised["upsert"]] == list(coordinator.forecast.end_iso)
+
+                # The first interval ending: just its removal
+                forecast = coordinator.forecast
+                coordinator.forecast = forecast.merge(now=forecast.end[0])
+                coordinator._async_data_changed()
+                coordinator.async_set_updated_data(coordinator._build_data())
+                assert connection.events[-1] == {"upsert": [], "remove": [forecast.end_iso[0]]}
+
+                connection.subscriptions[1]()
+        finally:
+            await api.stop()
+
+    run(test)
+
+
+def test_non_numeric_fields_are_rejected() -> None:
+    async def test() -> None:
+        async with async_test_hass() as hass:
+            hass.data[DOMAIN] = {"entry": coordinator_module.LocalvoltsDataUpdateCoordinator(
+                hass, hub_module.LocalvoltsPartnerHub(hass, "0" * 32, "1"), "4103326458"
+            )}
+            connection = FakeConnection()
+            ws_subscribe_forecast(hass, connection, {
+                "id": 1, "type": WS_FORECAST_SUBSCRIBE, "fields": ["quality"],
+            })
+            assert [error[0] for error in connection.errors] == [1]
+            assert connection.subscriptions == {}
+
+    run(test)